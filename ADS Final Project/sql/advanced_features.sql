@@ -23,6 +23,11 @@ CREATE INDEX IF NOT EXISTS idx_sessions_tutor_status ON sessions(tutor_id, statu
 -- Composite index for student and status queries
 CREATE INDEX IF NOT EXISTS idx_sessions_student_status ON sessions(student_id, status);
 
+-- Composite indexes for keyset pagination of the session log
+-- (newest first by session_date, session_time, session_id per user)
+CREATE INDEX IF NOT EXISTS idx_sessions_student_keyset ON sessions(student_id, session_date, session_time, session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_tutor_keyset ON sessions(tutor_id, session_date, session_time, session_id);
+
 -- Index on users table for email lookups
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 
@@ -66,6 +71,7 @@ ORDER BY s.session_date, s.session_time;
 
 -- View: Session Statistics by Tutor
 -- Shows statistics for each tutor (total, pending, approved, completed, declined)
+-- (Single-profile dashboard reads use the session_counters table instead)
 CREATE OR REPLACE VIEW v_tutor_statistics AS
 SELECT 
     t.tutor_id,
@@ -97,13 +103,16 @@ GROUP BY st.student_id, st.full_name;
 
 -- View: Monthly Session Report
 -- Shows session counts grouped by month and status
+-- Reads the maintained session_monthly_rollup table; every session appears
+-- there once per role, so summing the student rows counts each session once
 CREATE OR REPLACE VIEW v_monthly_sessions AS
 SELECT 
-    DATE_FORMAT(session_date, '%Y-%m') AS month_year,
+    DATE_FORMAT(month, '%Y-%m') AS month_year,
     status,
-    COUNT(*) AS session_count
-FROM sessions
-GROUP BY DATE_FORMAT(session_date, '%Y-%m'), status
+    SUM(session_count) AS session_count
+FROM session_monthly_rollup
+WHERE role = 'student'
+GROUP BY DATE_FORMAT(month, '%Y-%m'), status
 ORDER BY month_year DESC, status;
 
 
@@ -232,10 +241,13 @@ CREATE PROCEDURE sp_update_session_status(
 )
 BEGIN
     DECLARE v_current_status VARCHAR(10);
+    DECLARE v_stored_status VARCHAR(10);
+    DECLARE v_student_id INT;
+    DECLARE v_tutor_id INT;
     DECLARE v_valid_transition BOOLEAN DEFAULT FALSE;
     
     -- Get current status
-    SELECT status INTO v_current_status
+    SELECT status, student_id, tutor_id INTO v_current_status, v_student_id, v_tutor_id
     FROM sessions
     WHERE session_id = p_session_id;
     
@@ -251,6 +263,40 @@ BEGIN
         SET status = p_new_status
         WHERE session_id = p_session_id;
         
+        -- trg_auto_complete_past_sessions may have stored 'completed'
+        -- instead of 'approved', so count the status actually stored
+        SELECT status INTO v_stored_status
+        FROM sessions
+        WHERE session_id = p_session_id;
+        
+        -- Keep the per-profile counters (session_counters) in step
+        UPDATE session_counters
+        SET pending_count = pending_count - (v_current_status = 'pending') + (v_stored_status = 'pending'),
+            approved_count = approved_count - (v_current_status = 'approved') + (v_stored_status = 'approved'),
+            completed_count = completed_count - (v_current_status = 'completed') + (v_stored_status = 'completed'),
+            declined_count = declined_count - (v_current_status = 'declined') + (v_stored_status = 'declined'),
+            version = version + 1
+        WHERE (role = 'student' AND profile_id = v_student_id)
+           OR (role = 'tutor' AND profile_id = v_tutor_id);
+        
+        -- Move the session between status buckets of the monthly rollup
+        UPDATE session_monthly_rollup r
+        INNER JOIN sessions s ON s.session_id = p_session_id
+        SET r.session_count = r.session_count - 1
+        WHERE r.month = DATE_FORMAT(s.session_date, '%Y-%m-01')
+          AND r.subject_id = s.subject_id
+          AND r.status = v_current_status
+          AND ((r.role = 'student' AND r.profile_id = v_student_id)
+            OR (r.role = 'tutor' AND r.profile_id = v_tutor_id));
+        
+        INSERT INTO session_monthly_rollup (role, profile_id, month, subject_id, status, session_count)
+        SELECT 'student', v_student_id, DATE_FORMAT(session_date, '%Y-%m-01'), subject_id, v_stored_status, 1
+        FROM sessions WHERE session_id = p_session_id
+        UNION ALL
+        SELECT 'tutor', v_tutor_id, DATE_FORMAT(session_date, '%Y-%m-01'), subject_id, v_stored_status, 1
+        FROM sessions WHERE session_id = p_session_id
+        ON DUPLICATE KEY UPDATE session_count = session_count + 1;
+        
         SET p_result = 'Status updated successfully';
     ELSE
         SET p_result = CONCAT('Invalid status transition from ', v_current_status, ' to ', p_new_status);
@@ -274,6 +320,17 @@ CREATE TABLE IF NOT EXISTS session_audit_log (
     FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
 );
 
+-- Audit trail of archived sessions. manage.py archive_sessions copies the
+-- rows here before deleting the sessions, which cascades to the log above
+CREATE TABLE IF NOT EXISTS session_audit_log_archive (
+    log_id INT PRIMARY KEY,
+    session_id INT NOT NULL,
+    old_status VARCHAR(10),
+    new_status VARCHAR(10),
+    changed_at TIMESTAMP NULL,
+    INDEX idx_audit_log_archive_session (session_id)
+);
+
 DELIMITER //
 CREATE TRIGGER trg_session_status_update
 AFTER UPDATE ON sessions
@@ -18,7 +18,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutoring_system.settings')
 django.setup()
 
 from tutoring_app.models import User, Student, Tutor, Subject, Session
-from django.contrib.auth.hashers import make_password
+from tutoring_app.provisioning import provision_accounts
 
 # Realistic first names
 FIRST_NAMES = [
@@ -183,6 +183,13 @@ def populate_subjects(count=None):
     print(f"Inserted {len(SUBJECTS)} subjects")
 
 
+def print_provisioning_stats(stats):
+    """Print per-stage throughput of a provision_accounts() run"""
+    for stage in ('hash', 'users', 'profiles'):
+        print(f"  {stage}: {stats[stage]['count']} in {stats[stage]['seconds']:.2f}s "
+              f"({stats[stage]['per_second']:,.0f}/s)")
+
+
 def populate_students(count=1500):
     """Populate students and users tables"""
     print(f"Populating {count} students...")
@@ -196,7 +203,7 @@ def populate_students(count=1500):
     to_add = count - existing_count
     print(f"Adding {to_add} more students...")
     
-    students_to_create = []
+    accounts = []
     start_num = existing_count + 1
     
     for i in range(start_num, start_num + to_add):
@@ -224,28 +231,21 @@ def populate_students(count=1500):
         
         created_at = datetime.now() - timedelta(days=random.randint(0, 365))
         
-        # Create user using Django ORM (properly hashes password)
-        user = User.objects.create_user(
-            email=email,
-            username=username,
-            password=password,  # Django will hash this automatically
-            role='student',
-            date_joined=created_at,
-            first_name=first_name,
-            last_name=last_name
-        )
-        
-        # Create student profile
-        student = Student(user=user, full_name=full_name)
-        students_to_create.append(student)
-        
-        if i % 100 == 0:
-            Student.objects.bulk_create(students_to_create)
-            students_to_create = []
-            print(f"Inserted {i} students...")
+        accounts.append({
+            'email': email,
+            'username': username,
+            'password': password,
+            'role': 'student',
+            'full_name': full_name,
+            'date_joined': created_at,
+            'first_name': first_name,
+            'last_name': last_name,
+        })
     
-    if students_to_create:
-        Student.objects.bulk_create(students_to_create)
+    # Hashes each distinct password once (in parallel) and bulk-inserts
+    # users and profiles
+    stats = provision_accounts(accounts)
+    print_provisioning_stats(stats)
     
     print(f"Inserted {to_add} students (Total: {Student.objects.count()})")
 
@@ -263,7 +263,7 @@ def populate_tutors(count=500):
     to_add = count - existing_count
     print(f"Adding {to_add} more tutors...")
     
-    tutors_to_create = []
+    accounts = []
     start_num = existing_count + 1
     
     for i in range(start_num, start_num + to_add):
@@ -293,28 +293,20 @@ def populate_tutors(count=500):
         specialization = random.choice(SPECIALIZATIONS)
         created_at = datetime.now() - timedelta(days=random.randint(0, 365))
         
-        # Create user using Django ORM (properly hashes password)
-        user = User.objects.create_user(
-            email=email,
-            username=username,
-            password=password,  # Django will hash this automatically
-            role='tutor',
-            date_joined=created_at,
-            first_name=first_name,
-            last_name=last_name
-        )
-        
-        # Create tutor profile
-        tutor = Tutor(user=user, full_name=full_name, specialization=specialization)
-        tutors_to_create.append(tutor)
-        
-        if i % 100 == 0:
-            Tutor.objects.bulk_create(tutors_to_create)
-            tutors_to_create = []
-            print(f"Inserted {i} tutors...")
+        accounts.append({
+            'email': email,
+            'username': username,
+            'password': password,
+            'role': 'tutor',
+            'full_name': full_name,
+            'specialization': specialization,
+            'date_joined': created_at,
+            'first_name': first_name,
+            'last_name': last_name,
+        })
     
-    if tutors_to_create:
-        Tutor.objects.bulk_create(tutors_to_create)
+    stats = provision_accounts(accounts)
+    print_provisioning_stats(stats)
     
     print(f"Inserted {to_add} tutors (Total: {Tutor.objects.count()})")
 
@@ -1,5 +1,41 @@
 from django.contrib import admin
-from .models import User, Student, Tutor, Subject, Session
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from .models import User, Student, Tutor, Subject, Session, SessionArchive
+from .search import index_session, search
+from .signals import session_created, session_status_changed, session_deleted
+
+
+class SearchRankChangeList(ChangeList):
+    """Change list that shows search results best match first, unless a column is sorted"""
+
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        if ORDER_VAR not in self.params and 'search_rank' in queryset.query.annotations:
+            ordering = ['search_rank'] + [field for field in ordering if field != 'search_rank']
+        return ordering
+
+
+class IndexedSearchMixin:
+    """Searches sessions through the session search index (see search.py)
+    instead of icontains across joined names and notes"""
+    search_fields = ('student__full_name', 'tutor__full_name', 'subject__subject_name', 'notes')
+    search_help_text = 'Matches every word as a prefix of names, subject or notes; best matches first.'
+
+    def get_changelist(self, request, **kwargs):
+        return SearchRankChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        ranked = [session_id for session_id, _ in search(search_term)]
+        rank = Case(
+            *[When(session_id=session_id, then=Value(position)) for position, session_id in enumerate(ranked)],
+            default=Value(len(ranked)),
+            output_field=IntegerField()
+        ) if ranked else Value(0, output_field=IntegerField())
+        return queryset.filter(session_id__in=ranked).annotate(search_rank=rank), False
 
 
 @admin.register(User)
@@ -42,13 +78,63 @@ class SubjectAdmin(admin.ModelAdmin):
     search_fields = ('subject_name',)
 
 
+# Session fields that place a session in counters, the monthly rollup and
+# the booking index; changing one moves the session between their rows
+PLACEMENT_FIELDS = ('student_id', 'tutor_id', 'subject_id', 'session_date', 'session_time')
+
+
 @admin.register(Session)
-class SessionAdmin(admin.ModelAdmin):
+class SessionAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('session_id', 'student', 'tutor', 'subject', 'session_date', 'session_time', 'status', 'created_at')
     list_filter = ('status', 'session_date', 'subject', 'created_at')
-    search_fields = ('student__full_name', 'tutor__full_name', 'subject__subject_name', 'notes')
     date_hierarchy = 'session_date'
     list_per_page = 50
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
+    
+    # Keep session_counters, the rollup, the booking index and the search
+    # index in step with edits made through the admin
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            # The row as stored, locked so the signals describe exactly this edit
+            old = Session.objects.select_for_update().get(pk=obj.pk) if change else None
+            super().save_model(request, obj, form, change)
+            if not change:
+                session_created.send(sender=Session, session=obj)
+            elif any(getattr(old, field) != getattr(obj, field) for field in PLACEMENT_FIELDS):
+                # Moved to another participant, subject or slot: the old row
+                # goes away and the new one arrives, whatever the status did
+                session_deleted.send(sender=Session, session=old, session_id=old.session_id)
+                session_created.send(sender=Session, session=obj)
+            else:
+                if old.status != obj.status:
+                    session_status_changed.send(sender=Session, session=obj, old_status=old.status)
+                # Notes may have changed
+                index_session(obj)
+    
+    def delete_model(self, request, obj):
+        session_id = obj.session_id
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            session_deleted.send(sender=Session, session=obj, session_id=session_id)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for obj in queryset:
+                self.delete_model(request, obj)
+
 
+@admin.register(SessionArchive)
+class SessionArchiveAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('session_id', 'student', 'tutor', 'subject', 'session_date', 'session_time', 'status', 'archived_at')
+    list_filter = ('status', 'subject')
+    date_hierarchy = 'session_date'
+    list_per_page = 50
+    ordering = ('-session_date', '-session_time')
+    
+    # Archived sessions are history; manage.py archive_sessions writes them
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
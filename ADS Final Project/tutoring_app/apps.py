@@ -5,3 +5,14 @@ class TutoringAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tutoring_app'
 
+    def ready(self):
+        # sweeper registers its metrics collector on import
+        from . import booking, catalog, counters, matching, metrics, notifier, rollups, search, sweeper
+        counters.connect_signals()
+        rollups.connect_signals()
+        matching.connect_signals()
+        booking.connect_signals()
+        catalog.connect_signals()
+        metrics.connect_signals()
+        notifier.connect_signals()
+        search.connect_signals()
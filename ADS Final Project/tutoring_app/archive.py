@@ -0,0 +1,129 @@
+"""
+Archival of old sessions into sessions_archive.
+
+Completed and declined sessions dated more than SESSION_ARCHIVE_AFTER_DAYS
+ago are never changed again and are only read when someone looks that far
+back in the session log. archive_sessions() moves them, in primary-key
+chunks and one short transaction per chunk, from sessions into
+sessions_archive (same columns and ids), so the sessions table and its
+status, date and keyset indexes only cover recent history.
+
+Archiving is not a lifecycle change: no signals are sent, and counters and
+rollups keep counting archived sessions (their rebuilds read both tables).
+Where the SQL features are installed, each chunk's session_audit_log rows
+are copied to session_audit_log_archive first, since deleting the sessions
+cascades to the log.
+The session log and export only read the archive when the Date From filter
+is before the horizon (see reaches_archive).
+
+RANGE partitioning of sessions by session_date was not used: MySQL
+partitioned tables can't have the foreign keys sessions relies on, and the
+partitioning column would have to be part of the session_id primary key.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Session, SessionArchive
+
+
+# Only sessions in a final status are archived
+ARCHIVED_STATUSES = ('completed', 'declined')
+
+ARCHIVE_FIELDS = [
+    'session_id', 'student_id', 'tutor_id', 'subject_id', 'session_date',
+    'session_time', 'status', 'notes', 'created_at',
+]
+
+
+AUDIT_LOG_COLUMNS = 'log_id, session_id, old_status, new_status, changed_at'
+
+
+def archive_horizon():
+    """Sessions dated before this day are archived"""
+    return timezone.now().date() - timedelta(days=settings.SESSION_ARCHIVE_AFTER_DAYS)
+
+
+def reaches_archive(date_from):
+    """Whether a listing starting at date_from (None: no lower bound) needs the archive.
+
+    Without a lower bound the listings show recent sessions only, so the
+    default session log never touches the archive.
+    """
+    return date_from is not None and date_from < archive_horizon()
+
+
+def _keeps_audit_log():
+    """Whether archived sessions' audit rows must be copied (session_audit_log exists)"""
+    with connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+    if 'session_audit_log' not in tables:
+        return False
+    if 'session_audit_log_archive' not in tables:
+        raise ImproperlyConfigured(
+            'session_audit_log_archive is missing; create it from sql/advanced_features.sql '
+            'before archiving, or the audit trail of archived sessions would be deleted'
+        )
+    return True
+
+
+def _archive_audit_log(session_ids):
+    placeholders = ', '.join(['%s'] * len(session_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO session_audit_log_archive ({AUDIT_LOG_COLUMNS}) '
+            f'SELECT {AUDIT_LOG_COLUMNS} FROM session_audit_log WHERE session_id IN ({placeholders})',
+            session_ids
+        )
+
+
+def archive_sessions(chunk_size=5000, pause=0.0, progress=None, dry_run=False):
+    """Move archivable sessions into sessions_archive; returns the stats dict.
+
+    pause: seconds to sleep between chunks, to leave room for live traffic.
+    progress: called as progress(done_id, last_id, stats) after each chunk.
+    """
+    horizon = archive_horizon()
+    stats = {'chunks': 0, 'archived': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+
+    old = Session.objects.filter(status__in=ARCHIVED_STATUSES, session_date__lt=horizon)
+    bounds = old.aggregate(low=Min('session_id'), high=Max('session_id'))
+    if bounds['low'] is None:
+        return stats
+
+    keep_audit_log = _keeps_audit_log()
+    start = bounds['low']
+    while start <= bounds['high']:
+        end = start + chunk_size
+        chunk = old.filter(session_id__gte=start, session_id__lt=end).order_by()
+        if dry_run:
+            stats['archived'] += chunk.count()
+        else:
+            with transaction.atomic():
+                # Locked, so a row can't change status between the copy and the delete
+                rows = list(chunk.select_for_update().values(*ARCHIVE_FIELDS))
+                if rows:
+                    session_ids = [row['session_id'] for row in rows]
+                    SessionArchive.objects.bulk_create([SessionArchive(**row) for row in rows])
+                    if keep_audit_log:
+                        _archive_audit_log(session_ids)
+                    Session.objects.filter(pk__in=session_ids).delete()
+            stats['archived'] += len(rows)
+
+        stats['chunks'] += 1
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(min(end - 1, bounds['high']), bounds['high'], stats)
+        start = end
+        if pause and start <= bounds['high']:
+            time.sleep(pause)
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,69 @@
+"""
+Throwaway seeded databases for the benchmark, stress test and index advisor commands.
+
+test_database() creates the test database (as the test runner would, with
+the replica aliases mirroring it), seed_sessions() tops it up with
+synthetic sessions, busiest() picks the profile with the most sessions,
+the worst case for the per-user views, and percentile() summarizes timings.
+"""
+
+import io
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .models import Session, SessionCounter
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Run the block against a freshly created test database"""
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    # Replica aliases read the test database too, like in the test runner
+    replica_settings = {alias: connections[alias].settings_dict for alias in settings.REPLICA_DATABASES}
+    for alias in replica_settings:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, settings_dict in replica_settings.items():
+            connections[alias].close()
+            connections[alias].settings_dict = settings_dict
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def seed_sessions(size, seed, workers=1, stdout=None):
+    """Top the sessions table up to size rows with synthetic data"""
+    needed = size - Session.objects.count()
+    if needed <= 0:
+        return
+    if stdout is not None:
+        stdout.write(f'Seeding {needed} sessions (total {size})...')
+    students = max(50, needed // 200)
+    call_command(
+        'generate_synthetic_data',
+        students=students, tutors=max(20, students // 10), subjects=40,
+        sessions=needed, days=365, seed=seed, workers=workers,
+        stdout=io.StringIO()
+    )
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of samples"""
+    ordered = sorted(samples)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+def busiest(role, model):
+    """The profile with the most sessions - the worst case for per-user views"""
+    profile_id = SessionCounter.objects.filter(role=role).order_by('-total_sessions').values_list(
+        'profile_id', flat=True
+    ).first()
+    return model.objects.select_related('user').get(pk=profile_id)
@@ -0,0 +1,216 @@
+"""
+Booking conflict detection.
+
+Each tutor's active (pending/approved) sessions are kept in memory as a
+sorted list of start times, so an overlap check is a binary search instead
+of a COUNT(*) per insert. Sessions have no end time in the schema; every
+session is assumed to last settings.SESSION_DURATION_MINUTES, and two
+sessions of the same tutor conflict when their start times are closer than
+that.
+
+Schedules are loaded per tutor on first use, kept current from the session
+lifecycle signals, and reloaded after SCHEDULE_TTL seconds to pick up
+bookings made by other worker processes. Until then a schedule can miss
+their bookings, so the index only picks candidates: the booking itself is
+re-checked with database_conflict() inside the insert transaction, which
+locks the tutor's active sessions around the slot. trg_prevent_duplicate_session
+in the database stays in place as the backstop.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Session
+from .signals import session_created, session_status_changed, sessions_status_changed, session_deleted
+
+
+ACTIVE_STATUSES = ('pending', 'approved')
+
+# Reload a tutor's schedule from the database after this many seconds
+SCHEDULE_TTL = 60
+
+
+def session_duration():
+    return getattr(settings, 'SESSION_DURATION_MINUTES', 60)
+
+
+def slot_minutes(session_date, session_time):
+    """Absolute start of a slot in minutes, comparable across days"""
+    return session_date.toordinal() * 1440 + session_time.hour * 60 + session_time.minute
+
+
+class TutorSchedule:
+    """Sorted start times (minutes) of one tutor's active sessions"""
+
+    def __init__(self, entries=()):
+        self.starts = []
+        self.session_ids = []
+        self.by_session = {}
+        self.loaded_at = time.monotonic()
+        for start, session_id in sorted(entries):
+            self.add(start, session_id)
+
+    def add(self, start, session_id):
+        if session_id in self.by_session:
+            self.remove(session_id)
+        index = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.session_ids.insert(index, session_id)
+        self.by_session[session_id] = start
+
+    def remove(self, session_id):
+        start = self.by_session.pop(session_id, None)
+        if start is None:
+            return
+        index = bisect_left(self.starts, start)
+        while self.session_ids[index] != session_id:
+            index += 1
+        del self.starts[index]
+        del self.session_ids[index]
+
+    def conflicts(self, start, duration, exclude=None):
+        """True if an active session starts within duration minutes of start"""
+        index = bisect_left(self.starts, start - duration + 1)
+        while index < len(self.starts) and self.starts[index] < start + duration:
+            if self.session_ids[index] != exclude:
+                return True
+            index += 1
+        return False
+
+
+class BookingIndex:
+    """Per-tutor schedules for the tutors this worker has seen"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedules = {}
+
+    def clear(self):
+        with self._lock:
+            self._schedules = {}
+
+    def _stale(self, tutor_id):
+        schedule = self._schedules.get(tutor_id)
+        return schedule is None or time.monotonic() - schedule.loaded_at > SCHEDULE_TTL
+
+    def preload(self, tutor_ids):
+        """Load the schedules of any of tutor_ids not loaded yet, in one query.
+
+        Returns {tutor_id: TutorSchedule} for tutor_ids, so callers don't
+        look them up again after a concurrent clear().
+        """
+        with self._lock:
+            schedules = {
+                tutor_id: self._schedules[tutor_id] for tutor_id in tutor_ids if not self._stale(tutor_id)
+            }
+        missing = [tutor_id for tutor_id in dict.fromkeys(tutor_ids) if tutor_id not in schedules]
+        if not missing:
+            return schedules
+
+        since = timezone.now().date() - timedelta(days=1)
+        entries = {tutor_id: [] for tutor_id in missing}
+        rows = Session.objects.filter(
+            tutor_id__in=missing,
+            session_date__gte=since,
+            status__in=ACTIVE_STATUSES
+        ).order_by().values_list('tutor_id', 'session_id', 'session_date', 'session_time')
+        for tutor_id, session_id, session_date, session_time in rows:
+            entries[tutor_id].append((slot_minutes(session_date, session_time), session_id))
+
+        with self._lock:
+            for tutor_id, tutor_entries in entries.items():
+                schedules[tutor_id] = self._schedules[tutor_id] = TutorSchedule(tutor_entries)
+        return schedules
+
+    def has_conflict(self, tutor_id, session_date, session_time, exclude=None):
+        schedule = self.preload([tutor_id])[tutor_id]
+        start = slot_minutes(session_date, session_time)
+        with self._lock:
+            return schedule.conflicts(start, session_duration(), exclude)
+
+    def free_tutors(self, tutor_ids, session_date, session_time):
+        """The subset of tutor_ids (order kept) with no overlapping session"""
+        schedules = self.preload(tutor_ids)
+        start = slot_minutes(session_date, session_time)
+        duration = session_duration()
+        with self._lock:
+            return [
+                tutor_id for tutor_id in tutor_ids
+                if not schedules[tutor_id].conflicts(start, duration)
+            ]
+
+    def track(self, session):
+        """Reflect a session's current status in its tutor's schedule (if loaded)"""
+        with self._lock:
+            schedule = self._schedules.get(session.tutor_id)
+            if schedule is None:
+                return
+            if session.status in ACTIVE_STATUSES and session.session_id is not None:
+                schedule.add(slot_minutes(session.session_date, session.session_time), session.session_id)
+            else:
+                schedule.remove(session.session_id)
+
+    def untrack(self, session, session_id):
+        with self._lock:
+            schedule = self._schedules.get(session.tutor_id)
+            if schedule is not None:
+                schedule.remove(session_id)
+
+
+booking_index = BookingIndex()
+
+
+def database_conflict(tutor_id, session_date, session_time, exclude=None):
+    """True if the tutor has an active session overlapping the slot, per the database.
+
+    Call inside the transaction that books the slot: the tutor's active
+    sessions in the surrounding days are read with SELECT ... FOR UPDATE, a
+    range scan of idx_sessions_tutor_keyset (tutor, session_date, ...). On
+    InnoDB that locks the range, so a concurrent booking of the same tutor
+    and days waits for this transaction to finish instead of slipping in.
+    """
+    duration = session_duration()
+    start = slot_minutes(session_date, session_time)
+    # Sessions starting on nearby days can still overlap the slot
+    days = timedelta(days=duration // 1440 + 1)
+    sessions = Session.objects.select_for_update().filter(
+        tutor_id=tutor_id,
+        session_date__range=(session_date - days, session_date + days),
+        status__in=ACTIVE_STATUSES
+    )
+    if exclude is not None:
+        sessions = sessions.exclude(pk=exclude)
+    return any(
+        abs(slot_minutes(other_date, other_time) - start) < duration
+        for other_date, other_time in sessions.values_list('session_date', 'session_time')
+    )
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def on_session_changed(sender, session, **kwargs):
+    transaction.on_commit(lambda: booking_index.track(session))
+
+
+def on_sessions_changed(sender, sessions, **kwargs):
+    def track_all():
+        for session in sessions:
+            booking_index.track(session)
+    transaction.on_commit(track_all)
+
+
+def on_session_deleted(sender, session, session_id, **kwargs):
+    transaction.on_commit(lambda: booking_index.untrack(session, session_id))
+
+
+def connect_signals():
+    session_created.connect(on_session_changed, dispatch_uid='booking_session_created')
+    session_status_changed.connect(on_session_changed, dispatch_uid='booking_status_changed')
+    sessions_status_changed.connect(on_sessions_changed, dispatch_uid='booking_bulk_status_changed')
+    session_deleted.connect(on_session_deleted, dispatch_uid='booking_session_deleted')
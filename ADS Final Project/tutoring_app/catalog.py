@@ -0,0 +1,107 @@
+"""
+Subject catalog shared by the session and registration forms.
+
+The forms used to run a GROUP BY subquery over subjects every time they were
+instantiated. The catalog loads the distinct subjects (the lowest subject_id
+per subject_name, as before) once per worker and serves them from memory.
+
+Invalidation is versioned: Subject post_save/post_delete bump a version
+number kept in the default cache, and each worker reloads when the version
+it loaded differs from the current one. With a per-process default cache
+other workers only see the bump locally, so the catalog is also reloaded
+after CATALOG_TTL seconds.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.db.models.signals import post_delete, post_save
+
+from .models import Subject
+
+
+VERSION_KEY = 'subject_catalog:version'
+
+# Reload at least this often (seconds) even if no version bump was seen
+CATALOG_TTL = 300
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+class SubjectCatalog:
+    """Distinct subjects ordered by name, with lookup by subject_id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subjects = None
+        self._by_id = {}
+        self._version = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._subjects = None
+            self._by_id = {}
+
+    def _ensure_loaded(self):
+        version = current_version()
+        if (self._subjects is not None and self._version == version
+                and time.monotonic() - self._loaded_at < CATALOG_TTL):
+            return
+        distinct_subject_ids = Subject.objects.values('subject_name').annotate(
+            min_id=Min('subject_id')
+        ).values_list('min_id', flat=True)
+        subjects = list(Subject.objects.filter(
+            subject_id__in=distinct_subject_ids
+        ).order_by('subject_name'))
+        self._subjects = subjects
+        self._by_id = {subject.subject_id: subject for subject in subjects}
+        self._version = version
+        self._loaded_at = time.monotonic()
+
+    def subjects(self):
+        with self._lock:
+            self._ensure_loaded()
+            return self._subjects
+
+    def get(self, subject_id):
+        """The catalog Subject with subject_id, or None"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_id.get(subject_id)
+
+    def ids(self):
+        return [subject.subject_id for subject in self.subjects()]
+
+    def names(self):
+        return [subject.subject_name for subject in self.subjects()]
+
+
+subject_catalog = SubjectCatalog()
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def on_subject_changed(sender, **kwargs):
+    bump_version()
+    subject_catalog.invalidate()
+
+
+def connect_signals():
+    post_save.connect(on_subject_changed, sender=Subject, dispatch_uid='catalog_subject_saved')
+    post_delete.connect(on_subject_changed, sender=Subject, dispatch_uid='catalog_subject_deleted')
@@ -0,0 +1,50 @@
+"""
+Run independent ORM queries concurrently from async views.
+
+The ORM in Django 4.2 is synchronous, so gather_queries() hands each query
+function to a worker thread of a bounded pool (ASYNC_QUERY_WORKERS) and
+awaits them together: the view waits for the slowest query instead of the
+sum of all of them. Each task uses its worker thread's own database
+connection, closed again (or returned to the pool, see mysql_pool) when the
+task finishes, and runs in a copy of the request's context, so replica
+routing and the request metrics apply to it as usual.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_QUERY_WORKERS, thread_name_prefix='query'
+            )
+        return _executor
+
+
+def _run(func, args):
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
+async def gather_queries(*calls):
+    """Run each (func, *args) in the query pool; returns their results in order"""
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    return await asyncio.gather(*[
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run, func, args)
+        for func, *args in calls
+    ])
@@ -0,0 +1,192 @@
+"""
+Incrementally maintained session counters (table ``session_counters``).
+
+One row per (role, profile_id) holds total/pending/approved/completed/declined
+counts, so readers get a single row instead of running the
+v_student_statistics / v_tutor_statistics GROUP BY over all sessions.
+Its ``version`` column is bumped on every change and versions the
+profile's session data (used for the dashboard data ETag).
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import Session, SessionArchive, SessionCounter
+from .signals import session_created, session_status_changed, sessions_status_changed, session_deleted
+
+
+STATUS_FIELDS = {
+    'pending': 'pending_count',
+    'approved': 'approved_count',
+    'completed': 'completed_count',
+    'declined': 'declined_count',
+}
+
+
+def _profiles(session):
+    """(role, profile_id) pairs whose counters a session contributes to"""
+    return [('student', session.student_id), ('tutor', session.tutor_id)]
+
+
+def _apply(role, profile_id, deltas):
+    """Add deltas ({field: +/-n}) to one counter row, creating it if missing"""
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    updates['version'] = F('version') + 1
+
+    updated = SessionCounter.objects.filter(role=role, profile_id=profile_id).update(**updates)
+    if updated:
+        return
+
+    # No row yet: create it from scratch so it can't drift from the sessions table
+    try:
+        with transaction.atomic():
+            SessionCounter.objects.create(
+                role=role, profile_id=profile_id, version=1, **compute_counts(role, profile_id)
+            )
+    except IntegrityError:
+        # Another request created the row first - fall back to the increment
+        SessionCounter.objects.filter(role=role, profile_id=profile_id).update(**updates)
+
+
+def _count_aggregates():
+    aggregates = {'total_sessions': Count('session_id')}
+    for status, field in STATUS_FIELDS.items():
+        aggregates[field] = Count('session_id', filter=Q(status=status))
+    return aggregates
+
+
+def compute_counts(role, profile_id):
+    """Count a profile's sessions by status straight from sessions and the archive"""
+    counts = dict.fromkeys(_count_aggregates(), 0)
+    for model in (Session, SessionArchive):
+        sessions = model.objects.filter(**{f'{role}_id': profile_id})
+        for field, count in sessions.aggregate(**_count_aggregates()).items():
+            counts[field] += count
+    return counts
+
+
+def compute_counts_for(role, profile_ids):
+    """compute_counts() for many profiles, one grouped query per table: {profile_id: counts}"""
+    column = f'{role}_id'
+    counts = {profile_id: dict.fromkeys(_count_aggregates(), 0) for profile_id in profile_ids}
+    for model in (Session, SessionArchive):
+        rows = model.objects.filter(**{f'{column}__in': profile_ids}).order_by().values(column).annotate(
+            **_count_aggregates()
+        )
+        for row in rows:
+            totals = counts[row.pop(column)]
+            for field, count in row.items():
+                totals[field] += count
+    return counts
+
+
+def get_counter(role, profile_id):
+    """Return the SessionCounter for a profile (unsaved, all zeros if missing)"""
+    counter = SessionCounter.objects.filter(role=role, profile_id=profile_id).first()
+    if counter is None:
+        counter = SessionCounter(role=role, profile_id=profile_id)
+    return counter
+
+
+def get_version(role, profile_id):
+    """Current data version of a profile (0 if it has no counter row yet)"""
+    version = SessionCounter.objects.filter(
+        role=role, profile_id=profile_id
+    ).values_list('version', flat=True).first()
+    return version or 0
+
+
+def record_created(session):
+    deltas = {'total_sessions': 1, STATUS_FIELDS[session.status]: 1}
+    for role, profile_id in _profiles(session):
+        _apply(role, profile_id, deltas)
+
+
+def record_status_change(session, old_status):
+    if old_status == session.status:
+        return
+    deltas = {STATUS_FIELDS[old_status]: -1, STATUS_FIELDS[session.status]: 1}
+    for role, profile_id in _profiles(session):
+        _apply(role, profile_id, deltas)
+
+
+def record_status_changes(sessions, old_status):
+    """record_status_change() for many sessions: one UPDATE per profile"""
+    totals = {}
+    for session in sessions:
+        if old_status == session.status:
+            continue
+        for profile in _profiles(session):
+            deltas = totals.setdefault(profile, Counter())
+            deltas[STATUS_FIELDS[old_status]] -= 1
+            deltas[STATUS_FIELDS[session.status]] += 1
+    # In key order, so concurrent batches lock the counter rows in the same order
+    for (role, profile_id), deltas in sorted(totals.items()):
+        _apply(role, profile_id, deltas)
+
+
+def record_deleted(session):
+    deltas = {'total_sessions': -1, STATUS_FIELDS[session.status]: -1}
+    for role, profile_id in _profiles(session):
+        _apply(role, profile_id, deltas)
+
+
+def rebuild_counters():
+    """Recompute every counter row from sessions and the archive. Returns rows written."""
+    totals = {}
+    with transaction.atomic():
+        # Versions only ever move forward, so old ETags can't match rebuilt data
+        versions = {
+            (role, profile_id): version
+            for role, profile_id, version in SessionCounter.objects.values_list('role', 'profile_id', 'version')
+        }
+        for model in (Session, SessionArchive):
+            for role in ('student', 'tutor'):
+                column = f'{role}_id'
+                rows = model.objects.order_by().values(column).annotate(**_count_aggregates())
+                for row in rows:
+                    counts = totals.setdefault((role, row.pop(column)), dict.fromkeys(row, 0))
+                    for field, count in row.items():
+                        counts[field] += count
+
+        counters = []
+        for (role, profile_id), counts in totals.items():
+            version = versions.pop((role, profile_id), 0) + 1
+            counters.append(SessionCounter(role=role, profile_id=profile_id, version=version, **counts))
+
+        # Profiles that no longer have sessions keep a zeroed row
+        for (role, profile_id), version in versions.items():
+            counters.append(SessionCounter(role=role, profile_id=profile_id, version=version + 1))
+
+        SessionCounter.objects.all().delete()
+        SessionCounter.objects.bulk_create(counters, batch_size=1000)
+    return len(counters)
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def on_session_created(sender, session, **kwargs):
+    record_created(session)
+
+
+def on_session_status_changed(sender, session, old_status, **kwargs):
+    record_status_change(session, old_status)
+
+
+def on_sessions_status_changed(sender, sessions, old_status, **kwargs):
+    record_status_changes(sessions, old_status)
+
+
+def on_session_deleted(sender, session, **kwargs):
+    record_deleted(session)
+
+
+def connect_signals():
+    session_created.connect(on_session_created, dispatch_uid='counters_session_created')
+    session_status_changed.connect(on_session_status_changed, dispatch_uid='counters_status_changed')
+    sessions_status_changed.connect(on_sessions_status_changed, dispatch_uid='counters_bulk_status_changed')
+    session_deleted.connect(on_session_deleted, dispatch_uid='counters_session_deleted')
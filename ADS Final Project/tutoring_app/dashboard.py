@@ -0,0 +1,211 @@
+"""
+Dashboard data service shared by the student and tutor dashboards.
+
+The stats cards (total and per-status counts) come from the profile's
+session_counters row. The dashboard data view reads that row anyway for
+its data version (ETag and cache key) and passes it in. Everything else
+comes from at most QUERY_BUDGET queries:
+
+1. the profile's rows of the monthly rollup (month, subject, status,
+   count) plus a scalar subquery counting its sessions of the last four
+   weeks, from which the subject chart, the month chart and the average
+   per week are derived in Python;
+2. the upcoming sessions for the next 7 days.
+
+Query 1 reads session_monthly_rollup rather than grouping the sessions
+table, so its cost does not grow with the length of a profile's history.
+Both queries go to a read replica when one is configured (see routers).
+aget_dashboard_data(), used by the async dashboard data view, runs them
+concurrently.
+"""
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .counters import get_counter, get_version
+from .models import Session, SessionMonthlyRollup
+from .concurrent_queries import gather_queries
+from .routers import replica_reads
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of SQL queries get_dashboard_data() may issue
+QUERY_BUDGET = 2
+
+
+def _profile_sessions(role, profile_id):
+    return Session.objects.filter(**{f'{role}_id': profile_id}).order_by()
+
+
+def _rollup_counts(role, profile_id, sessions, weeks_ago):
+    """Query 1: rollup rows per (month, subject, status) with the recent count"""
+    recent = sessions.filter(session_date__gte=weeks_ago).values(f'{role}_id').annotate(
+        count=Count('session_id')
+    ).values('count')
+
+    return list(
+        SessionMonthlyRollup.objects.filter(
+            role=role, profile_id=profile_id, session_count__gt=0
+        ).values(
+            'month', 'subject__subject_name', 'status', 'session_count'
+        ).annotate(recent=Coalesce(Subquery(recent), 0))
+    )
+
+
+def _upcoming(sessions, today):
+    """Query 2: the next five pending/approved sessions within 7 days"""
+    status_labels = dict(Session.STATUS_CHOICES)
+    rows = sessions.filter(
+        session_date__gte=today,
+        session_date__lte=today + timedelta(days=7),
+        status__in=['pending', 'approved']
+    ).order_by('session_date', 'session_time').values(
+        'session_date', 'session_time', 'status',
+        'tutor__full_name', 'student__full_name', 'subject__subject_name'
+    )[:5]
+
+    return [
+        {
+            'session_date': item['session_date'],
+            'session_time': item['session_time'],
+            'status': item['status'],
+            'status_display': status_labels.get(item['status'], item['status']),
+            'tutor_name': item['tutor__full_name'],
+            'student_name': item['student__full_name'],
+            'subject_name': item['subject__subject_name'],
+        }
+        for item in rows
+    ]
+
+
+def _summarize(rows):
+    """Fold the rollup rows into the chart series and the recent session count"""
+    by_subject = {}
+    by_month = {}
+
+    for row in rows:
+        count = row['session_count']
+        subject = row['subject__subject_name']
+        by_subject[subject] = by_subject.get(subject, 0) + count
+        month = row['month'].strftime('%Y-%m')
+        by_month[month] = by_month.get(month, 0) + count
+
+    # Every row carries the same scalar subquery result
+    recent = rows[0]['recent'] if rows else 0
+
+    sessions_by_subject = [
+        {'subject__subject_name': name, 'count': count}
+        for name, count in sorted(by_subject.items(), key=lambda item: (-item[1], item[0]))[:5]
+    ]
+    sessions_by_month = [
+        {'month': month, 'count': count}
+        for month, count in sorted(by_month.items())[:12]
+    ]
+    return recent, sessions_by_subject, sessions_by_month
+
+
+def _payload(counter, rollup_rows, upcoming_sessions):
+    recent, sessions_by_subject, sessions_by_month = _summarize(rollup_rows)
+
+    return {
+        'total_sessions': counter.total_sessions,
+        'pending_sessions': counter.pending_count,
+        'approved_sessions': counter.approved_count,
+        'declined_sessions': counter.declined_count,
+        'completed_sessions': counter.completed_count,
+        'sessions_by_subject': sessions_by_subject,
+        'sessions_by_month': sessions_by_month,
+        'avg_per_week': round(recent / 4, 2),
+        'upcoming_sessions': upcoming_sessions,
+    }
+
+
+def _query_args(role, profile_id):
+    """Arguments of (_rollup_counts, _upcoming) for a profile"""
+    today = timezone.now().date()
+    weeks_ago = today - timedelta(weeks=4)
+    sessions = _profile_sessions(role, profile_id)
+    return (role, profile_id, sessions, weeks_ago), (sessions, today)
+
+
+def _counting(issued, func):
+    """func, recording the SQL it issues in issued (in whichever thread it runs)"""
+    def counted(*args):
+        def count_query(execute, sql, params, many, context):
+            issued.append(sql)
+            return execute(sql, params, many, context)
+
+        with connections[Session.objects.db].execute_wrapper(count_query):
+            return func(*args)
+    return counted
+
+
+def _check_budget(issued, role, profile_id):
+    if len(issued) > QUERY_BUDGET:
+        logger.warning(
+            'Dashboard data for %s %s used %d queries (budget %d)',
+            role, profile_id, len(issued), QUERY_BUDGET
+        )
+
+
+def get_dashboard_data(role, profile_id, counter=None):
+    """Return the dashboard payload (plain, cacheable data) for one profile.
+
+    role is 'student' or 'tutor'. counter is the profile's SessionCounter
+    as read for the data version (get_counter); it is read here if not
+    passed. With DEBUG on, the other queries issued are counted and a
+    warning is logged if they exceed QUERY_BUDGET; the budget itself is
+    enforced by tests.DashboardQueryBudgetTest.
+    """
+    if counter is None:
+        counter = get_counter(role, profile_id)
+    rollup, upcoming = _rollup_counts, _upcoming
+    issued = []
+    if settings.DEBUG:
+        rollup, upcoming = _counting(issued, rollup), _counting(issued, upcoming)
+
+    rollup_args, upcoming_args = _query_args(role, profile_id)
+    with replica_reads():
+        payload = _payload(counter, rollup(*rollup_args), upcoming(*upcoming_args))
+    _check_budget(issued, role, profile_id)
+    return payload
+
+
+async def aget_dashboard_data(role, profile_id, counter=None):
+    """get_dashboard_data() for async views, with both queries run concurrently"""
+    if counter is None:
+        counter = await sync_to_async(get_counter)(role, profile_id)
+    rollup, upcoming = _rollup_counts, _upcoming
+    issued = []
+    if settings.DEBUG:
+        rollup, upcoming = _counting(issued, rollup), _counting(issued, upcoming)
+
+    rollup_args, upcoming_args = _query_args(role, profile_id)
+    with replica_reads():
+        rollup_rows, upcoming_sessions = await gather_queries(
+            (rollup, *rollup_args), (upcoming, *upcoming_args)
+        )
+    _check_budget(issued, role, profile_id)
+    return _payload(counter, rollup_rows, upcoming_sessions)
+
+
+def data_etag(role, profile_id, version=None):
+    """Strong ETag for a profile's dashboard data.
+
+    Derived from the profile's session data version (bumped on every session
+    change) and today's date, which "upcoming" and "recent" depend on.
+    Costs one single-row read unless the version is passed in.
+    """
+    if version is None:
+        version = get_version(role, profile_id)
+    today = timezone.now().date().isoformat()
+    return hashlib.sha1(f'{role}:{profile_id}:{version}:{today}'.encode()).hexdigest()
@@ -0,0 +1,117 @@
+"""
+Per-profile dashboard payload cache.
+
+Payloads live in the ``dashboard`` cache alias (see CACHES in settings), so
+the backend is pluggable: local memory by default, file-based or any other
+Django cache backend through DASHBOARD_CACHE_BACKEND / _LOCATION.
+
+Keys carry the profile's session data version, the same value the
+dashboard data ETag is derived from, so a session change (made by any
+worker, or directly in the database by sp_update_session_status) makes
+every process miss without any invalidation, and a cached body always
+matches its ETag. Superseded entries just expire. With read replicas, a
+miss is built from the primary when the request's replica hasn't replayed
+the version yet.
+"""
+
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.utils import timezone
+
+from .counters import get_version
+from .routers import primary_reads, replica_aliases, replica_reads
+
+
+CACHE_ALIAS = 'dashboard'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_key(role, profile_id, version):
+    # The session data version (session_counters.version, bumped by every
+    # session change, including sp_update_session_status) makes a changed
+    # profile miss in every process. The date is part of the key because
+    # "upcoming" and "recent" depend on it.
+    return f'dashboard:{role}:{profile_id}:{version}:{timezone.now().date().isoformat()}'
+
+
+def _replica_behind(role, profile_id, version):
+    """Whether the replica this request reads from hasn't replayed version yet.
+
+    session_counters is written in the same transaction as the sessions,
+    so a replica at version has every change the payload must reflect.
+    """
+    if not replica_aliases():
+        return False
+    with replica_reads():
+        return get_version(role, profile_id) < version
+
+
+def get_or_build(role, profile_id, version, builder):
+    """Return the cached payload for a profile's data version, building and storing it on a miss"""
+    key = cache_key(role, profile_id, version)
+    payload = _cache().get(key)
+    if payload is not None:
+        _count('hits')
+        return payload
+
+    _count('misses')
+    if _replica_behind(role, profile_id, version):
+        with primary_reads():
+            payload = builder()
+    else:
+        payload = builder()
+    _cache().set(key, payload)
+    return payload
+
+
+async def aget_or_build(role, profile_id, version, builder):
+    """get_or_build() for async views; builder is a coroutine function"""
+    key = cache_key(role, profile_id, version)
+    payload = await _cache().aget(key)
+    if payload is not None:
+        _count('hits')
+        return payload
+
+    _count('misses')
+    if await sync_to_async(_replica_behind)(role, profile_id, version):
+        with primary_reads():
+            payload = await builder()
+    else:
+        payload = await builder()
+    await _cache().aset(key, payload)
+    return payload
+
+
+def clear():
+    """Drop every cached dashboard, e.g. after counters are rebuilt in bulk"""
+    _cache().clear()
+
+
+def cache_stats():
+    """Hit/miss counters for this worker process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    stats['backend'] = type(_cache()).__name__
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
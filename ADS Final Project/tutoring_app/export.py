@@ -0,0 +1,72 @@
+"""
+Streaming export of session listings as CSV or NDJSON.
+
+Rows are read as values() dicts in keyset-ordered chunks (newest first by
+session_date, session_time, session_id) and written out as they are
+fetched, so memory stays flat however many rows are exported. Keyset
+chunks are used rather than a single QuerySet.iterator() because the MySQL
+driver buffers a whole result set client-side.
+"""
+
+import csv
+import heapq
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .pagination import older_than
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    'session_id', 'session_date', 'session_time', 'status',
+    'student_name', 'tutor_name', 'subject_name', 'notes', 'created_at',
+]
+
+
+def iter_session_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows (dicts with EXPORT_FIELDS) of queryset, chunk by chunk"""
+    rows = queryset.annotate(
+        student_name=F('student__full_name'),
+        tutor_name=F('tutor__full_name'),
+        subject_name=F('subject__subject_name'),
+    ).values(*EXPORT_FIELDS).order_by('-session_date', '-session_time', '-session_id')
+
+    chunk = list(rows[:chunk_size])
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        key = (last['session_date'], last['session_time'], last['session_id'])
+        chunk = list(rows.filter(older_than(key))[:chunk_size])
+
+
+def _row_key(row):
+    return row['session_date'], row['session_time'], row['session_id']
+
+
+def merge_newest_first(*row_iterators):
+    """Merge iter_session_rows() streams (e.g. sessions and the archive) into one"""
+    return heapq.merge(*row_iterators, key=_row_key, reverse=True)
+
+
+class _Echo:
+    """File-like object whose write() just returns the value (for csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
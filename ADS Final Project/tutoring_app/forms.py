@@ -1,8 +1,51 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from django.forms.models import ModelChoiceIterator
+from .catalog import subject_catalog
 from .models import User, Session, Subject, Student, Tutor
 
 
+class SubjectChoiceIterator(ModelChoiceIterator):
+    """Choices from the cached subject catalog instead of the queryset"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for subject in subject_catalog.subjects():
+            yield self.choice(subject)
+
+    def __len__(self):
+        return len(subject_catalog.subjects()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(subject_catalog.subjects())
+
+
+class SubjectChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField over the distinct subjects, served from the catalog"""
+    iterator = SubjectChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Subject.objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, Subject):
+            value = value.subject_id
+        try:
+            subject = subject_catalog.get(int(value))
+        except (ValueError, TypeError):
+            subject = None
+        if subject is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return subject
+
+
 class CustomUserCreationForm(UserCreationForm):
     """Custom user registration form"""
     email = forms.EmailField(required=True, widget=forms.EmailInput(attrs={'class': 'form-control'}))
@@ -29,8 +72,7 @@ class CustomUserCreationForm(UserCreationForm):
         self.fields['password2'].widget.attrs.update({'class': 'form-control'})
         
         # Populate specialization dropdown with available subjects
-        # Get distinct subject names from database
-        subjects = Subject.objects.values_list('subject_name', flat=True).distinct().order_by('subject_name')
+        subjects = subject_catalog.names()
         self.fields['specialization'].choices = [('', 'Select a specialization')] + [(name, name) for name in subjects]
     
     def clean(self):
@@ -46,8 +88,7 @@ class CustomUserCreationForm(UserCreationForm):
 
 class SessionForm(forms.ModelForm):
     """Form for creating/editing sessions"""
-    subject = forms.ModelChoiceField(
-        queryset=Subject.objects.none(),  # Will be set in __init__
+    subject = SubjectChoiceField(
         empty_label="Select a subject",
         widget=forms.Select(attrs={'class': 'form-control'})
     )
@@ -66,18 +107,6 @@ class SessionForm(forms.ModelForm):
         model = Session
         fields = ['subject', 'session_date', 'session_time', 'notes']
     
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Get distinct subjects - one Subject per distinct subject_name
-        # Use distinct() on subject_name and get the first Subject for each name
-        from django.db.models import Min
-        distinct_subject_ids = Subject.objects.values('subject_name').annotate(
-            min_id=Min('subject_id')
-        ).values_list('min_id', flat=True)
-        self.fields['subject'].queryset = Subject.objects.filter(
-            subject_id__in=distinct_subject_ids
-        ).order_by('subject_name')
-    
     def clean_session_date(self):
         from django.utils import timezone
         session_date = self.cleaned_data.get('session_date')
@@ -88,28 +117,25 @@ class SessionForm(forms.ModelForm):
 
 class SessionFilterForm(forms.Form):
     """Form for filtering sessions"""
+    q = forms.CharField(
+        required=False,
+        max_length=200,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'type': 'search',
+            'placeholder': 'Search names, subject or notes...'
+        })
+    )
     status = forms.ChoiceField(
         choices=[('', 'All Statuses')] + Session.STATUS_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
-    subject = forms.ModelChoiceField(
-        queryset=Subject.objects.none(),  # Will be set in __init__
+    subject = SubjectChoiceField(
         required=False,
         empty_label="All Subjects",
         widget=forms.Select(attrs={'class': 'form-control'})
     )
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Get distinct subjects - one Subject per distinct subject_name
-        from django.db.models import Min
-        distinct_subject_ids = Subject.objects.values('subject_name').annotate(
-            min_id=Min('subject_id')
-        ).values_list('min_id', flat=True)
-        self.fields['subject'].queryset = Subject.objects.filter(
-            subject_id__in=distinct_subject_ids
-        ).order_by('subject_name')
     date_from = forms.DateField(
         required=False,
         widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
@@ -0,0 +1,331 @@
+"""
+Index advice from the shape and plans of the app's real queries.
+
+The advise_indexes command records the SELECTs the views issue (capture())
+and, for each distinct statement (grouped by metrics.fingerprint):
+
+- explain() runs EXPLAIN (MySQL) or EXPLAIN QUERY PLAN (SQLite) and says
+  how each table is read: full table scan, full index scan or index
+  lookup, and whether the result needs a filesort / temporary table;
+- QueryShape picks the equality and range conditions, the ORDER BY /
+  GROUP BY and the selected columns out of the SQL Django generated;
+- propose() turns the shape into a composite index on the statement's main
+  table: equality columns first, then the sort columns (or the first range
+  column), then - while the index stays small - the other selected
+  columns, so the index covers the query.
+"""
+
+import contextvars
+import hashlib
+import re
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+SUPPORTED_VENDORS = ('mysql', 'sqlite')
+
+# Widest index propose() suggests, covering columns included
+MAX_INDEX_COLUMNS = 5
+
+
+# ------------------------------------------------------------------------------
+# Capturing the views' queries
+# ------------------------------------------------------------------------------
+
+_capturing = contextvars.ContextVar('index_advisor_capture', default=None)
+
+
+def _record(execute, sql, params, many, context):
+    statements = _capturing.get()
+    if statements is not None and not many and sql.lstrip()[:6].upper() == 'SELECT':
+        statements.append((sql, params))
+    return execute(sql, params, many, context)
+
+
+def _install(sender, connection, **kwargs):
+    # First in the list, like metrics.install_query_timer
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record)
+
+
+@contextmanager
+def capture():
+    """Collect the (sql, params) of SELECTs run in this context, in any thread.
+
+    Connections opened while capturing (async views' query threads open
+    their own) get the recorder too; the context is what selects the list.
+    """
+    statements = []
+    connection_created.connect(_install, dispatch_uid='index_advisor_capture')
+    for connection in connections.all():
+        _install(None, connection)
+    token = _capturing.set(statements)
+    try:
+        yield statements
+    finally:
+        _capturing.reset(token)
+        connection_created.disconnect(dispatch_uid='index_advisor_capture')
+
+
+# ------------------------------------------------------------------------------
+# Query plans
+# ------------------------------------------------------------------------------
+
+_SQLITE_STEP = re.compile(
+    r'^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX (\w+)| USING \w* ?PRIMARY KEY)?'
+)
+
+
+def _mysql_step(row):
+    extra = row.get('Extra') or ''
+    return {
+        'table': row['table'],
+        'access': {'ALL': 'full_scan', 'index': 'index_scan'}.get(row['type'], 'lookup'),
+        'key': row['key'],
+        'rows': row['rows'],
+        'table_rows': None,
+        'filesort': 'Using filesort' in extra,
+        'temporary': 'Using temporary' in extra,
+    }
+
+
+def _sqlite_steps(details, row_count):
+    steps, sorts = [], set()
+    for detail in details:
+        if detail.startswith('USE TEMP B-TREE'):
+            sorts.add('filesort' if 'ORDER BY' in detail else 'temporary')
+            continue
+        match = _SQLITE_STEP.match(detail)
+        if match is None or match.group(2) in ('CONSTANT', 'SUBQUERY'):
+            continue
+        operation, table, using, key = match.groups()
+        access = 'lookup' if operation == 'SEARCH' else ('index_scan' if using else 'full_scan')
+        steps.append({
+            'table': table,
+            'access': access,
+            'key': key or ('PRIMARY' if using else None),
+            # EXPLAIN QUERY PLAN has no estimates; a scan reads the whole table
+            'rows': row_count(table) if access != 'lookup' else None,
+            'table_rows': row_count(table),
+            'filesort': False,
+            'temporary': False,
+        })
+    if steps:
+        # The sort isn't tied to a table: charge it to the biggest one
+        biggest = max(steps, key=lambda step: step['table_rows'] or 0)
+        for flag in sorts:
+            biggest[flag] = True
+    return steps
+
+
+def explain(sql, params, using='default', row_counts=None):
+    """Plan steps of a SELECT: dicts with table, access, key, rows, filesort, temporary"""
+    connection = connections[using]
+    row_counts = {} if row_counts is None else row_counts
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [_mysql_step(dict(zip(columns, row))) for row in cursor.fetchall()]
+
+        if connection.vendor == 'sqlite':
+            tables = set(connection.introspection.table_names(cursor))
+
+            def row_count(table):
+                if table not in tables:
+                    return None
+                if table not in row_counts:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                    row_counts[table] = cursor.fetchone()[0]
+                return row_counts[table]
+
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            details = [row[-1] for row in cursor.fetchall()]
+            return _sqlite_steps(details, row_count)
+
+    raise ValueError(f'Query plans are not supported on {connection.vendor}')
+
+
+def problems(steps, min_rows):
+    """Human-readable flags for a plan: scans of min_rows or more, sorts"""
+    flags = []
+    for step in steps:
+        # Without an estimate (SQLite lookups) the size of the table has to do
+        rows = step['rows'] if step['rows'] is not None else step['table_rows']
+        if rows is None or rows < min_rows:
+            continue
+        if step['access'] == 'full_scan':
+            flags.append(f'full scan of {step["table"]} ({rows:,} rows)')
+        elif step['access'] == 'index_scan':
+            flags.append(f'full index scan of {step["table"]} ({rows:,} rows)')
+        if step['filesort']:
+            flags.append(f'filesort on {step["table"]}')
+        if step['temporary']:
+            flags.append(f'temporary table for {step["table"]}')
+    return flags
+
+
+def rows_examined(steps):
+    """Estimated rows read by a plan, or None when the database doesn't say"""
+    if not steps or any(step['rows'] is None for step in steps):
+        return None
+    return sum(step['rows'] for step in steps)
+
+
+# ------------------------------------------------------------------------------
+# Query shapes and proposals
+# ------------------------------------------------------------------------------
+
+_COLUMN = r'[`"](\w+)[`"]\.[`"](\w+)[`"]'
+_COLUMN_RE = re.compile(_COLUMN)
+_COMPARISON = re.compile(r'^' + _COLUMN + r'\s*(=|IN\b|IS NULL|<=|>=|<|>|BETWEEN\b)\s*(.*)$', re.S)
+_ORDER_ITEM = re.compile(r'^' + _COLUMN + r'(?:\s+(ASC|DESC))?', re.I)
+_TABLE = re.compile(r'^[`"](\w+)[`"]')
+
+CLAUSES = (' FROM ', ' WHERE ', ' GROUP BY ', ' HAVING ', ' ORDER BY ', ' LIMIT ')
+
+
+def _top_level(text):
+    """Yield (index, character) of text outside parentheses"""
+    depth = 0
+    for index, character in enumerate(text):
+        if character == '(':
+            depth += 1
+        elif character == ')':
+            depth -= 1
+        elif depth == 0:
+            yield index, character
+
+
+def _split(text, separator):
+    """Split text on separator where it isn't inside parentheses"""
+    parts, start, upper = [], 0, text.upper()
+    for index, _ in _top_level(text):
+        if index >= start and upper.startswith(separator, index):
+            parts.append(text[start:index])
+            start = index + len(separator)
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _strip_parens(text):
+    text = text.strip()
+    while text.startswith('(') and text.endswith(')'):
+        inner = text[1:-1]
+        depth = 0
+        for character in inner:
+            depth += {'(': 1, ')': -1}.get(character, 0)
+            if depth < 0:
+                return text
+        text = inner.strip()
+    return text
+
+
+def _clauses(sql):
+    """{clause keyword: text} of the top-level SELECT"""
+    upper = sql.upper()
+    found = []
+    for index, _ in _top_level(sql):
+        for keyword in CLAUSES:
+            if upper.startswith(keyword, index):
+                found.append((index, keyword))
+    clauses = {}
+    starts = [(0, 'SELECT ')] + found
+    for (index, keyword), (end, _) in zip(starts, starts[1:] + [(len(sql), None)]):
+        clauses.setdefault(keyword.strip(), sql[index + len(keyword):end].strip())
+    return clauses
+
+
+def _conjuncts(condition):
+    condition = _strip_parens(condition)
+    parts = _split(condition, ' AND ')
+    if len(parts) == 1:
+        return parts
+    return [conjunct for part in parts for conjunct in _conjuncts(part)]
+
+
+class QueryShape:
+    """Columns a SELECT filters, sorts and reads by, as (table, column) pairs"""
+
+    def __init__(self, sql):
+        clauses = _clauses(sql)
+        table = _TABLE.match(clauses.get('FROM', ''))
+        self.table = table.group(1) if table else None
+        self.equality, self.ranges = [], []
+        self.order, self.group = [], []
+        self.selected = _COLUMN_RE.findall(clauses.get('SELECT', ''))
+
+        for conjunct in _conjuncts(clauses.get('WHERE', '')):
+            if len(_split(_strip_parens(conjunct), ' OR ')) > 1:
+                # A keyset seek (a < x OR (a = x AND b < y) ...) is a range on its first column
+                first = _COLUMN_RE.search(conjunct)
+                if first:
+                    self.ranges.append(first.groups())
+                continue
+            match = _COMPARISON.match(_strip_parens(conjunct))
+            if match is None:
+                continue
+            table, column, operator, rest = match.groups()
+            if operator == '=' and _COLUMN_RE.match(rest.strip()):
+                continue  # join condition
+            if operator in ('=', 'IN', 'IS NULL'):
+                self.equality.append((table, column))
+            else:
+                self.ranges.append((table, column))
+
+        for item in _split(clauses.get('ORDER BY', ''), ','):
+            match = _ORDER_ITEM.match(item)
+            if match:
+                table, column, direction = match.groups()
+                self.order.append((table, column, (direction or 'ASC').upper() == 'DESC'))
+        for item in _split(clauses.get('GROUP BY', ''), ','):
+            match = _ORDER_ITEM.match(item)
+            if match:
+                self.group.append(match.groups()[:2])
+
+
+def _unique(columns):
+    return list(dict.fromkeys(columns))
+
+
+def propose(shape, primary_key=None):
+    """Index for the shape's main table, or None.
+
+    Returns (columns, equality, covering): the first equality columns may
+    come in any order, the rest are ordered.
+    """
+    table = shape.table
+    # Sorted, so queries that differ only in condition order share a proposal
+    columns = sorted(_unique(column for t, column in shape.equality if t == table))
+    equality = len(columns)
+
+    order = [(t, column, desc) for t, column, desc in shape.order]
+    if order and all(t == table for t, _, _ in order) and len({desc for _, _, desc in order}) == 1:
+        # Rows come out of the index already sorted (forwards or backwards)
+        columns = _unique(columns + [column for _, column, _ in order])
+    elif shape.group and all(t == table for t, _ in shape.group):
+        columns = _unique(columns + [column for _, column in shape.group])
+    else:
+        columns = _unique(columns + [column for t, column in shape.ranges if t == table][:1])
+
+    if not columns or columns == [primary_key]:
+        return None
+    rest = [column for column in _unique(column for t, column in shape.selected if t == table)
+            if column not in columns and column != primary_key]
+    if len(columns) + len(rest) <= MAX_INDEX_COLUMNS:
+        return columns + rest, equality, True
+    return columns, equality, not rest
+
+
+def matches(existing, columns, equality):
+    """Whether an existing index's columns start with the proposed ones"""
+    return (set(existing[:equality]) == set(columns[:equality])
+            and existing[equality:len(columns)] == columns[equality:])
+
+
+def index_name(table, columns):
+    """Deterministic name of at most 30 characters for a proposed index"""
+    digest = hashlib.sha1(','.join(columns).encode()).hexdigest()[:8]
+    return f'idx_{table[:16]}_{digest}'
@@ -0,0 +1,250 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.test import Client
+from django.utils import timezone
+from tutoring_app import dashboard_cache
+from tutoring_app.archive import archive_horizon
+from tutoring_app.benchmarking import busiest, seed_sessions, test_database
+from tutoring_app.catalog import subject_catalog
+from tutoring_app.index_advisor import (
+    SUPPORTED_VENDORS, QueryShape, capture, explain, index_name, matches, problems, propose, rows_examined,
+)
+from tutoring_app.metrics import fingerprint
+from tutoring_app.models import Student, Tutor
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throwaway test database, records the SELECTs the main views issue, EXPLAINs '
+            'each one, flags full scans and filesorts, and proposes (and measures) covering '
+            'composite indexes for them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=100000,
+                            help='Sessions to seed the test database with (default 100000)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes used to generate the sessions (default 1)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Only flag scans and sorts of at least this many rows (default 1000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs of each query before and after an index (default 5)')
+        parser.add_argument('--no-try', action='store_true',
+                            help="Only propose indexes; don't build them to measure the benefit")
+        parser.add_argument('--output', help='Also write the findings as JSON to this file')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database (and its data) between runs')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f'advise_indexes supports {", ".join(SUPPORTED_VENDORS)}, not {connection.vendor}.')
+
+        with test_database(keepdb=options['keepdb']):
+            seed_sessions(options['sessions'], options['seed'], options['workers'], stdout=self.stdout)
+            statements = self.capture_views()
+            self.stdout.write(f'Captured {len(statements)} distinct SELECTs.\n')
+            findings = [self.analyze(statement, options) for statement in statements.values()]
+
+        flagged = [finding for finding in findings if finding['problems']]
+        proposals = self.merge_proposals(flagged)
+        self.report(flagged, proposals)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'generated_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'sessions': options['sessions'],
+                    'queries': findings,
+                    'proposals': proposals,
+                }, f, indent=2, default=str)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(flagged)} of {len(findings)} queries flagged, {len(proposals)} indexes proposed.'
+        ))
+
+    def capture_views(self):
+        """{fingerprint: statement dict} of the SELECTs the main views issue"""
+        student = busiest('student', Student)
+        tutor = busiest('tutor', Tutor)
+        subject = subject_catalog.subjects()[0]
+        as_student = Client()
+        as_student.force_login(student.user)
+        as_tutor = Client()
+        as_tutor.force_login(tutor.user)
+        far_future = timezone.now().date() + timedelta(days=730)
+        archived_range = (archive_horizon() - timedelta(days=90)).isoformat()
+
+        cases = [
+            ('dashboard', lambda: as_student.get('/dashboard/')),
+            ('dashboard_data', lambda: as_student.get('/dashboard/data.json')),
+            ('dashboard_data_tutor', lambda: as_tutor.get('/dashboard/data.json')),
+            ('session_log', lambda: as_student.get('/sessions/')),
+            ('session_log_tutor', lambda: as_tutor.get('/sessions/')),
+            ('session_log_filtered',
+             lambda: as_student.get(f'/sessions/?status=completed&subject={subject.subject_id}')),
+            ('session_log_archive', lambda: as_student.get(f'/sessions/?date_from={archived_range}')),
+            ('session_export', lambda: as_student.get('/sessions/export/?status=completed')),
+            ('tutor_requests', lambda: as_tutor.get('/tutor/requests/')),
+            ('student_create_session', lambda: as_student.post('/student/create-session/', {
+                'subject': subject.subject_id, 'session_date': far_future, 'session_time': '10:00',
+            })),
+        ]
+
+        statements = {}
+        for view, request in cases:
+            dashboard_cache.clear()
+            with capture() as captured:
+                response = request()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            if response.status_code >= 400:
+                self.stderr.write(f'  {view} answered {response.status_code}')
+            for sql, params in captured:
+                statement = statements.setdefault(fingerprint(sql), {
+                    'sql': sql, 'params': params, 'views': [], 'executions': 0,
+                })
+                statement['executions'] += 1
+                if view not in statement['views']:
+                    statement['views'].append(view)
+        return statements
+
+    def analyze(self, statement, options):
+        steps = explain(statement['sql'], statement['params'])
+        finding = {
+            'sql': statement['sql'],
+            'views': statement['views'],
+            'executions': statement['executions'],
+            'plan': steps,
+            'problems': problems(steps, options['min_rows']),
+            'proposal': None,
+        }
+        if not finding['problems']:
+            return finding
+
+        shape = QueryShape(statement['sql'])
+        model = self.model_for(shape.table)
+        if model is None:
+            return finding
+        proposed = propose(shape, primary_key=model._meta.pk.column)
+        if proposed is None:
+            return finding
+        columns, equality, covering = proposed
+        if self.existing_index(shape.table, columns, equality):
+            return finding
+
+        fields = {field.column: field.name for field in model._meta.concrete_fields}
+        index = models.Index(fields=[fields[column] for column in columns], name=index_name(shape.table, columns))
+        proposal = {
+            'table': shape.table,
+            'columns': columns,
+            'covering': covering,
+            'name': index.name,
+            'definition': f"models.Index(fields={[fields[column] for column in columns]!r}, name='{index.name}')",
+            'rows_before': rows_examined(steps),
+        }
+        with connection.schema_editor() as editor:
+            proposal['sql'] = str(index.create_sql(model, editor))
+        if not options['no_try']:
+            proposal.update(self.try_index(statement, model, index, options['repeat']))
+        finding['proposal'] = proposal
+        return finding
+
+    def model_for(self, table):
+        for model in apps.get_models():
+            if model._meta.db_table == table and model._meta.managed:
+                return model
+        return None
+
+    def existing_index(self, table, columns, equality):
+        """Name of an index on table that already starts with columns, if any"""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        for name, constraint in constraints.items():
+            # Unique constraints are backed by an index, but SQLite reports
+            # inline UNIQUE constraints with index=False
+            indexed = constraint['index'] or constraint['primary_key'] or constraint['unique']
+            if indexed and matches(constraint['columns'], columns, equality):
+                return name
+        return None
+
+    def try_index(self, statement, model, index, repeat):
+        """Build the index on the test database, compare plans and timings, drop it"""
+        before_ms = self.time_query(statement, repeat)
+        with connection.schema_editor() as editor:
+            editor.add_index(model, index)
+        try:
+            steps = explain(statement['sql'], statement['params'])
+            after_ms = self.time_query(statement, repeat)
+        finally:
+            with connection.schema_editor() as editor:
+                editor.remove_index(model, index)
+        return {
+            'used': any(step['key'] == index.name for step in steps),
+            'rows_after': rows_examined(steps),
+            'ms_before': before_ms,
+            'ms_after': after_ms,
+            'ms_saved_per_request': (before_ms - after_ms) * statement['executions'],
+        }
+
+    def time_query(self, statement, repeat):
+        """Median milliseconds to run and fetch the statement"""
+        timings = []
+        with connection.cursor() as cursor:
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                cursor.execute(statement['sql'], statement['params'])
+                cursor.fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def merge_proposals(self, flagged):
+        """One entry per proposed index, with every query and view it serves"""
+        proposals = {}
+        for finding in flagged:
+            proposal = finding['proposal']
+            if proposal is None:
+                continue
+            merged = proposals.setdefault(proposal['name'], {**proposal, 'views': [], 'queries': 0,
+                                                             'ms_saved_per_request': 0.0})
+            merged['queries'] += 1
+            merged['views'] = sorted(set(merged['views']) | set(finding['views']))
+            merged['ms_saved_per_request'] += proposal.get('ms_saved_per_request', 0.0)
+        return sorted(proposals.values(), key=lambda proposal: -proposal['ms_saved_per_request'])
+
+    def report(self, flagged, proposals):
+        for number, finding in enumerate(flagged, 1):
+            self.stdout.write(
+                f'[{number}] {"; ".join(finding["problems"])} - {finding["executions"]} executions '
+                f'in {", ".join(finding["views"])}'
+            )
+            self.stdout.write(f'    {" ".join(finding["sql"].split())[:200]}')
+            proposal = finding['proposal']
+            if proposal is None:
+                self.stdout.write('    No index proposed (nothing to key on, or an existing index already matches).')
+                continue
+            self.stdout.write(
+                f'    Proposed: {proposal["name"]} on {proposal["table"]} ({", ".join(proposal["columns"])})'
+                f'{" - covering" if proposal["covering"] else ""}'
+            )
+            if 'ms_before' in proposal:
+                measured = f'    Measured: {proposal["ms_before"]:.2f} ms -> {proposal["ms_after"]:.2f} ms'
+                if proposal['rows_before'] is not None and proposal['rows_after'] is not None:
+                    measured += f', rows examined {proposal["rows_before"]:,} -> {proposal["rows_after"]:,}'
+                if not proposal['used']:
+                    measured += ' (the planner did not use it)'
+                self.stdout.write(measured)
+
+        if proposals:
+            self.stdout.write('\nProposed indexes, by time saved per request:')
+            for proposal in proposals:
+                saved = proposal['ms_saved_per_request']
+                self.stdout.write(
+                    f'  {proposal["definition"]}  # {proposal["table"]}, {proposal["queries"]} queries, '
+                    f'{", ".join(proposal["views"])}{f", {saved:.2f} ms saved" if "ms_before" in proposal else ""}'
+                )
+                self.stdout.write(f'    {proposal["sql"]}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from tutoring_app.archive import archive_horizon, archive_sessions
+
+
+class Command(BaseCommand):
+    help = ('Moves completed and declined sessions older than SESSION_ARCHIVE_AFTER_DAYS '
+            'into sessions_archive in chunks')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Number of session ids handled per transaction (default 5000)')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between chunks (default 0)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the sessions that would be archived')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Archiving sessions dated before {archive_horizon()} in chunks of {options["chunk_size"]}...'
+        )
+
+        def progress(done, last, stats):
+            rate = stats['archived'] / stats['seconds'] if stats['seconds'] else 0
+            self.stdout.write(
+                f'  session ids up to {done} of {last}: {stats["archived"]} archived ({rate:,.0f} sessions/s)'
+            )
+
+        stats = archive_sessions(
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            progress=progress,
+            dry_run=options['dry_run']
+        )
+        prefix = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {stats["archived"]} sessions in {stats["chunks"]} chunks, {stats["seconds"]:.2f}s.'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from tutoring_app import dashboard_cache
+from tutoring_app.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the session_monthly_rollup table from session history in chunks; '
+            'session writes wait until it finishes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='Number of session ids scanned per query (default 50000)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        self.stdout.write(f'Backfilling monthly rollup in chunks of {chunk_size} sessions...')
+
+        def progress(done, last):
+            self.stdout.write(f'  processed session ids up to {done} of {last}')
+
+        written = backfill(chunk_size=chunk_size, progress=progress)
+        dashboard_cache.clear()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} monthly rollup rows.'))
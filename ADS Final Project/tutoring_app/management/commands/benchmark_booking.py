@@ -0,0 +1,83 @@
+import random
+import time
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from tutoring_app.booking import TutorSchedule, session_duration, slot_minutes
+from tutoring_app.models import Session, Tutor
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks booking conflict checks for a semester-start burst of requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tutors', type=int, default=500)
+        parser.add_argument('--existing', type=int, default=200,
+                            help='Active sessions already booked per tutor (default 200)')
+        parser.add_argument('--requests', type=int, default=200000,
+                            help='Booking requests in the burst (default 200000)')
+        parser.add_argument('--db-requests', type=int, default=2000,
+                            help='Requests checked with the database COUNT(*) for comparison (default 2000, 0 to skip)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        duration = session_duration()
+        first_day = date.today() + timedelta(days=1)
+
+        def random_slot():
+            session_date = first_day + timedelta(days=rng.randint(0, 13))
+            session_time = dt_time(hour=rng.randint(8, 19), minute=rng.choice([0, 30]))
+            return session_date, session_time
+
+        # Synthetic schedules: no database access in the index phase
+        schedules = {}
+        next_id = 1
+        for tutor_id in range(options['tutors']):
+            entries = []
+            for _ in range(options['existing']):
+                entries.append((slot_minutes(*random_slot()), next_id))
+                next_id += 1
+            schedules[tutor_id] = TutorSchedule(entries)
+
+        accepted = rejected = 0
+        start = time.perf_counter()
+        for _ in range(options['requests']):
+            tutor_id = rng.randrange(options['tutors'])
+            slot = slot_minutes(*random_slot())
+            schedule = schedules[tutor_id]
+            if schedule.conflicts(slot, duration):
+                rejected += 1
+            else:
+                schedule.add(slot, next_id)
+                next_id += 1
+                accepted += 1
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'Interval index: {options["requests"]} requests over {options["tutors"]} tutors '
+            f'in {elapsed:.3f}s ({options["requests"] / elapsed:,.0f} req/s); '
+            f'{accepted} booked, {rejected} rejected as overlapping'
+        )
+
+        if options['db_requests'] <= 0:
+            return
+        tutor_ids = list(Tutor.objects.values_list('tutor_id', flat=True)[:options['tutors']])
+        if not tutor_ids:
+            self.stdout.write(self.style.WARNING('No tutors in the database; skipping the COUNT(*) comparison.'))
+            return
+
+        start = time.perf_counter()
+        for _ in range(options['db_requests']):
+            session_date, session_time = random_slot()
+            Session.objects.filter(
+                tutor_id=rng.choice(tutor_ids),
+                session_date=session_date,
+                session_time=session_time,
+                status__in=['pending', 'approved']
+            ).count()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Database COUNT(*) (exact-slot check, as in trg_prevent_duplicate_session): '
+            f'{options["db_requests"]} checks in {elapsed:.3f}s ({options["db_requests"] / elapsed:,.0f} req/s)'
+        )
@@ -0,0 +1,106 @@
+import copy
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.mysql.base import DatabaseWrapper as DirectDatabaseWrapper
+from tutoring_app.mysql_pool.base import DatabaseWrapper as PooledDatabaseWrapper
+from tutoring_app.mysql_pool.pool import all_pools
+
+
+MODES = {
+    'direct': DirectDatabaseWrapper,
+    'pooled': PooledDatabaseWrapper,
+}
+
+
+class Command(BaseCommand):
+    help = ('Compares the per-request connection cost of plain mysqlclient connections with the '
+            'pooled backend: every simulated request connects, runs one query and closes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Simulated requests per mode and thread count (default 500)')
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32],
+                            help='Concurrent threads to measure with (default 1 8 32)')
+        parser.add_argument('--query', default='SELECT 1',
+                            help='Statement each request runs (default SELECT 1)')
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'mysql':
+            raise CommandError('benchmark_db_connections needs the default database to be MySQL.')
+
+        results = []
+        self.stdout.write(f'{"mode":<8} {"threads":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>9}')
+        for threads in options['threads']:
+            for mode, wrapper_class in MODES.items():
+                result = self.measure(mode, wrapper_class, threads, options['requests'], options['query'])
+                results.append(result)
+                self.stdout.write(
+                    f'{mode:<8} {threads:>7} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+                    f'{result["p99_ms"]:>8.2f} {result["requests_per_second"]:>9.0f}'
+                )
+
+        for pool in all_pools():
+            if pool.name.startswith('benchmark_pooled:'):
+                stats = pool.stats()
+                self.stdout.write(
+                    f'Pool: {stats["created"]} connections opened, {stats["reused"]} checkouts reused, '
+                    f'{stats["wait_seconds"] * 1000:.1f} ms spent waiting, {stats["timeouts"]} timeouts'
+                )
+                pool.close_idle()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Measured {len(results)} combinations.'))
+
+    def measure(self, mode, wrapper_class, threads, requests, query):
+        settings_dict = copy.deepcopy(connections['default'].settings_dict)
+        per_thread = max(1, requests // threads)
+        timings = []
+        lock = threading.Lock()
+
+        def worker():
+            wrapper = wrapper_class(settings_dict, alias=f'benchmark_{mode}')
+            local = []
+            try:
+                for _ in range(per_thread):
+                    start = time.perf_counter()
+                    wrapper.ensure_connection()
+                    with wrapper.cursor() as cursor:
+                        cursor.execute(query)
+                        cursor.fetchall()
+                    wrapper.close()
+                    local.append((time.perf_counter() - start) * 1000)
+            finally:
+                wrapper.close()
+            with lock:
+                timings.extend(local)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        return {
+            'mode': mode,
+            'threads': threads,
+            'requests': len(timings),
+            'p50_ms': self.percentile(timings, 50),
+            'p95_ms': self.percentile(timings, 95),
+            'p99_ms': self.percentile(timings, 99),
+            'mean_ms': statistics.fmean(timings),
+            'requests_per_second': len(timings) / elapsed,
+        }
+
+    def percentile(self, samples, pct):
+        ordered = sorted(samples)
+        return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
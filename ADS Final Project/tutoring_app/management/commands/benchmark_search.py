@@ -0,0 +1,116 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from tutoring_app.benchmarking import busiest, percentile, seed_sessions, test_database
+from tutoring_app.catalog import subject_catalog
+from tutoring_app.models import Session, Student
+from tutoring_app.search import backend, search
+
+
+# What SessionAdmin.search_fields used to search with icontains
+ICONTAINS_FIELDS = ('student__full_name', 'tutor__full_name', 'subject__subject_name', 'notes')
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks session search on a throwaway test database seeded with growing numbers '
+            'of sessions: the old icontains search against the search index, for the admin '
+            '(all sessions) and the session log (one student); writes percentiles as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                            help='Total session counts to measure at (default 10000 100000)')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed runs per query, method and size (default 20)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes used to generate the sessions (default 1)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark_search.json',
+                            help='Where to write the JSON results (default benchmark_search.json)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database (and its data) between runs')
+
+    def handle(self, *args, **options):
+        with test_database(keepdb=options['keepdb']):
+            results = []
+            for index, size in enumerate(sorted(options['sizes'])):
+                # generate_synthetic_data rebuilds the search index after inserting
+                seed_sessions(size, options['seed'] + index, options['workers'], stdout=self.stdout)
+                results.extend(self.measure(size, options['repeat']))
+
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'backend': backend(),
+                'max_results': settings.SESSION_SEARCH_MAX_RESULTS,
+                'results': results,
+            }, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(results)} results to {options["output"]}.'))
+
+    def queries(self):
+        """(name, query, student or None) cases, from broad to narrow"""
+        student = busiest('student', Student)
+        subject = subject_catalog.subjects()[0].subject_name
+        return [
+            ('notes_word', 'midterm', None),
+            ('notes_prefix', 'proj', None),
+            ('two_words', 'exam prep', None),
+            ('subject', subject, None),
+            ('student_name', student.full_name, None),
+            ('own_notes_word', 'midterm', student),
+            ('own_subject', subject, student),
+        ]
+
+    def icontains(self, query, student):
+        """Session ids the old admin search found: every word in some field, newest first"""
+        sessions = Session.objects.all() if student is None else Session.objects.filter(student=student)
+        for word in query.split():
+            condition = Q()
+            for field in ICONTAINS_FIELDS:
+                condition |= Q(**{f'{field}__icontains': word})
+            sessions = sessions.filter(condition)
+        return list(sessions.order_by('-created_at').values_list(
+            'session_id', flat=True
+        )[:settings.SESSION_SEARCH_MAX_RESULTS])
+
+    def indexed(self, query, student):
+        return search(query, student_id=None if student is None else student.pk)
+
+    def measure(self, size, repeat):
+        results = []
+        self.stdout.write(
+            f'{"sessions":>9} {"query":<16} {"method":<10} {"p50 ms":>8} {"p95 ms":>8} {"matches":>8}'
+        )
+        for name, query, student in self.queries():
+            for method, run in (('icontains', self.icontains), ('index', self.indexed)):
+                matches = len(run(query, student))  # warm up
+                timings = []
+                for _ in range(max(1, repeat)):
+                    start = time.perf_counter()
+                    run(query, student)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                result = {
+                    'sessions': size,
+                    'query': name,
+                    'text': query,
+                    'scope': 'all' if student is None else 'student',
+                    'method': method,
+                    'runs': len(timings),
+                    'p50_ms': percentile(timings, 50),
+                    'p95_ms': percentile(timings, 95),
+                    'mean_ms': statistics.fmean(timings),
+                    'matches': matches,
+                }
+                results.append(result)
+                self.stdout.write(
+                    f'{size:>9} {name:<16} {method:<10} {result["p50_ms"]:>8.2f} '
+                    f'{result["p95_ms"]:>8.2f} {matches:>8}'
+                )
+        return results
@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from tutoring_app.matching import find_tutor, tutor_index
+from tutoring_app.models import User, Tutor, Subject
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks tutor matching latency against the old icontains lookup as the tutor count grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 20000],
+                            help='Total benchmark tutor counts to measure at (default 1000 5000 10000 20000)')
+        parser.add_argument('--lookups', type=int, default=200,
+                            help='Matches timed per size (default 200)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        subjects = list(Subject.objects.all())
+        if not subjects:
+            raise CommandError('Need subjects before benchmarking. Run load_sql_data first.')
+
+        rng = random.Random(options['seed'])
+        self.stdout.write(f'{"tutors":>8} {"match p50 ms":>13} {"match p95 ms":>13} {"icontains p50 ms":>17}')
+
+        # Everything created here is rolled back at the end
+        with transaction.atomic():
+            created = 0
+            for size in sorted(options['sizes']):
+                self.create_tutors(created, size - created, subjects, rng)
+                created = size
+                tutor_index.invalidate()
+                tutor_index.candidates(subjects[0].subject_name)  # build outside the timings
+
+                matched, legacy = [], []
+                for _ in range(options['lookups']):
+                    subject = rng.choice(subjects)
+                    session_date = date.today() + timedelta(days=rng.randint(1, 60))
+                    session_time = dt_time(hour=rng.randint(8, 20))
+
+                    start = time.perf_counter()
+                    find_tutor(subject, session_date, session_time)
+                    matched.append((time.perf_counter() - start) * 1000)
+
+                    start = time.perf_counter()
+                    Tutor.objects.filter(specialization__icontains=subject.subject_name).first()
+                    legacy.append((time.perf_counter() - start) * 1000)
+
+                self.stdout.write(
+                    f'{size:>8} {statistics.median(matched):>13.3f} '
+                    f'{self.p95(matched):>13.3f} {statistics.median(legacy):>17.3f}'
+                )
+            transaction.set_rollback(True)
+
+        tutor_index.invalidate()
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; benchmark tutors rolled back.'))
+
+    def p95(self, samples):
+        ordered = sorted(samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def create_tutors(self, start, count, subjects, rng):
+        emails = [f'bench-tutor-{i}@benchmark.invalid' for i in range(start, start + count)]
+        User.objects.bulk_create(
+            [User(email=email, username=email, password='!', role='tutor') for email in emails],
+            batch_size=1000
+        )
+        user_ids = User.objects.filter(email__in=emails).values_list('id', flat=True)
+        Tutor.objects.bulk_create(
+            [
+                Tutor(user_id=user_id, full_name=f'Benchmark Tutor {user_id}',
+                      specialization=rng.choice(subjects).subject_name)
+                for user_id in user_ids
+            ],
+            batch_size=1000
+        )
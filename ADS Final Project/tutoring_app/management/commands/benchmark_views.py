@@ -0,0 +1,145 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from tutoring_app import dashboard_cache
+from tutoring_app.benchmarking import busiest, percentile, seed_sessions, test_database
+from tutoring_app.catalog import subject_catalog
+from tutoring_app.models import Student, Tutor
+
+
+class QueryCounter:
+    """connection.execute_wrapper that just counts statements"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the main views with the test client on a throwaway test database '
+            'seeded with growing numbers of sessions; writes percentiles and query counts as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Total session counts to measure at (default 10000 100000 1000000)')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Timed requests per view and size (default 100)')
+        parser.add_argument('--login-requests', type=int, default=10,
+                            help='Timed logins per size; each one hashes a password (default 10)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes used to generate the sessions (default 1)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark_views.json',
+                            help='Where to write the JSON results (default benchmark_views.json)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database (and its data) between runs')
+
+    def handle(self, *args, **options):
+        with test_database(keepdb=options['keepdb']):
+            results = []
+            for index, size in enumerate(sorted(options['sizes'])):
+                seed_sessions(size, options['seed'] + index, options['workers'], stdout=self.stdout)
+                results.extend(self.measure(size, options))
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'git_commit': self.git_commit(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(results)} results to {options["output"]}.'))
+
+    def measure(self, size, options):
+        student = busiest('student', Student)
+        tutor = busiest('tutor', Tutor)
+        subject = subject_catalog.subjects()[0]
+        as_student = Client()
+        as_student.force_login(student.user)
+        as_tutor = Client()
+        as_tutor.force_login(tutor.user)
+
+        slots = iter(range(10 ** 9))
+        far_future = timezone.now().date() + timedelta(days=730)
+
+        def create_session():
+            slot = next(slots)
+            return as_student.post('/student/create-session/', {
+                'subject': subject.subject_id,
+                'session_date': far_future + timedelta(days=slot // 24),
+                'session_time': f'{8 + slot % 12:02d}:{30 * (slot // 12 % 2):02d}',
+            })
+
+        def login():
+            return Client().post('/login/', {'email': student.user.email, 'password': 'password'})
+
+        filtered = f'/sessions/?status=completed&subject={subject.subject_id}'
+        cases = [
+            ('dashboard', lambda: as_student.get('/dashboard/'), options['requests'], None),
+            ('dashboard_data', lambda: as_student.get('/dashboard/data.json'), options['requests'],
+             dashboard_cache.clear),
+            ('session_log', lambda: as_student.get('/sessions/'), options['requests'], None),
+            ('session_log_filtered', lambda: as_student.get(filtered), options['requests'], None),
+            ('tutor_requests', lambda: as_tutor.get('/tutor/requests/'), options['requests'], None),
+            ('student_create_session', create_session, options['requests'], None),
+            ('login', login, options['login_requests'], None),
+        ]
+
+        results = []
+        self.stdout.write(f'{"sessions":>9} {"view":<24} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+        for name, request, count, before_each in cases:
+            for _ in range(min(3, count)):
+                request()  # warm up caches and connections
+            timings, queries, statuses = [], [], set()
+            for _ in range(count):
+                if before_each:
+                    before_each()
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    start = time.perf_counter()
+                    response = request()
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(counter.count)
+                statuses.add(response.status_code)
+
+            result = {
+                'sessions': size,
+                'view': name,
+                'requests': count,
+                'p50_ms': percentile(timings, 50),
+                'p95_ms': percentile(timings, 95),
+                'p99_ms': percentile(timings, 99),
+                'mean_ms': statistics.fmean(timings),
+                'queries_median': statistics.median(queries),
+                'queries_max': max(queries),
+                'status_codes': sorted(statuses),
+            }
+            results.append(result)
+            self.stdout.write(
+                f'{size:>9} {name:<24} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+                f'{result["p99_ms"]:>8.2f} {result["queries_median"]:>8g}'
+            )
+        return results
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,147 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from tutoring_app.models import Student, Tutor, Subject, Session
+from tutoring_app.provisioning import provision_accounts, setup_django_worker
+from tutoring_app.synthetic import Plan, ensure_subjects, synthetic_email, write_shard
+
+
+class Command(BaseCommand):
+    help = ('Generates deterministic synthetic students, tutors and sessions for load testing, '
+            'optionally in parallel shards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--tutors', type=int, default=100)
+        parser.add_argument('--subjects', type=int, default=40)
+        parser.add_argument('--sessions', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=180,
+                            help='Length of the session date span in days (default 180)')
+        parser.add_argument('--start-date', type=date.fromisoformat, default=None,
+                            help='First session date, YYYY-MM-DD (default: --as-of minus half the span)')
+        parser.add_argument('--as-of', type=date.fromisoformat, default=None,
+                            help='Sessions before this date are completed/declined (default: today)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes writing shards in parallel (default 1)')
+        parser.add_argument('--shards', type=int, default=None,
+                            help='Number of shards (default: 4 per worker)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per multi-row INSERT (default 1000)')
+        parser.add_argument('--method', choices=['insert', 'load-data'], default='insert',
+                            help='Multi-row INSERTs, or a CSV per shard with LOAD DATA LOCAL INFILE (MySQL)')
+        parser.add_argument('--password', default='password',
+                            help='Password of the generated accounts (default "password")')
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='Do not rebuild session counters, the monthly rollup and the search index afterwards')
+
+    def handle(self, *args, **options):
+        if options['method'] == 'load-data' and connection.vendor != 'mysql':
+            raise CommandError('--method load-data needs MySQL (with local_infile enabled).')
+        if min(options['students'], options['tutors'], options['subjects'], options['days']) < 1:
+            raise CommandError('--students, --tutors, --subjects and --days must be at least 1.')
+
+        as_of = options['as_of'] or date.today()
+        start_date = options['start_date'] or as_of - timedelta(days=options['days'] // 2)
+        seed = options['seed']
+
+        started = time.perf_counter()
+        subject_ids = ensure_subjects(options['subjects'])
+        subject_names = dict(Subject.objects.filter(subject_id__in=subject_ids).values_list('subject_id', 'subject_name'))
+        student_ids = self.ensure_profiles(seed, 'student', options['students'], options['password'])
+        tutor_ids = self.ensure_profiles(
+            seed, 'tutor', options['tutors'], options['password'],
+            specialization=lambda i: subject_names[subject_ids[i % len(subject_ids)]]
+        )
+        self.stdout.write(f'Profiles ready in {time.perf_counter() - started:.2f}s')
+
+        if Session.objects.filter(student_id__in=student_ids).exists():
+            raise CommandError(f'Synthetic sessions for seed {seed} exist already; use another --seed.')
+
+        plan = Plan(seed, student_ids, tutor_ids, subject_ids, options['sessions'], start_date,
+                    options['days'], as_of, options['batch_size'], options['method'])
+        problem = plan.check()
+        if problem:
+            raise CommandError(problem)
+
+        shards = plan.shard_ranges(options['shards'] or options['workers'] * 4)
+        self.stdout.write(
+            f'Writing {options["sessions"]} sessions ({start_date} to '
+            f'{start_date + timedelta(days=options["days"] - 1)}) in {len(shards)} shards '
+            f'with {options["workers"]} worker(s)...'
+        )
+        rows, seconds = self.write_shards(plan, shards, options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {rows} sessions in {seconds:.2f}s ({rows / seconds if seconds else 0:,.0f} rows/s).'
+        ))
+
+        if not options['skip_rebuild']:
+            # Raw inserts bypass the incremental counters, rollups and search index
+            call_command('rebuild_session_counters', stdout=self.stdout)
+            call_command('backfill_monthly_rollup', stdout=self.stdout)
+            call_command('rebuild_search_index', stdout=self.stdout)
+
+    def ensure_profiles(self, seed, role, count, password, specialization=None):
+        """Profile ids of synthetic accounts 0..count-1, creating the missing ones"""
+        model = Student if role == 'student' else Tutor
+        emails = [synthetic_email(seed, role, i) for i in range(count)]
+        existing = set(model.objects.filter(
+            user__email__startswith=f'synthetic-{seed}-{role}-'
+        ).values_list('user__email', flat=True))
+
+        accounts = []
+        for i, email in enumerate(emails):
+            if email in existing:
+                continue
+            account = {
+                'email': email,
+                'username': email,
+                'password': password,
+                'role': role,
+                'full_name': f'Synthetic {role.title()} {i}',
+            }
+            if specialization:
+                account['specialization'] = specialization(i)
+            accounts.append(account)
+        if accounts:
+            stats = provision_accounts(accounts)
+            self.stdout.write(
+                f'Created {len(accounts)} {role}s (users {stats["users"]["per_second"]:,.0f}/s, '
+                f'profiles {stats["profiles"]["per_second"]:,.0f}/s)'
+            )
+
+        ids = dict(model.objects.filter(
+            user__email__startswith=f'synthetic-{seed}-{role}-'
+        ).values_list('user__email', 'pk'))
+        return [ids[email] for email in emails]
+
+    def write_shards(self, plan, shards, workers):
+        started = time.perf_counter()
+        written = 0
+        if workers <= 1:
+            for start, end in shards:
+                rows, _ = write_shard(plan, start, end)
+                written += rows
+                self.progress(written, plan.sessions, started)
+            return written, time.perf_counter() - started
+
+        # Forked workers must not share this process's database connection
+        connections.close_all()
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'tutoring_system.settings')
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_django_worker,
+                                 initargs=(settings_module,)) as pool:
+            futures = [pool.submit(write_shard, plan, start, end) for start, end in shards]
+            for future in as_completed(futures):
+                rows, _ = future.result()
+                written += rows
+                self.progress(written, plan.sessions, started)
+        return written, time.perf_counter() - started
+
+    def progress(self, written, total, started):
+        seconds = time.perf_counter() - started
+        self.stdout.write(f'  {written} of {total} sessions ({written / seconds if seconds else 0:,.0f} rows/s)')
@@ -1,11 +1,12 @@
 import os
 import random
 from datetime import timedelta
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import connection, transaction
 from django.utils import timezone
-from django.contrib.auth.hashers import make_password
-from tutoring_app.models import User, Student, Tutor, Subject, Session
+from tutoring_app.models import Student, Tutor, Subject, Session
+from tutoring_app.provisioning import provision_accounts
 
 class Command(BaseCommand):
     help = 'Loads advanced SQL features and ensures 2000+ records exist'
@@ -19,6 +20,11 @@ class Command(BaseCommand):
         # 2. Populate Data
         self.populate_data()
         
+        # 3. Bulk inserts bypass the incremental counters, rollups and search index, so rebuild them
+        call_command('rebuild_session_counters', stdout=self.stdout)
+        call_command('backfill_monthly_rollup', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        
         self.stdout.write(self.style.SUCCESS('Successfully loaded SQL features and data!'))
 
     def install_sql_features(self):
@@ -100,19 +106,19 @@ class Command(BaseCommand):
             
             if students_needed > 0:
                 self.stdout.write(f'Creating {students_needed} students...')
-                for i in range(students_needed):
-                    email = f'student_{timezone.now().timestamp()}_{i}@example.com'
-                    user = User.objects.create(
-                        username=email,
-                        email=email,
-                        password=make_password('password'),
-                        role='student'
-                    )
-                    student = Student.objects.create(
-                        user=user,
-                        full_name=f'Student {i+existing_students_count+1}'
-                    )
-                    all_students.append(student)
+                stamp = timezone.now().timestamp()
+                accounts = [
+                    {
+                        'email': f'student_{stamp}_{i}@example.com',
+                        'username': f'student_{stamp}_{i}@example.com',
+                        'password': 'password',
+                        'role': 'student',
+                        'full_name': f'Student {i+existing_students_count+1}',
+                    }
+                    for i in range(students_needed)
+                ]
+                self.report_provisioning(provision_accounts(accounts))
+                all_students = list(Student.objects.filter(user__email__in=[a['email'] for a in accounts]))
             else:
                 all_students = list(Student.objects.all())
 
@@ -123,21 +129,20 @@ class Command(BaseCommand):
             
             if tutors_needed > 0:
                 self.stdout.write(f'Creating {tutors_needed} tutors...')
-                for i in range(tutors_needed):
-                    email = f'tutor_{timezone.now().timestamp()}_{i}@example.com'
-                    user = User.objects.create(
-                        username=email,
-                        email=email,
-                        password=make_password('password'),
-                        role='tutor'
-                    )
-                    spec = random.choice(all_subjects).subject_name
-                    tutor = Tutor.objects.create(
-                        user=user,
-                        full_name=f'Tutor {i+existing_tutors_count+1}',
-                        specialization=spec
-                    )
-                    all_tutors.append(tutor)
+                stamp = timezone.now().timestamp()
+                accounts = [
+                    {
+                        'email': f'tutor_{stamp}_{i}@example.com',
+                        'username': f'tutor_{stamp}_{i}@example.com',
+                        'password': 'password',
+                        'role': 'tutor',
+                        'full_name': f'Tutor {i+existing_tutors_count+1}',
+                        'specialization': random.choice(all_subjects).subject_name,
+                    }
+                    for i in range(tutors_needed)
+                ]
+                self.report_provisioning(provision_accounts(accounts))
+                all_tutors = list(Tutor.objects.filter(user__email__in=[a['email'] for a in accounts]))
             else:
                 all_tutors = list(Tutor.objects.all())
 
@@ -180,3 +185,9 @@ class Command(BaseCommand):
                 if sessions_batch:
                     Session.objects.bulk_create(sessions_batch)
 
+    def report_provisioning(self, stats):
+        for stage in ('hash', 'users', 'profiles'):
+            self.stdout.write(
+                f'  {stage}: {stats[stage]["count"]} in {stats[stage]["seconds"]:.2f}s '
+                f'({stats[stage]["per_second"]:,.0f}/s)'
+            )
@@ -0,0 +1,53 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from tutoring_app.provisioning import PROVISION_BATCH_SIZE, provision_accounts
+
+
+REQUIRED_COLUMNS = ('email', 'username', 'password', 'role', 'full_name')
+
+
+class Command(BaseCommand):
+    help = ('Creates student/tutor accounts in bulk from a CSV file '
+            '(email, username, password, role, full_name[, specialization])')
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=PROVISION_BATCH_SIZE,
+                            help=f'Users inserted per bulk INSERT (default {PROVISION_BATCH_SIZE})')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        with open(options['csv_file'], newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise CommandError(f'Missing CSV columns: {", ".join(missing)}')
+            accounts = list(reader)
+
+        invalid = [account['email'] for account in accounts if account['role'] not in ('student', 'tutor')]
+        if invalid:
+            raise CommandError(f'Role must be student or tutor (first bad row: {invalid[0]})')
+
+        self.stdout.write(f'Provisioning {len(accounts)} accounts...')
+        stats = provision_accounts(
+            accounts,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=self.progress
+        )
+        self.report(stats)
+
+    def progress(self, stage, done, total):
+        if stage == 'users':
+            self.stdout.write(f'  inserted {done} of {total} users')
+
+    def report(self, stats):
+        for stage in ('hash', 'users', 'profiles'):
+            stage_stats = stats[stage]
+            self.stdout.write(
+                f'  {stage:<9} {stage_stats["count"]:>8} in {stage_stats["seconds"]:.2f}s '
+                f'({stage_stats["per_second"]:,.0f}/s)'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Provisioned {stats["users"]["count"]} accounts.'))
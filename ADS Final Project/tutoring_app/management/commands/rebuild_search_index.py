@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from tutoring_app.search import backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the session search index (session_search and, for the inverted backend, '
+            'session_search_terms) from sessions and the archive in chunks')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of sessions indexed per transaction (default 1000)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Rebuilding the {backend()} session search index in chunks of {options["chunk_size"]}...'
+        )
+
+        def progress(done, indexed):
+            self.stdout.write(f'  indexed {indexed} sessions, up to session id {done}')
+
+        indexed, removed = rebuild_index(chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} sessions, removed {removed} stale entries.'
+        ))
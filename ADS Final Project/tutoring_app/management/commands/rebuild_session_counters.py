@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from tutoring_app import dashboard_cache
+from tutoring_app.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the session_counters table from the sessions table'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding session counters...')
+        written = rebuild_counters()
+        dashboard_cache.clear()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} session counter rows.'))
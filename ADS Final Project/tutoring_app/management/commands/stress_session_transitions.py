@@ -0,0 +1,175 @@
+import queue
+import random
+import threading
+import time
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from tutoring_app.benchmarking import test_database
+from tutoring_app.booking import booking_index
+from tutoring_app.counters import compute_counts, get_counter
+from tutoring_app.models import User, Student, Tutor, Subject, Session, SessionMonthlyRollup
+from tutoring_app.signals import session_created
+
+
+COUNTER_FIELDS = ('total_sessions', 'pending_count', 'approved_count', 'completed_count', 'declined_count')
+
+
+class Command(BaseCommand):
+    help = ('Races tutor accept, tutor decline and student withdraw on the same pending sessions '
+            'from several threads, on a throwaway test database, and checks that exactly the '
+            'legal changes won')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=200,
+                            help='Pending sessions to fight over (default 200)')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Concurrent threads, each with its own connection (default 8)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database (and its data) between runs')
+
+    def handle(self, *args, **options):
+        # Never on the live database: the race leaves its sessions, counters
+        # and change feed rows behind, and there is no clean way to remove them
+        try:
+            with test_database(keepdb=options['keepdb']):
+                subject = Subject.objects.order_by('subject_id').first()
+                if subject is None:
+                    subject = Subject.objects.create(subject_name='Stress Testing')
+                student, tutor = self.create_profiles()
+                session_ids = self.create_sessions(student, tutor, subject, options['sessions'])
+                results, errors, elapsed = self.race(student, tutor, session_ids, options['workers'], options['seed'])
+                problems = self.verify(student, tutor, session_ids, results)
+        finally:
+            # The index may hold schedules read from the test database
+            booking_index.clear()
+
+        won = {op: sum(1 for (_, name), result in results.items() if name == op and result) for op in OPERATIONS}
+        self.stdout.write(
+            f'{len(session_ids)} sessions, {len(results)} operations in {elapsed:.3f}s; '
+            f'won: accept {won["accept"]}, decline {won["decline"]}, withdraw {won["withdraw"]}; '
+            f'database errors {errors}'
+        )
+        if problems:
+            for problem in problems[:20]:
+                self.stderr.write(problem)
+            raise CommandError(f'{len(problems)} inconsistencies found.')
+        self.stdout.write(self.style.SUCCESS('Every session ended in exactly one legal state; counters and rollup agree.'))
+
+    def create_profiles(self):
+        suffix = f'{time.time_ns()}'
+        student_user = User.objects.create(email=f'stress-student-{suffix}@benchmark.invalid',
+                                           username=f'stress-student-{suffix}', password='!', role='student')
+        tutor_user = User.objects.create(email=f'stress-tutor-{suffix}@benchmark.invalid',
+                                         username=f'stress-tutor-{suffix}', password='!', role='tutor')
+        student = Student.objects.create(user=student_user, full_name='Stress Student')
+        tutor = Tutor.objects.create(user=tutor_user, full_name='Stress Tutor')
+        return student, tutor
+
+    def create_sessions(self, student, tutor, subject, count):
+        first_day = date.today() + timedelta(days=1)
+        session_ids = []
+        for i in range(count):
+            with transaction.atomic():
+                session = Session.objects.create(
+                    student=student, tutor=tutor, subject=subject,
+                    session_date=first_day + timedelta(days=i // 12),
+                    session_time=dt_time(hour=8 + i % 12),
+                    status='pending'
+                )
+                session_created.send(sender=Session, session=session)
+            session_ids.append(session.session_id)
+        return session_ids
+
+    def race(self, student, tutor, session_ids, workers, seed):
+        tasks = [(session_id, op) for session_id in session_ids for op in OPERATIONS]
+        random.Random(seed).shuffle(tasks)
+        pending = queue.Queue()
+        for task in tasks:
+            pending.put(task)
+
+        results = {}
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        session_id, op = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        result = OPERATIONS[op](session_id, student, tutor) is not None
+                    except DatabaseError:
+                        result = False
+                        with lock:
+                            errors.append((session_id, op))
+                    with lock:
+                        results[(session_id, op)] = result
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, len(errors), time.perf_counter() - start
+
+    def verify(self, student, tutor, session_ids, results):
+        problems = []
+        final = dict(Session.objects.filter(session_id__in=session_ids).values_list('session_id', 'status'))
+        for session_id in session_ids:
+            accepted = results.get((session_id, 'accept'))
+            declined = results.get((session_id, 'decline'))
+            withdrawn = results.get((session_id, 'withdraw'))
+            status = final.get(session_id)
+            if status is None:
+                legal = withdrawn and not accepted
+            elif status == 'approved':
+                legal = accepted and not declined and not withdrawn
+            elif status == 'declined':
+                legal = declined and not accepted and not withdrawn
+            else:
+                legal = not (accepted or declined or withdrawn)
+            if not legal:
+                problems.append(
+                    f'Session {session_id}: final {status or "deleted"}, '
+                    f'accept={accepted} decline={declined} withdraw={withdrawn}'
+                )
+
+        for role, profile_id in (('student', student.pk), ('tutor', tutor.pk)):
+            counter = get_counter(role, profile_id)
+            expected = compute_counts(role, profile_id)
+            actual = {field: getattr(counter, field) for field in COUNTER_FIELDS}
+            if actual != expected:
+                problems.append(f'{role} counters {actual} != {expected}')
+
+            rollup = {
+                (row['month'], row['subject_id'], row['status']): row['session_count']
+                for row in SessionMonthlyRollup.objects.filter(
+                    role=role, profile_id=profile_id, session_count__gt=0
+                ).values('month', 'subject_id', 'status', 'session_count')
+            }
+            recomputed = {
+                (row['month'], row['subject_id'], row['status']): row['count']
+                for row in Session.objects.filter(**{f'{role}_id': profile_id}).order_by().annotate(
+                    month=TruncMonth('session_date')
+                ).values('month', 'subject_id', 'status').annotate(count=Count('session_id'))
+            }
+            if rollup != recomputed:
+                problems.append(f'{role} monthly rollup {rollup} != {recomputed}')
+        return problems
+
+
+OPERATIONS = {
+    'accept': lambda session_id, student, tutor: Session.objects.transition(session_id, 'approved', tutor=tutor),
+    'decline': lambda session_id, student, tutor: Session.objects.transition(session_id, 'declined', tutor=tutor),
+    'withdraw': lambda session_id, student, tutor: Session.objects.withdraw(session_id, student=student),
+}
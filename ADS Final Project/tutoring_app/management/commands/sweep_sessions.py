@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from tutoring_app.notifier import prune_changes
+from tutoring_app.sweeper import CHUNK_SIZE, metric_lines, sweep
+
+
+class Command(BaseCommand):
+    help = 'Completes approved past sessions and expires pending past sessions in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Number of session ids handled per transaction (default {CHUNK_SIZE})')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between chunks (default 0)')
+        parser.add_argument('--loop', type=int, default=0,
+                            help='Keep running, sweeping every this many seconds (default 0: sweep once)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the sessions that would change')
+        parser.add_argument('--metrics-file',
+                            help='Write the sweep metrics to this file after each sweep '
+                                 '(Prometheus text format, e.g. for a node_exporter textfile collector)')
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep_once(options)
+            if options['loop'] <= 0:
+                return
+            time.sleep(options['loop'])
+
+    def sweep_once(self, options):
+        self.stdout.write(f'Sweeping sessions in chunks of {options["chunk_size"]}...')
+
+        def progress(done, last, stats):
+            rate = stats['completed'] + stats['expired']
+            rate = rate / stats['seconds'] if stats['seconds'] else 0
+            self.stdout.write(
+                f'  session ids up to {done} of {last}: {stats["completed"]} completed, '
+                f'{stats["expired"]} expired, {stats["skipped"]} skipped ({rate:,.0f} sessions/s)'
+            )
+
+        stats = sweep(
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            progress=progress,
+            dry_run=options['dry_run']
+        )
+        prefix = 'Would change' if options['dry_run'] else 'Changed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {stats["completed"] + stats["expired"]} sessions '
+            f'({stats["completed"]} completed, {stats["expired"]} expired) '
+            f'in {stats["chunks"]} chunks, {stats["seconds"]:.2f}s.'
+        ))
+        if not options['dry_run']:
+            # The live request feeds only prune while someone is connected
+            self.stdout.write(f'Pruned {prune_changes()} expired session changes.')
+        if options['metrics_file']:
+            self.write_metrics(options['metrics_file'])
+
+    def write_metrics(self, path):
+        # Replace the file whole so a scraper never reads half of it
+        partial = f'{path}.{os.getpid()}.tmp'
+        with open(partial, 'w') as file:
+            file.write('\n'.join(metric_lines()) + '\n')
+        os.replace(partial, path)
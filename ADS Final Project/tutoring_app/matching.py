@@ -0,0 +1,153 @@
+"""
+Tutor matching for new session requests.
+
+Replaces ``Tutor.objects.filter(specialization__icontains=...).first()``,
+a leading-wildcard LIKE over the whole tutors table that always returned the
+same tutor. Matching now works in three steps:
+
+1. an in-memory index maps a subject to the ids of tutors whose
+   specialization contains it (same rule as the old icontains), built once
+   per worker and rebuilt when Tutor rows change;
+2. candidates are ranked by current load (pending + approved sessions),
+   read from the indexed session_counters table. Subjects with more than
+   RANKED_CANDIDATES tutors rank a random sample of that size instead, so
+   the cost per match stays flat however many tutors there are;
+3. the least-loaded candidate with no overlapping session (checked against
+   the in-memory booking index, see booking.py) is chosen.
+"""
+
+import random
+import threading
+import time
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from .booking import booking_index
+from .counters import compute_counts_for
+from .models import SessionCounter, Tutor
+
+
+# Rebuild the index at least this often (seconds) so tutors added by other
+# worker processes are picked up even without a local post_save signal
+INDEX_TTL = 300
+
+# Upper bound on candidates whose load is read per match
+RANKED_CANDIDATES = 256
+
+# Candidates whose conflicts are checked per query
+CANDIDATE_BATCH = 20
+
+
+class TutorIndex:
+    """Subject name -> tutor ids, derived from Tutor.specialization"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_specialization = None
+        self._by_subject = {}
+        self._built_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._by_specialization = None
+            self._by_subject = {}
+
+    def _ensure_built(self):
+        if self._by_specialization is not None and time.monotonic() - self._built_at < INDEX_TTL:
+            return
+        by_specialization = {}
+        for tutor_id, specialization in Tutor.objects.exclude(
+            specialization__isnull=True
+        ).values_list('tutor_id', 'specialization').iterator():
+            by_specialization.setdefault(specialization.lower(), []).append(tutor_id)
+        ensure_tutor_counters()
+        self._by_specialization = by_specialization
+        self._by_subject = {}
+        self._built_at = time.monotonic()
+
+    def candidates(self, subject_name):
+        """Ids of tutors whose specialization contains subject_name (case-insensitive)"""
+        key = subject_name.lower()
+        with self._lock:
+            self._ensure_built()
+            if key not in self._by_subject:
+                self._by_subject[key] = sorted(
+                    tutor_id
+                    for specialization, tutor_ids in self._by_specialization.items()
+                    if key in specialization
+                    for tutor_id in tutor_ids
+                )
+            return self._by_subject[key]
+
+
+tutor_index = TutorIndex()
+
+
+def ensure_tutor_counters(batch_size=1000):
+    """Give every tutor a session_counters row so load ranking can see them.
+
+    Missing rows are counted from the sessions tables, as counters._apply
+    does, so tutors who already have sessions start from their real load
+    and later deltas are applied to it.
+    """
+    existing = set(SessionCounter.objects.filter(role='tutor').values_list('profile_id', flat=True))
+    missing = [
+        tutor_id for tutor_id in Tutor.objects.values_list('tutor_id', flat=True).iterator()
+        if tutor_id not in existing
+    ]
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        counts = compute_counts_for('tutor', batch)
+        SessionCounter.objects.bulk_create([
+            SessionCounter(role='tutor', profile_id=tutor_id, version=1, **counts[tutor_id])
+            for tutor_id in batch
+        ], ignore_conflicts=True)
+
+
+def _least_loaded_free(candidates, session_date, session_time):
+    ranked = SessionCounter.objects.filter(
+        role='tutor', profile_id__in=candidates
+    ).annotate(
+        load=F('pending_count') + F('approved_count')
+    ).order_by('load', 'profile_id').values_list('profile_id', flat=True)
+
+    offset = 0
+    while True:
+        batch = list(ranked[offset:offset + CANDIDATE_BATCH])
+        if not batch:
+            return None
+        free = booking_index.free_tutors(batch, session_date, session_time)
+        if free:
+            return Tutor.objects.get(tutor_id=free[0])
+        offset += CANDIDATE_BATCH
+
+
+def find_tutor(subject, session_date, session_time):
+    """Return the least-loaded free Tutor for subject at the given slot, or None"""
+    candidates = tutor_index.candidates(subject.subject_name)
+    if len(candidates) > RANKED_CANDIDATES:
+        sample = random.sample(candidates, RANKED_CANDIDATES)
+        tutor = _least_loaded_free(sample, session_date, session_time)
+        if tutor:
+            return tutor
+        # Everyone sampled is busy at that slot - fall back to the rest
+        sampled = set(sample)
+        candidates = [tutor_id for tutor_id in candidates if tutor_id not in sampled]
+
+    for start in range(0, len(candidates), RANKED_CANDIDATES):
+        tutor = _least_loaded_free(candidates[start:start + RANKED_CANDIDATES], session_date, session_time)
+        if tutor:
+            return tutor
+    return None
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def on_tutor_changed(sender, **kwargs):
+    tutor_index.invalidate()
+
+
+def connect_signals():
+    post_save.connect(on_tutor_changed, sender=Tutor, dispatch_uid='matching_tutor_saved')
+    post_delete.connect(on_tutor_changed, sender=Tutor, dispatch_uid='matching_tutor_deleted')
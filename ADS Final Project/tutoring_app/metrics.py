@@ -0,0 +1,306 @@
+"""
+Per-request timing and SQL instrumentation, exported in Prometheus format.
+
+MetricsMiddleware records for every request, keyed by the resolved view
+name:
+
+- request latency (histogram) and responses by status class;
+- SQL statements per request (histogram) and total SQL time, collected
+  by an execute_wrapper installed on every connection as it opens. It
+  reports to the request in whose context the query runs, so queries that
+  async views fan out to worker threads are counted too;
+- template render time, measured by TimedDjangoTemplates (set as the
+  template BACKEND).
+
+Statements slower than settings.METRICS_SLOW_QUERY_MS are logged to the
+``tutoring_app.slow_queries`` logger with their fingerprint (literals and
+IN lists collapsed) and counted per fingerprint. Metrics live in process
+memory, so each worker exposes its own numbers at /metrics (staff only).
+"""
+
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+
+slow_query_logger = logging.getLogger('tutoring_app.slow_queries')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Distinct slow query fingerprints kept per process
+MAX_FINGERPRINTS = 200
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def fingerprint(sql):
+    """SQL with literals and placeholder lists normalized, for grouping"""
+    sql = sql.replace('%s', '?')
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(?+)', sql)
+    return ' '.join(sql.split())
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.templates = 0
+        self.responses = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = {}
+        self.slow_queries = {}
+        self.collectors = []
+
+    def add_collector(self, collector):
+        """Register collector() -> list of exposition lines, appended to render()"""
+        self.collectors.append(collector)
+
+    def record_request(self, view, status, seconds, query_count, query_seconds,
+                       template_count, template_seconds):
+        status_class = f'{status // 100}xx'
+        with self._lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(query_count)
+            metrics.query_seconds += query_seconds
+            metrics.templates += template_count
+            metrics.template_seconds += template_seconds
+            metrics.responses[status_class] = metrics.responses.get(status_class, 0) + 1
+
+    def record_slow_query(self, sql_fingerprint, seconds):
+        key = hashlib.sha1(sql_fingerprint.encode()).hexdigest()[:12]
+        with self._lock:
+            entry = self.slow_queries.get(key)
+            if entry is None:
+                if len(self.slow_queries) >= MAX_FINGERPRINTS:
+                    return key
+                entry = self.slow_queries[key] = {'fingerprint': sql_fingerprint, 'count': 0, 'seconds': 0.0}
+            entry['count'] += 1
+            entry['seconds'] += seconds
+        return key
+
+    def reset(self):
+        with self._lock:
+            self.views = {}
+            self.slow_queries = {}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            views = sorted(self.views.items())
+            slow = sorted(self.slow_queries.items())
+            lines = []
+
+            def header(name, kind, text):
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            def histogram(name, attr):
+                for view, metrics in views:
+                    hist = getattr(metrics, attr)
+                    for bound, total in hist.cumulative():
+                        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {total}')
+                    lines.append(f'{name}_bucket{{view="{view}",le="+Inf"}} {hist.count}')
+                    lines.append(f'{name}_sum{{view="{view}"}} {hist.sum}')
+                    lines.append(f'{name}_count{{view="{view}"}} {hist.count}')
+
+            header('tutoring_request_duration_seconds', 'histogram', 'Request latency by view.')
+            histogram('tutoring_request_duration_seconds', 'latency')
+            header('tutoring_responses_total', 'counter', 'Responses by view and status class.')
+            for view, metrics in views:
+                for status_class, count in sorted(metrics.responses.items()):
+                    lines.append(f'tutoring_responses_total{{view="{view}",status="{status_class}"}} {count}')
+            header('tutoring_db_queries_per_request', 'histogram', 'SQL statements per request by view.')
+            histogram('tutoring_db_queries_per_request', 'queries')
+            header('tutoring_db_query_seconds_total', 'counter', 'Time spent in SQL by view.')
+            for view, metrics in views:
+                lines.append(f'tutoring_db_query_seconds_total{{view="{view}"}} {metrics.query_seconds}')
+            header('tutoring_template_render_seconds_total', 'counter', 'Time spent rendering templates by view.')
+            for view, metrics in views:
+                lines.append(f'tutoring_template_render_seconds_total{{view="{view}"}} {metrics.template_seconds}')
+            header('tutoring_template_renders_total', 'counter', 'Templates rendered by view.')
+            for view, metrics in views:
+                lines.append(f'tutoring_template_renders_total{{view="{view}"}} {metrics.templates}')
+            header('tutoring_slow_queries_total', 'counter',
+                   'Statements over METRICS_SLOW_QUERY_MS by fingerprint id (see the slow query log).')
+            for key, entry in slow:
+                lines.append(f'tutoring_slow_queries_total{{fingerprint="{key}"}} {entry["count"]}')
+            header('tutoring_slow_query_seconds_total', 'counter', 'Time spent in slow statements by fingerprint id.')
+            for key, entry in slow:
+                lines.append(f'tutoring_slow_query_seconds_total{{fingerprint="{key}"}} {entry["seconds"]}')
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """Counters of the request being handled, shared with the template backend"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.template_count = 0
+        self.template_seconds = 0.0
+
+    def add_query(self, seconds):
+        # Async views may run several of the request's queries at once
+        with self._lock:
+            self.query_count += 1
+            self.query_seconds += seconds
+
+
+_current = contextvars.ContextVar('tutoring_request_stats', default=None)
+
+
+def slow_query_threshold():
+    return getattr(settings, 'METRICS_SLOW_QUERY_MS', 100) / 1000
+
+
+def time_query(execute, sql, params, many, context):
+    """execute_wrapper adding the query to the current request's stats"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        stats.add_query(seconds)
+        if seconds >= slow_query_threshold():
+            sql_fingerprint = fingerprint(sql)
+            key = registry.record_slow_query(sql_fingerprint, seconds)
+            slow_query_logger.warning('slow query %s (%.1f ms): %s', key, seconds * 1000, sql_fingerprint)
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and template time of every request in the registry"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, seconds):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry.record_request(view, response.status_code, seconds, stats.query_count,
+                                stats.query_seconds, stats.template_count, stats.template_seconds)
+
+
+class TimedTemplate:
+    """Template wrapper adding render time to the current request's stats"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_count += 1
+            stats.template_seconds += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def install_query_timer(sender, connection, **kwargs):
+    # First in the list, so execute_wrapper() blocks that are open while the
+    # connection is established still pop their own wrapper
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def connect_signals():
+    connection_created.connect(install_query_timer, dispatch_uid='metrics_query_timer')
@@ -0,0 +1,36 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+
+def get_profile(user):
+    """The Student or Tutor profile of user, or None (anonymous, admin, missing)"""
+    if not user.is_authenticated:
+        return None
+    if user.role == 'student':
+        return getattr(user, 'student', None)
+    if user.role == 'tutor':
+        return getattr(user, 'tutor', None)
+    return None
+
+
+class ProfileMiddleware:
+    """Attach the logged-in user's profile as request.profile.
+
+    Resolved lazily on first access, from the select_related user loaded by
+    ProfileModelBackend. request.profile wraps None when there is no profile,
+    so test it with ``if not request.profile`` rather than ``is None``.
+    Must come after AuthenticationMiddleware. Async views have to resolve it
+    (and request.user) off the event loop, see views.async_login_required.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_profile(request.user))
+        return self.get_response(request)
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0002_alter_user_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySessionStats',
+            fields=[
+                ('month_year', models.CharField(max_length=7, primary_key=True, serialize=False)),
+                ('status', models.CharField(max_length=10)),
+                ('session_count', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'v_monthly_sessions',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentStatistics',
+            fields=[
+                ('student_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('student_name', models.CharField(max_length=100)),
+                ('total_sessions', models.IntegerField()),
+                ('pending_count', models.IntegerField()),
+                ('approved_count', models.IntegerField()),
+                ('completed_count', models.IntegerField()),
+                ('declined_count', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'v_student_statistics',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TutorStatistics',
+            fields=[
+                ('tutor_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('tutor_name', models.CharField(max_length=100)),
+                ('specialization', models.CharField(max_length=100)),
+                ('total_sessions', models.IntegerField()),
+                ('pending_count', models.IntegerField()),
+                ('approved_count', models.IntegerField()),
+                ('completed_count', models.IntegerField()),
+                ('declined_count', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'v_tutor_statistics',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SessionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('student', 'Student'), ('tutor', 'Tutor')], max_length=10)),
+                ('profile_id', models.IntegerField()),
+                ('total_sessions', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('declined_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'session_counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sessioncounter',
+            constraint=models.UniqueConstraint(fields=('role', 'profile_id'), name='uniq_session_counters_profile'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollup(apps, schema_editor):
+    # Existing sessions would otherwise be missing from every dashboard
+    # until backfill_monthly_rollup is run by hand. No archive table yet (0008)
+    from tutoring_app.rollups import backfill
+    backfill(
+        sources=[apps.get_model('tutoring_app', 'Session')],
+        rollup_model=apps.get_model('tutoring_app', 'SessionMonthlyRollup')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0003_sessioncounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('student', 'Student'), ('tutor', 'Tutor')], max_length=10)),
+                ('profile_id', models.IntegerField()),
+                ('month', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('declined', 'Declined'), ('completed', 'Completed')], max_length=10)),
+                ('session_count', models.IntegerField(default=0)),
+                ('subject', models.ForeignKey(db_column='subject_id', on_delete=django.db.models.deletion.CASCADE, to='tutoring_app.subject')),
+            ],
+            options={
+                'db_table': 'session_monthly_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sessionmonthlyrollup',
+            constraint=models.UniqueConstraint(fields=('role', 'profile_id', 'month', 'subject', 'status'), name='uniq_session_monthly_rollup_key'),
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
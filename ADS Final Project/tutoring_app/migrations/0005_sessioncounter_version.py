@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0004_sessionmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessioncounter',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
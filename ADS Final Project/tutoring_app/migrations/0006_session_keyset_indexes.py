@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0005_sessioncounter_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['student', 'session_date', 'session_time', 'session_id'], name='idx_sessions_student_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['tutor', 'session_date', 'session_time', 'session_id'], name='idx_sessions_tutor_keyset'),
+        ),
+    ]
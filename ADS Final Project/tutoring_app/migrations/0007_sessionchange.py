@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0006_session_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tutor_id', models.IntegerField()),
+                ('session_id', models.IntegerField()),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('status', 'Status changed'), ('deleted', 'Deleted')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('declined', 'Declined'), ('completed', 'Completed')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'session_changes',
+                'indexes': [models.Index(fields=['tutor_id', 'id'], name='idx_session_changes_tutor'), models.Index(fields=['created_at'], name='idx_session_changes_created')],
+            },
+        ),
+    ]
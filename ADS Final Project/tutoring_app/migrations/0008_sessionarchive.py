@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0007_sessionchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionArchive',
+            fields=[
+                ('session_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('session_date', models.DateField()),
+                ('session_time', models.TimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('declined', 'Declined'), ('completed', 'Completed')], max_length=10)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(db_column='student_id', on_delete=django.db.models.deletion.CASCADE, related_name='archived_sessions', to='tutoring_app.student')),
+                ('subject', models.ForeignKey(db_column='subject_id', on_delete=django.db.models.deletion.CASCADE, related_name='archived_sessions', to='tutoring_app.subject')),
+                ('tutor', models.ForeignKey(db_column='tutor_id', on_delete=django.db.models.deletion.CASCADE, related_name='archived_sessions', to='tutoring_app.tutor')),
+            ],
+            options={
+                'db_table': 'sessions_archive',
+                'indexes': [models.Index(fields=['student', 'session_date', 'session_time', 'session_id'], name='idx_archive_student_keyset'), models.Index(fields=['tutor', 'session_date', 'session_time', 'session_id'], name='idx_archive_tutor_keyset'), models.Index(fields=['session_date'], name='idx_archive_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+def add_fulltext_index(apps, schema_editor):
+    # FULLTEXT is MySQL-only; elsewhere search.py uses session_search_terms
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('CREATE FULLTEXT INDEX ft_session_search_document ON session_search (document)')
+
+
+def index_existing_sessions(apps, schema_editor):
+    # Otherwise search finds none of the existing sessions until
+    # rebuild_search_index is run by hand. Runs before the FULLTEXT index is
+    # added, which is faster than updating it row by row
+    from tutoring_app.search import rebuild_index
+    rebuild_index()
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX ft_session_search_document ON session_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring_app', '0008_sessionarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionSearchDocument',
+            fields=[
+                ('session_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('student_id', models.IntegerField()),
+                ('tutor_id', models.IntegerField()),
+                ('document', models.TextField()),
+            ],
+            options={
+                'db_table': 'session_search',
+            },
+        ),
+        migrations.CreateModel(
+            name='SessionSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('session_id', models.IntegerField()),
+                ('student_id', models.IntegerField()),
+                ('tutor_id', models.IntegerField()),
+                ('weight', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'session_search_terms',
+                'indexes': [models.Index(fields=['term', 'session_id'], name='idx_search_terms_term'), models.Index(fields=['student_id', 'term'], name='idx_search_terms_student'), models.Index(fields=['tutor_id', 'term'], name='idx_search_terms_tutor')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sessionsearchterm',
+            constraint=models.UniqueConstraint(fields=('session_id', 'term'), name='uniq_session_search_term'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionsearchdocument',
+            index=models.Index(fields=['student_id'], name='idx_session_search_student'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionsearchdocument',
+            index=models.Index(fields=['tutor_id'], name='idx_session_search_tutor'),
+        ),
+        migrations.RunPython(index_existing_sessions, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
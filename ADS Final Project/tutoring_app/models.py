@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinLengthValidator
+from .signals import session_status_changed, sessions_status_changed, session_deleted
 
 
 class User(AbstractUser):
@@ -73,6 +74,98 @@ class Subject(models.Model):
         return self.subject_name
 
 
+# Legal status changes: new status -> the status it must move from.
+# Same rules as sp_update_session_status.
+STATUS_TRANSITIONS = {
+    'approved': 'pending',
+    'declined': 'pending',
+    'completed': 'approved',
+}
+
+# Sessions in these statuses may be withdrawn (deleted) by the student
+WITHDRAWABLE_STATUSES = ('pending', 'declined')
+
+
+class SessionManager(models.Manager):
+    """Session manager with status transitions as conditional UPDATEs.
+
+    Each change is checked and applied by the database in one statement
+    (UPDATE ... WHERE status = <legal from-status>), so concurrent requests
+    can't both win, and only the status column is written. The session
+    lifecycle signals are sent for every change that is applied
+    (bulk_transition sends sessions_status_changed once for the batch).
+    """
+
+    def _from_status(self, to_status):
+        try:
+            return STATUS_TRANSITIONS[to_status]
+        except KeyError:
+            raise ValueError(f'No transition leads to status {to_status!r}')
+
+    def transition(self, session_id, to_status, **scope):
+        """Move one session to to_status if it is in the legal from-status.
+
+        scope narrows which sessions may be touched (e.g. tutor=tutor).
+        Returns the updated Session if this call made the change, else None
+        (not found, out of scope, or no longer in the from-status).
+        """
+        from_status = self._from_status(to_status)
+        with transaction.atomic(using=self.db):
+            won = self.filter(pk=session_id, status=from_status, **scope).update(status=to_status)
+            if not won:
+                return None
+            # Read back under the row lock the UPDATE holds; triggers may
+            # have adjusted the row (trg_auto_complete_past_sessions)
+            session = self.get(pk=session_id)
+            session_status_changed.send(sender=self.model, session=session, old_status=from_status)
+        return session
+
+    def bulk_transition(self, session_ids, to_status, **scope):
+        """Move the given sessions to to_status in one conditional UPDATE.
+
+        Returns {session_id: outcome} with outcome 'updated', 'wrong_status'
+        (exists in scope but not in the from-status) or 'not_found'.
+        Sends sessions_status_changed once with all the updated sessions.
+        """
+        from_status = self._from_status(to_status)
+        session_ids = set(session_ids)
+        outcomes = dict.fromkeys(session_ids, 'not_found')
+        with transaction.atomic(using=self.db):
+            # Lock the rows so the outcome of each id is exactly what the UPDATE did
+            found = list(self.select_for_update().filter(pk__in=session_ids, **scope).order_by('pk'))
+            movable = [session for session in found if session.status == from_status]
+            if movable:
+                self.filter(
+                    pk__in=[session.pk for session in movable], status=from_status
+                ).update(status=to_status)
+            for session in found:
+                outcomes[session.pk] = 'wrong_status'
+            # Read back, as in transition(): triggers may have adjusted the
+            # rows (trg_auto_complete_past_sessions), and the signals must
+            # carry the status actually stored
+            updated = list(self.filter(pk__in=[session.pk for session in movable]).order_by('pk')) if movable else []
+            for session in updated:
+                outcomes[session.pk] = 'updated'
+            if updated:
+                sessions_status_changed.send(sender=self.model, sessions=updated, old_status=from_status)
+        return outcomes
+
+    def withdraw(self, session_id, **scope):
+        """Delete a session that is still pending or declined.
+
+        Returns the deleted Session if this call deleted it, else None.
+        """
+        with transaction.atomic(using=self.db):
+            session = self.select_for_update().filter(
+                pk=session_id, status__in=WITHDRAWABLE_STATUSES, **scope
+            ).first()
+            if session is None:
+                return None
+            session.delete()
+            session_deleted.send(sender=self.model, session=session, session_id=session_id)
+        return session
+
+
 class Session(models.Model):
     """Tutoring session model"""
     STATUS_CHOICES = [
@@ -92,6 +185,8 @@ class Session(models.Model):
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = SessionManager()
+    
     class Meta:
         db_table = 'sessions'
         indexes = [
@@ -99,6 +194,11 @@ class Session(models.Model):
             models.Index(fields=['session_date']),
             models.Index(fields=['student', 'status']),
             models.Index(fields=['tutor', 'status']),
+            # Keyset pagination of the session log (see pagination.py)
+            models.Index(fields=['student', 'session_date', 'session_time', 'session_id'],
+                         name='idx_sessions_student_keyset'),
+            models.Index(fields=['tutor', 'session_date', 'session_time', 'session_id'],
+                         name='idx_sessions_tutor_keyset'),
         ]
         ordering = ['-created_at']
     
@@ -106,6 +206,190 @@ class Session(models.Model):
         return f"{self.student.full_name} - {self.subject.subject_name} - {self.session_date}"
 
 
+class SessionArchive(models.Model):
+    """Completed and declined sessions moved out of the sessions table.
+
+    Same columns and session ids as Session; filled in chunks by
+    ``manage.py archive_sessions`` once a session is older than
+    SESSION_ARCHIVE_AFTER_DAYS, so the sessions table and its indexes only
+    hold recent history. Archived sessions still count in session_counters
+    and session_monthly_rollup.
+    """
+    STATUS_CHOICES = Session.STATUS_CHOICES
+
+    # Archived rows are read-only history (templates hide their actions)
+    archived = True
+
+    session_id = models.IntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, db_column='student_id',
+                                related_name='archived_sessions')
+    tutor = models.ForeignKey(Tutor, on_delete=models.CASCADE, db_column='tutor_id',
+                              related_name='archived_sessions')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, db_column='subject_id',
+                                related_name='archived_sessions')
+    session_date = models.DateField()
+    session_time = models.TimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    notes = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sessions_archive'
+        indexes = [
+            # Keyset pagination of the session log, as on sessions
+            models.Index(fields=['student', 'session_date', 'session_time', 'session_id'],
+                         name='idx_archive_student_keyset'),
+            models.Index(fields=['tutor', 'session_date', 'session_time', 'session_id'],
+                         name='idx_archive_tutor_keyset'),
+            models.Index(fields=['session_date'], name='idx_archive_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.full_name} - {self.subject.subject_name} - {self.session_date} (archived)"
+
+
+class SessionCounter(models.Model):
+    """Per-student / per-tutor session counts, maintained as sessions change.
+
+    Replaces the GROUP BY in v_student_statistics / v_tutor_statistics for
+    single-profile reads. Rebuild with ``manage.py rebuild_session_counters``.
+    """
+    ROLE_CHOICES = [
+        ('student', 'Student'),
+        ('tutor', 'Tutor'),
+    ]
+
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    profile_id = models.IntegerField()
+    total_sessions = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    approved_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    declined_count = models.IntegerField(default=0)
+    # Bumped on every change; identifies the profile's session data (ETags)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'session_counters'
+        constraints = [
+            models.UniqueConstraint(fields=['role', 'profile_id'], name='uniq_session_counters_profile'),
+        ]
+
+    def __str__(self):
+        return f"{self.role} {self.profile_id}: {self.total_sessions} sessions"
+
+
+class SessionMonthlyRollup(models.Model):
+    """Session counts per profile, month, subject and status.
+
+    Kept current as sessions change so the dashboard charts read a few rows
+    instead of grouping the profile's whole history. Filled from the
+    existing sessions by migration 0004; rebuild with
+    ``manage.py backfill_monthly_rollup``.
+    """
+    role = models.CharField(max_length=10, choices=SessionCounter.ROLE_CHOICES)
+    profile_id = models.IntegerField()
+    month = models.DateField()  # first day of the month
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, db_column='subject_id')
+    status = models.CharField(max_length=10, choices=Session.STATUS_CHOICES)
+    session_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'session_monthly_rollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['role', 'profile_id', 'month', 'subject', 'status'],
+                name='uniq_session_monthly_rollup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.role} {self.profile_id} {self.month:%Y-%m} {self.status}: {self.session_count}"
+
+
+class SessionChange(models.Model):
+    """Append-only log of session changes, read by the live tutor request feed.
+
+    One row per created, status-changed or withdrawn session, written in the
+    same transaction as the change (see notifier.py). Rows older than
+    SESSION_CHANGE_RETENTION_SECONDS are pruned.
+    """
+    KIND_CHOICES = [
+        ('created', 'Created'),
+        ('status', 'Status changed'),
+        ('deleted', 'Deleted'),
+    ]
+
+    tutor_id = models.IntegerField()
+    session_id = models.IntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=Session.STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'session_changes'
+        indexes = [
+            models.Index(fields=['tutor_id', 'id'], name='idx_session_changes_tutor'),
+            models.Index(fields=['created_at'], name='idx_session_changes_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.id}: session {self.session_id} {self.kind} ({self.status})"
+
+
+class SessionSearchDocument(models.Model):
+    """Searchable text of one session: participant names, subject and notes.
+
+    Kept in sync by search.py. The row outlives archiving (session ids are
+    kept), so archived sessions stay searchable. On MySQL ``document`` has
+    a FULLTEXT index (migration 0009).
+    """
+    session_id = models.IntegerField(primary_key=True)
+    student_id = models.IntegerField()
+    tutor_id = models.IntegerField()
+    document = models.TextField()
+
+    class Meta:
+        db_table = 'session_search'
+        indexes = [
+            models.Index(fields=['student_id'], name='idx_session_search_student'),
+            models.Index(fields=['tutor_id'], name='idx_session_search_tutor'),
+        ]
+
+    def __str__(self):
+        return f"session {self.session_id}: {self.document[:50]}"
+
+
+class SessionSearchTerm(models.Model):
+    """Inverted index of session search documents, for databases without FULLTEXT.
+
+    One row per (session, term); weight adds up the field weights of the
+    term's occurrences (see search.FIELD_WEIGHTS). Prefix lookups on term
+    use the (term, ...) indexes, scoped by student or tutor when the
+    search is.
+    """
+    term = models.CharField(max_length=40)
+    session_id = models.IntegerField()
+    student_id = models.IntegerField()
+    tutor_id = models.IntegerField()
+    weight = models.IntegerField()
+
+    class Meta:
+        db_table = 'session_search_terms'
+        constraints = [
+            models.UniqueConstraint(fields=['session_id', 'term'], name='uniq_session_search_term'),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'session_id'], name='idx_search_terms_term'),
+            models.Index(fields=['student_id', 'term'], name='idx_search_terms_student'),
+            models.Index(fields=['tutor_id', 'term'], name='idx_search_terms_tutor'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> session {self.session_id} ({self.weight})"
+
+
 # ==============================================================================
 # SQL VIEW MODELS (Managed = False)
 # These models map directly to the SQL Views created in sql/advanced_features.sql
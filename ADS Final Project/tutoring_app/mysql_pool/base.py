@@ -0,0 +1,79 @@
+"""
+mysqlclient backend that takes its connections from a ConnectionPool.
+
+Django opens a connection at the start of a request and closes it at the end
+(CONN_MAX_AGE = 0). With this backend "close" hands the connection back to
+the process-wide pool of its alias and database name (so a test database
+gets its own pool). The next request, in any thread, reuses it without a
+new TCP/auth handshake, the sql_mode init_command or Django's
+per-connection SET statements.
+
+Configure it with ENGINE 'tutoring_app.mysql_pool' and an optional POOL
+dict next to OPTIONS: SIZE, MAX_OVERFLOW, TIMEOUT, RECYCLE and PING_AFTER
+(see pool.ConnectionPool).
+"""
+
+from django.db.backends.mysql.base import Database, DatabaseWrapper as MySQLDatabaseWrapper
+
+from .pool import PoolTimeout, get_pool
+
+
+POOL_DEFAULTS = {
+    'SIZE': 10,
+    'MAX_OVERFLOW': 10,
+    'TIMEOUT': 30.0,
+    'RECYCLE': 3600,
+    'PING_AFTER': 5.0,
+}
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+    _reused_connection = False
+
+    @property
+    def pool(self):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        return get_pool(
+            f'{self.alias}:{self.settings_dict["NAME"]}',
+            lambda: super(DatabaseWrapper, self).get_new_connection(self.get_connection_params()),
+            size=options['SIZE'], max_overflow=options['MAX_OVERFLOW'], timeout=options['TIMEOUT'],
+            recycle=options['RECYCLE'], ping_after=options['PING_AFTER'],
+        )
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection, self._reused_connection = self.pool.acquire()
+        except PoolTimeout as e:
+            raise Database.OperationalError(str(e)) from e
+        return connection
+
+    def _set_autocommit(self, autocommit):
+        # Reused connections are already in Django's autocommit mode; reading
+        # the flag is client-side, setting it is a round trip.
+        if self._reused_connection and self.connection.get_autocommit() == autocommit:
+            return
+        super()._set_autocommit(autocommit)
+
+    def init_connection_state(self):
+        # Session variables survive in the pooled connection
+        if not self._reused_connection:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        # Closed inside an atomic block, Django keeps self.connection for the
+        # rollback, so it can't go back to the pool.
+        discard = self.in_atomic_block
+        if not discard:
+            try:
+                if not connection.get_autocommit():
+                    connection.rollback()
+                    connection.autocommit(self.settings_dict['AUTOCOMMIT'])
+                if self.errors_occurred:
+                    connection.ping()
+            except Database.Error:
+                discard = True
+        self._reused_connection = False
+        self.pool.release(connection, discard=discard)
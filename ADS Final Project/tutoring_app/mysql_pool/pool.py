@@ -0,0 +1,218 @@
+"""
+A thread-safe pool of DB-API connections, one per database and process.
+
+Up to ``size`` idle connections are kept open; while all of them are
+checked out, up to ``max_overflow`` extra connections may be opened and are
+closed again when returned. Beyond that, acquire() waits up to ``timeout``
+seconds for a connection to come back and then raises PoolTimeout.
+
+Liveness is checked cheaply: a connection is pinged on checkout only if it
+sat idle for more than ``ping_after`` seconds, and connections older than
+``recycle`` seconds are replaced instead of reused.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from ..metrics import Histogram, registry
+
+
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, name, connect, size=10, max_overflow=10, timeout=30.0, recycle=3600, ping_after=5.0):
+        self.name = name
+        self.connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self._available = threading.Condition(threading.Lock())
+        # (connection, created_at, returned_at), most recently returned last
+        self._idle = deque()
+        self._created_at = {}
+        self.in_use = 0
+
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.counts = {'created': 0, 'reused': 0, 'discarded': 0, 'ping_failures': 0, 'timeouts': 0}
+
+    @property
+    def total(self):
+        return self.in_use + len(self._idle)
+
+    def acquire(self):
+        """A live connection and whether it was reused from the pool"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._available:
+            while not self._idle and self.total >= self.size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counts['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No connection available for {self.name!r} after {self.timeout}s '
+                        f'({self.in_use} in use, size {self.size} + overflow {self.max_overflow})'
+                    )
+                self._available.wait(remaining)
+            self.wait.observe(time.monotonic() - started)
+            entry = self._idle.pop() if self._idle else None
+            self.in_use += 1
+
+        if entry is not None:
+            conn, created_at, returned_at = entry
+            now = time.monotonic()
+            if now - created_at < self.recycle and (now - returned_at < self.ping_after or self._ping(conn)):
+                with self._available:
+                    self.counts['reused'] += 1
+                return conn, True
+            self._close(conn)
+
+        try:
+            conn = self.connect()
+        except BaseException:
+            self._forget_checkout()
+            raise
+        with self._available:
+            self._created_at[id(conn)] = time.monotonic()
+            self.counts['created'] += 1
+        return conn, False
+
+    def release(self, conn, discard=False):
+        """Return a checked-out connection; discard closes it instead"""
+        with self._available:
+            self.in_use -= 1
+            created_at = self._created_at.get(id(conn))
+            keep = not discard and created_at is not None and len(self._idle) < self.size
+            if keep:
+                self._idle.append((conn, created_at, time.monotonic()))
+            else:
+                self._created_at.pop(id(conn), None)
+            self._available.notify()
+        if not keep:
+            self._close(conn)
+
+    def _forget_checkout(self):
+        with self._available:
+            self.in_use -= 1
+            self._available.notify()
+
+    def _ping(self, conn):
+        try:
+            conn.ping()
+        except Exception:
+            with self._available:
+                self.counts['ping_failures'] += 1
+            return False
+        return True
+
+    def _close(self, conn):
+        with self._available:
+            self._created_at.pop(id(conn), None)
+            self.counts['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """Close every idle connection (checked-out ones are left alone)"""
+        with self._available:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._available:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'wait_count': self.wait.count,
+                'wait_seconds': self.wait.sum,
+                **self.counts,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, connect, **options):
+    """The pool called name, created with connect and options on first use"""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ConnectionPool(name, connect, **options)
+        return pool
+
+
+def all_pools():
+    with _pools_lock:
+        return list(_pools.values())
+
+
+_inherited = []
+
+
+def _forget_pools():
+    # A forked child must not use (or close, which would send COM_QUIT on the
+    # shared socket) its parent's connections, so keep them referenced and
+    # start from empty pools.
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pools)
+
+
+def metric_lines():
+    pools = sorted(all_pools(), key=lambda pool: pool.name)
+    lines = []
+    gauges = (
+        ('tutoring_db_pool_connections_in_use', 'in_use', 'Connections checked out of the pool.'),
+        ('tutoring_db_pool_connections_idle', 'idle', 'Open connections waiting in the pool.'),
+    )
+    counters = (
+        ('tutoring_db_pool_connections_created_total', 'created', 'Connections opened by the pool.'),
+        ('tutoring_db_pool_checkouts_reused_total', 'reused', 'Checkouts served by an idle connection.'),
+        ('tutoring_db_pool_connections_discarded_total', 'discarded',
+         'Connections closed: overflow, recycled, failed ping or unusable.'),
+        ('tutoring_db_pool_ping_failures_total', 'ping_failures', 'Idle connections that failed their ping.'),
+        ('tutoring_db_pool_timeouts_total', 'timeouts', 'Checkouts that gave up waiting.'),
+    )
+    stats = [(pool, pool.stats()) for pool in pools]
+    for kind, metrics in (('gauge', gauges), ('counter', counters)):
+        for name, key, text in metrics:
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for pool, values in stats:
+                lines.append(f'{name}{{pool="{pool.name}"}} {values[key]}')
+
+    name = 'tutoring_db_pool_wait_seconds'
+    lines.append(f'# HELP {name} Time spent waiting for a pooled connection.')
+    lines.append(f'# TYPE {name} histogram')
+    for pool in pools:
+        with pool._available:
+            buckets = list(pool.wait.cumulative())
+            count, total = pool.wait.count, pool.wait.sum
+        for bound, cumulative in buckets:
+            lines.append(f'{name}_bucket{{pool="{pool.name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{pool="{pool.name}",le="+Inf"}} {count}')
+        lines.append(f'{name}_sum{{pool="{pool.name}"}} {total}')
+        lines.append(f'{name}_count{{pool="{pool.name}"}} {count}')
+    return lines
+
+
+registry.add_collector(metric_lines)
@@ -0,0 +1,368 @@
+"""
+Live feed of session changes for tutors, served as server-sent events.
+
+Every session change is appended to the session_changes table in the same
+transaction (see the signal receivers below). Each process runs a single
+Notifier thread that, while any tutor is subscribed, reads the rows after
+the last one it has seen every SESSION_FEED_POLL_SECONDS - one small
+indexed query for the whole process, however many tutors are connected -
+loads the changed sessions once and hands the events to the subscribed
+tutors' queues.
+
+Ids are allocated when a row is inserted but the row only becomes visible
+when the writer commits, so a poll can see id N+1 before id N. Ids skipped
+that way are remembered as gaps and looked for again on the next polls
+for GAP_SECONDS (longer than any session write transaction), after which
+they are taken to belong to a rolled-back transaction.
+
+The notifier starts from the newest change when its thread starts, never
+from a client's id. Event ids are session_changes ids, so a client that
+reconnects (EventSource sends Last-Event-ID) or opens the feed with
+?since=<id> first catches up on what it missed with its own query, as long
+as it's within SESSION_CHANGE_RETENTION_SECONDS.
+
+Under WSGI an open feed holds a worker thread for as long as it lasts, so
+stream() ends after WSGI_STREAM_SECONDS; serve the feed through ASGI
+(astream) in production.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import Max, Q
+from django.utils import formats, timezone
+
+from .models import Session, SessionChange
+from .signals import session_created, session_status_changed, sessions_status_changed, session_deleted
+
+
+# Events a client may fall behind by before it's told to reload instead
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Most changes replayed to a reconnecting client, and read per poll
+CATCH_UP_LIMIT = 500
+
+# Comment line sent when nothing happened for this long, to keep proxies open
+HEARTBEAT_SECONDS = 15
+
+# A stream ends after this long and the browser reconnects, so a deploy
+# is never held indefinitely
+STREAM_SECONDS = 300
+
+# Shorter window for WSGI, where each open stream holds a worker thread
+WSGI_STREAM_SECONDS = 30
+
+# How often (seconds) the notifier deletes expired session_changes rows
+PRUNE_INTERVAL = 60
+
+# How long (seconds) a skipped session_changes id is waited for, and the
+# most skipped ids tracked at once
+GAP_SECONDS = 30
+MAX_GAPS = 1000
+
+
+def latest_change_id():
+    """Id of the newest session change (0 if none); feeds start after it"""
+    return SessionChange.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+
+def build_events(changes):
+    """Event dicts for SessionChange rows, with one query for their sessions"""
+    status_labels = dict(Session.STATUS_CHOICES)
+    session_ids = {change.session_id for change in changes if change.kind != 'deleted'}
+    sessions = Session.objects.select_related('student', 'subject').in_bulk(session_ids) if session_ids else {}
+
+    events = []
+    for change in changes:
+        event = {
+            'id': change.id,
+            'kind': change.kind,
+            'session_id': change.session_id,
+            'status': change.status,
+            'status_display': status_labels.get(change.status, change.status),
+        }
+        session = sessions.get(change.session_id)
+        if session is not None:
+            event.update({
+                'student_name': session.student.full_name,
+                'subject_name': session.subject.subject_name,
+                'session_date': formats.date_format(session.session_date),
+                'session_time': formats.time_format(session.session_time),
+                'notes': session.notes or '',
+                'sort_key': datetime.combine(session.session_date, session.session_time).isoformat(),
+            })
+        events.append(event)
+    return events
+
+
+def changes_since(tutor_id, since):
+    """(events after change id since for one tutor, complete?)"""
+    # since comes from the client: keep it within the ids that exist
+    since = min(max(since, 0), latest_change_id())
+    changes = list(
+        SessionChange.objects.filter(tutor_id=tutor_id, id__gt=since).order_by('id')[:CATCH_UP_LIMIT + 1]
+    )
+    return build_events(changes[:CATCH_UP_LIMIT]), len(changes) <= CATCH_UP_LIMIT
+
+
+def prune_changes():
+    """Delete session changes older than the retention window; returns the count"""
+    cutoff = timezone.now() - timedelta(seconds=settings.SESSION_CHANGE_RETENTION_SECONDS)
+    deleted, _ = SessionChange.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+class Subscription:
+    """Events for one connected tutor, filled by the notifier thread"""
+
+    def __init__(self, tutor_id):
+        self.tutor_id = tutor_id
+        self.overflowed = False
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next event, or None after timeout seconds"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription(Subscription):
+    """Subscription consumed from an event loop (ASGI)"""
+
+    def __init__(self, tutor_id):
+        super().__init__(tutor_id)
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.events.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Notifier:
+    """Per-process poller of session_changes, fanning events out to subscribers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._thread = None
+        self.last_id = None
+        # Skipped ids below last_id that may still commit: {id: first seen missing}
+        self._gaps = {}
+        self._pruned_at = 0.0
+
+    def subscribe(self, subscription):
+        """Start delivering to subscription; call before its catch-up query"""
+        with self._lock:
+            self._subscriptions.setdefault(subscription.tutor_id, set()).add(subscription)
+            if self._thread is not None:
+                return
+        # Read before the subscriber's catch-up query, so no change falls
+        # between the two. Outside the lock: other streams keep being served.
+        latest = latest_change_id()
+        with self._lock:
+            if self._thread is None:
+                self.last_id = latest
+                self._gaps = {}
+                self._thread = threading.Thread(target=self._run, name='session-notifier', daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.tutor_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.tutor_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscriptions:
+                        self._thread = None
+                        return
+                try:
+                    self.poll()
+                finally:
+                    close_old_connections()
+                time.sleep(settings.SESSION_FEED_POLL_SECONDS)
+        finally:
+            connections.close_all()
+
+    def poll(self):
+        """Read new changes and deliver them to the subscribed tutors"""
+        if self.last_id is None:
+            self.last_id = latest_change_id()
+        now = time.monotonic()
+        self._gaps = {change_id: missing_since for change_id, missing_since in self._gaps.items()
+                      if now - missing_since < GAP_SECONDS}
+
+        # New rows, and rows that were still uncommitted when their id was passed
+        condition = Q(id__gt=self.last_id)
+        if self._gaps:
+            condition |= Q(id__in=list(self._gaps))
+        changes = list(SessionChange.objects.filter(condition).order_by('id')[:CATCH_UP_LIMIT])
+        for change in changes:
+            if change.id in self._gaps:
+                del self._gaps[change.id]
+            elif change.id > self.last_id:
+                skipped = change.id - self.last_id - 1
+                if 0 < skipped and len(self._gaps) + skipped <= MAX_GAPS:
+                    self._gaps.update(dict.fromkeys(range(self.last_id + 1, change.id), now))
+                self.last_id = change.id
+
+        if changes:
+            with self._lock:
+                wanted = [change for change in changes if change.tutor_id in self._subscriptions]
+            for change, event in zip(wanted, build_events(wanted)):
+                with self._lock:
+                    subscriptions = list(self._subscriptions.get(change.tutor_id, ()))
+                for subscription in subscriptions:
+                    subscription.deliver(event)
+
+        if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+            self._pruned_at = time.monotonic()
+            prune_changes()
+
+
+notifier = Notifier()
+
+
+def _message(event):
+    return f'id: {event["id"]}\nevent: {event["kind"]}\ndata: {json.dumps(event)}\n\n'
+
+
+RESYNC = 'event: resync\ndata: {}\n\n'
+KEEPALIVE = ': keepalive\n\n'
+
+
+def stream(tutor_id, since=None):
+    """Server-sent event lines for a tutor (blocking iterator, for WSGI)"""
+    subscription = Subscription(tutor_id)
+    notifier.subscribe(subscription)
+    try:
+        yield 'retry: 3000\n\n'
+        # Late-committed changes can arrive out of id order, so remember what was sent
+        sent = set()
+        if since is not None:
+            events, complete = changes_since(tutor_id, since)
+            if not complete:
+                yield RESYNC
+                return
+            for event in events:
+                sent.add(event['id'])
+                yield _message(event)
+
+        deadline = time.monotonic() + WSGI_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            event = subscription.get(timeout=HEARTBEAT_SECONDS)
+            if subscription.overflowed:
+                yield RESYNC
+                return
+            if event is None:
+                yield KEEPALIVE
+            elif event['id'] not in sent:
+                sent.add(event['id'])
+                yield _message(event)
+    finally:
+        notifier.unsubscribe(subscription)
+
+
+async def astream(tutor_id, since=None):
+    """stream() for ASGI: waits on the event loop instead of holding a thread"""
+    subscription = AsyncSubscription(tutor_id)
+    # subscribe() may read the newest change id
+    await sync_to_async(notifier.subscribe)(subscription)
+    try:
+        yield 'retry: 3000\n\n'
+        # Late-committed changes can arrive out of id order, so remember what was sent
+        sent = set()
+        if since is not None:
+            events, complete = await sync_to_async(changes_since)(tutor_id, since)
+            if not complete:
+                yield RESYNC
+                return
+            for event in events:
+                sent.add(event['id'])
+                yield _message(event)
+
+        deadline = time.monotonic() + STREAM_SECONDS
+        while time.monotonic() < deadline:
+            event = await subscription.get(timeout=HEARTBEAT_SECONDS)
+            if subscription.overflowed:
+                yield RESYNC
+                return
+            if event is None:
+                yield KEEPALIVE
+            elif event['id'] not in sent:
+                sent.add(event['id'])
+                yield _message(event)
+    finally:
+        notifier.unsubscribe(subscription)
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def _record(session, kind):
+    SessionChange.objects.create(
+        tutor_id=session.tutor_id, session_id=session.session_id, kind=kind, status=session.status
+    )
+
+
+def on_session_created(sender, session, **kwargs):
+    _record(session, 'created')
+
+
+def on_session_status_changed(sender, session, old_status, **kwargs):
+    _record(session, 'status')
+
+
+def on_sessions_status_changed(sender, sessions, old_status, **kwargs):
+    SessionChange.objects.bulk_create([
+        SessionChange(tutor_id=session.tutor_id, session_id=session.session_id, kind='status', status=session.status)
+        for session in sessions
+    ])
+
+
+def on_session_deleted(sender, session, session_id, **kwargs):
+    SessionChange.objects.create(
+        tutor_id=session.tutor_id, session_id=session_id, kind='deleted', status=session.status
+    )
+
+
+def connect_signals():
+    session_created.connect(on_session_created, dispatch_uid='notifier_session_created')
+    session_status_changed.connect(on_session_status_changed, dispatch_uid='notifier_status_changed')
+    sessions_status_changed.connect(on_sessions_status_changed, dispatch_uid='notifier_bulk_status_changed')
+    session_deleted.connect(on_session_deleted, dispatch_uid='notifier_session_deleted')
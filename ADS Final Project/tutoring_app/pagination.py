@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination for session listings.
+
+Pages are ordered newest first by (session_date, session_time, session_id)
+and located with a WHERE on those columns instead of OFFSET, so page N
+costs the same as page 1 given the composite (student|tutor, session_date,
+session_time, session_id) indexes. Archived sessions keep their ids and the
+same indexes, so a page can also be merged from sessions and the archive.
+"""
+
+import base64
+from datetime import date, time
+
+from django.db.models import Q
+
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(session_date, session_time, session_id):
+    raw = f'{session_date.isoformat()}|{session_time.isoformat()}|{session_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(session_date, session_time, session_id) from a cursor, or None if invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw_date, raw_time, raw_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return date.fromisoformat(raw_date), time.fromisoformat(raw_time), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def older_than(key):
+    session_date, session_time, session_id = key
+    return (
+        Q(session_date__lt=session_date)
+        | Q(session_date=session_date, session_time__lt=session_time)
+        | Q(session_date=session_date, session_time=session_time, session_id__lt=session_id)
+    )
+
+
+def newer_than(key):
+    session_date, session_time, session_id = key
+    return (
+        Q(session_date__gt=session_date)
+        | Q(session_date=session_date, session_time__gt=session_time)
+        | Q(session_date=session_date, session_time=session_time, session_id__gt=session_id)
+    )
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    @property
+    def next_cursor(self):
+        if not (self.has_next and self.object_list):
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.session_date, last.session_time, last.session_id)
+
+    @property
+    def previous_cursor(self):
+        if not (self.has_previous and self.object_list):
+            return None
+        first = self.object_list[0]
+        return encode_cursor(first.session_date, first.session_time, first.session_id)
+
+
+def _sort_key(session):
+    return session.session_date, session.session_time, session.session_id
+
+
+def _first_rows(querysets, condition, ordering, limit):
+    """The first limit rows, in ordering, of the querysets taken together"""
+    rows = []
+    for queryset in querysets:
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        rows.extend(queryset.order_by(*ordering)[:limit])
+    rows.sort(key=_sort_key, reverse=ordering[0].startswith('-'))
+    return rows[:limit]
+
+
+def paginate_sessions(queryset, after=None, before=None, page_size=PAGE_SIZE, archived=None):
+    """Return the KeysetPage of queryset after/before the given cursor.
+
+    after: cursor of the last row of the previous (newer) page -> older rows.
+    before: cursor of the first row of the next (older) page -> newer rows.
+    With neither (or an invalid cursor) the newest page is returned.
+    archived: optional SessionArchive queryset whose rows are merged in.
+    """
+    newest_first = ('-session_date', '-session_time', '-session_id')
+    oldest_first = ('session_date', 'session_time', 'session_id')
+    querysets = [queryset] if archived is None else [queryset, archived]
+
+    before_key = decode_cursor(before) if before else None
+    if before_key:
+        rows = _first_rows(querysets, newer_than(before_key), oldest_first, page_size + 1)
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size]
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=has_previous)
+
+    after_key = decode_cursor(after) if after else None
+    condition = older_than(after_key) if after_key else None
+    rows = _first_rows(querysets, condition, newest_first, page_size + 1)
+    return KeysetPage(rows[:page_size], has_next=len(rows) > page_size, has_previous=after_key is not None)
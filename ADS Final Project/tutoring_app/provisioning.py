@@ -0,0 +1,118 @@
+"""
+Bulk account provisioning.
+
+Creating users one at a time with create_user() spends almost all of its
+time in the password hasher (PBKDF2 by default). provision_accounts() does
+the work in three stages instead:
+
+1. hash: every distinct password is hashed once, across a process pool.
+   Accounts that share a password share the hash (and salt), which is fine
+   for generated/demo data but means equal passwords are visible as equal
+   hashes;
+2. users: User rows are inserted with bulk_create in batches;
+3. profiles: the Student/Tutor rows are inserted the same way.
+
+Each stage reports its count, time and rate in the returned stats.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import User, Student, Tutor
+
+
+PROVISION_BATCH_SIZE = 1000
+
+# Optional User fields accepted in account dicts besides the required ones
+USER_EXTRA_FIELDS = ('first_name', 'last_name', 'date_joined', 'is_staff', 'is_superuser')
+
+
+def setup_django_worker(settings_module):
+    """Set Django up in pool workers started with 'spawn' (no-op after fork)"""
+    if not settings.configured:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """{password: hash} for the distinct passwords, hashed in parallel"""
+    distinct = sorted(set(passwords))
+    if workers == 1 or len(distinct) <= 1:
+        return {password: make_password(password) for password in distinct}
+
+    settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'tutoring_system.settings')
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_django_worker,
+                             initargs=(settings_module,)) as pool:
+        return dict(zip(distinct, pool.map(make_password, distinct)))
+
+
+def _stage(stats, name, count, seconds):
+    stats[name] = {
+        'count': count,
+        'seconds': seconds,
+        'per_second': count / seconds if seconds else 0.0,
+    }
+
+
+def provision_accounts(accounts, batch_size=PROVISION_BATCH_SIZE, workers=None, progress=None):
+    """Create users and their student/tutor profiles in bulk.
+
+    accounts: iterable of dicts with email, username, password, role
+    ('student' or 'tutor'), full_name and, for tutors, specialization; plus
+    any of USER_EXTRA_FIELDS. progress, if given, is called as
+    progress(stage, done, total). Returns per-stage stats
+    ({'hash': {...}, 'users': {...}, 'profiles': {...}}).
+    """
+    accounts = list(accounts)
+    stats = {}
+
+    started = time.perf_counter()
+    hashes = hash_passwords([account['password'] for account in accounts], workers=workers)
+    _stage(stats, 'hash', len(hashes), time.perf_counter() - started)
+    if progress:
+        progress('hash', len(hashes), len(hashes))
+
+    users_started = time.perf_counter()
+    profiles_seconds = 0.0
+    for offset in range(0, len(accounts), batch_size):
+        batch = accounts[offset:offset + batch_size]
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    email=account['email'],
+                    username=account['username'],
+                    password=hashes[account['password']],
+                    role=account['role'],
+                    **{field: account[field] for field in USER_EXTRA_FIELDS if field in account}
+                )
+                for account in batch
+            ])
+            # MySQL's bulk insert doesn't return primary keys, so read them back
+            user_ids = dict(User.objects.filter(
+                email__in=[account['email'] for account in batch]
+            ).values_list('email', 'id'))
+
+            profiles_started = time.perf_counter()
+            Student.objects.bulk_create([
+                Student(user_id=user_ids[account['email']], full_name=account['full_name'])
+                for account in batch if account['role'] == 'student'
+            ])
+            Tutor.objects.bulk_create([
+                Tutor(user_id=user_ids[account['email']], full_name=account['full_name'],
+                      specialization=account.get('specialization'))
+                for account in batch if account['role'] == 'tutor'
+            ])
+            profiles_seconds += time.perf_counter() - profiles_started
+        if progress:
+            progress('users', offset + len(batch), len(accounts))
+
+    users_seconds = time.perf_counter() - users_started - profiles_seconds
+    _stage(stats, 'users', len(accounts), users_seconds)
+    _stage(stats, 'profiles', len(accounts), profiles_seconds)
+    return stats
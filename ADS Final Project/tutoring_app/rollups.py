@@ -0,0 +1,169 @@
+"""
+Monthly session rollup (table ``session_monthly_rollup``).
+
+One row per (role, profile_id, month, subject, status) with a session count.
+The dashboard charts and the v_monthly_sessions view read this table, so
+their cost depends on the number of months/subjects a profile has, not on
+the number of sessions.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min
+from django.db.models.functions import TruncMonth
+
+from .models import Session, SessionArchive, SessionMonthlyRollup
+from .signals import session_created, session_status_changed, sessions_status_changed, session_deleted
+
+
+def _keys(session, status):
+    month = session.session_date.replace(day=1)
+    return [
+        dict(role='student', profile_id=session.student_id, month=month,
+             subject_id=session.subject_id, status=status),
+        dict(role='tutor', profile_id=session.tutor_id, month=month,
+             subject_id=session.subject_id, status=status),
+    ]
+
+
+def compute_count(key):
+    """Count the sessions of one rollup row straight from sessions and the archive"""
+    next_month = (key['month'] + timedelta(days=31)).replace(day=1)
+    return sum(
+        model.objects.filter(
+            **{f"{key['role']}_id": key['profile_id']},
+            subject_id=key['subject_id'], status=key['status'],
+            session_date__gte=key['month'], session_date__lt=next_month
+        ).count()
+        for model in (Session, SessionArchive)
+    )
+
+
+def _add(key, delta):
+    """Add delta to one rollup row, creating it if missing"""
+    if SessionMonthlyRollup.objects.filter(**key).update(session_count=F('session_count') + delta):
+        return
+    # No row yet: count it from scratch (the change is already in the
+    # sessions table), so a decrement can't leave a negative row behind
+    try:
+        with transaction.atomic():
+            SessionMonthlyRollup.objects.create(session_count=compute_count(key), **key)
+    except IntegrityError:
+        # Created concurrently - apply the increment to that row instead
+        SessionMonthlyRollup.objects.filter(**key).update(session_count=F('session_count') + delta)
+
+
+def record_created(session):
+    for key in _keys(session, session.status):
+        _add(key, 1)
+
+
+def record_status_change(session, old_status):
+    if old_status == session.status:
+        return
+    for key in _keys(session, old_status):
+        _add(key, -1)
+    for key in _keys(session, session.status):
+        _add(key, 1)
+
+
+def record_status_changes(sessions, old_status):
+    """record_status_change() for many sessions: one UPDATE per rollup row touched"""
+    totals = Counter()
+    for session in sessions:
+        if old_status == session.status:
+            continue
+        for key in _keys(session, old_status):
+            totals[tuple(key.items())] -= 1
+        for key in _keys(session, session.status):
+            totals[tuple(key.items())] += 1
+    # In key order, so concurrent batches lock the rollup rows in the same order
+    for key, delta in sorted(totals.items()):
+        if delta:
+            _add(dict(key), delta)
+
+
+def record_deleted(session):
+    for key in _keys(session, session.status):
+        _add(key, -1)
+
+
+def _add_chunk_totals(model, totals, chunk_size, progress):
+    """Group model's rows chunk by chunk into totals ({rollup key: count})"""
+    bounds = model.objects.aggregate(low=Min('session_id'), high=Max('session_id'))
+    if bounds['low'] is None:
+        return
+
+    start = bounds['low']
+    while start <= bounds['high']:
+        end = start + chunk_size
+        chunk = model.objects.filter(session_id__gte=start, session_id__lt=end).order_by()
+        for role in ('student', 'tutor'):
+            rows = chunk.annotate(month=TruncMonth('session_date')).values(
+                f'{role}_id', 'month', 'subject_id', 'status'
+            ).annotate(count=Count('session_id'))
+            for row in rows:
+                key = (role, row[f'{role}_id'], row['month'], row['subject_id'], row['status'])
+                totals[key] = totals.get(key, 0) + row['count']
+        if progress:
+            progress(min(end - 1, bounds['high']), bounds['high'])
+        start = end
+
+
+def backfill(chunk_size=50000, progress=None, sources=(Session, SessionArchive), rollup_model=SessionMonthlyRollup):
+    """Rebuild the rollup from sessions and the archive in primary-key chunks.
+
+    Each chunk is grouped in the database and merged into an in-memory
+    total, so no single query scans the whole history. The table is then
+    replaced. Returns the number of rollup rows written.
+    sources / rollup_model: the models to read and write (migrations pass
+    their historical models).
+
+    Everything runs in one transaction that first locks every rollup row
+    (on InnoDB also the gaps between them, so no row can be inserted).
+    A session change made meanwhile waits in its _add() until the rebuilt
+    rows are committed and then applies its delta to them, rather than
+    being overwritten by totals counted before it. Session writes
+    therefore pause for the whole run.
+    """
+    with transaction.atomic():
+        list(rollup_model.objects.select_for_update().values_list('pk', flat=True))
+        totals = {}
+        for model in sources:
+            _add_chunk_totals(model, totals, chunk_size, progress)
+
+        rollups = [
+            rollup_model(role=role, profile_id=profile_id, month=month,
+                         subject_id=subject_id, status=status, session_count=count)
+            for (role, profile_id, month, subject_id, status), count in totals.items()
+        ]
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+# Signal receivers - connected in TutoringAppConfig.ready()
+
+def on_session_created(sender, session, **kwargs):
+    record_created(session)
+
+
+def on_session_status_changed(sender, session, old_status, **kwargs):
+    record_status_change(session, old_status)
+
+
+def on_sessions_status_changed(sender, sessions, old_status, **kwargs):
+    record_status_changes(sessions, old_status)
+
+
+def on_session_deleted(sender, session, **kwargs):
+    record_deleted(session)
+
+
+def connect_signals():
+    session_created.connect(on_session_created, dispatch_uid='rollups_session_created')
+    session_status_changed.connect(on_session_status_changed, dispatch_uid='rollups_status_changed')
+    sessions_status_changed.connect(on_sessions_status_changed, dispatch_uid='rollups_bulk_status_changed')
+    session_deleted.connect(on_session_deleted, dispatch_uid='rollups_session_deleted')
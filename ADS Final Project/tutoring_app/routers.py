@@ -0,0 +1,168 @@
+"""
+Read/write routing between the primary ('default') and read replicas.
+
+Writes always go to the primary, and so do reads unless they are known to
+tolerate replication lag:
+
+- the statistics view models (TutorStatistics, StudentStatistics,
+  MonthlySessionStats), always;
+- anything read inside ``replica_reads()`` (a context manager that also
+  works as a decorator): the session log, the export and the dashboard
+  aggregations.
+
+Even those stay on the primary inside a transaction, inside
+``primary_reads()``, and for READ_YOUR_WRITES_SECONDS after the user's
+last write: ReplicaPinningMiddleware sets a short-lived cookie on every
+response to a request that wrote (or was POST/PUT/PATCH/DELETE), so users
+always see their own changes.
+
+Replicas are the aliases listed in settings.REPLICA_DATABASES; with none
+configured everything goes to the primary.
+"""
+
+import contextvars
+import random
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+
+PRIMARY = 'default'
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+REPLICA_MODELS = {
+    'tutoring_app.tutorstatistics',
+    'tutoring_app.studentstatistics',
+    'tutoring_app.monthlysessionstats',
+}
+
+
+class RoutingState:
+    """Per-request routing flags, set up by ReplicaPinningMiddleware"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        # One replica per request, so its reads see a single point in time
+        self.replica = None
+        self.lock = threading.Lock()
+
+
+_state = contextvars.ContextVar('routing_state', default=None)
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_primary_reads = contextvars.ContextVar('primary_reads', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+@contextmanager
+def replica_reads():
+    """Let reads in this block go to a replica (unless pinned to the primary)"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Force every read in this block to the primary"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def _use_replica(model):
+    if _primary_reads.get():
+        return False
+    state = _state.get()
+    if state is not None and (state.pinned or state.wrote):
+        return False
+    if not (_replica_reads.get() or model._meta.label_lower in REPLICA_MODELS):
+        return False
+    return not connections[PRIMARY].in_atomic_block
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replica_aliases()
+        if not aliases or not _use_replica(model):
+            return PRIMARY
+        state = _state.get()
+        if state is None:
+            return random.choice(aliases)
+        # Async views may route several of the request's queries at once
+        with state.lock:
+            if state.replica is None:
+                state.replica = random.choice(aliases)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        databases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Keep a user's reads on the primary for a while after they write.
+
+    Must come before SessionMiddleware, so that session writes count too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, response, state)
+
+    def pin(self, request, response, state):
+        if replica_aliases() and (state.wrote or request.method not in SAFE_METHODS):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
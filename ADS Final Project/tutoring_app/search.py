@@ -0,0 +1,306 @@
+"""
+Ranked search over session notes, participant names and subjects.
+
+Every session (live or archived - archiving keeps session ids) has one
+session_search row whose document holds the student's and tutor's names,
+the subject and the notes. A FULLTEXT index can't span the joins the old
+icontains search did, hence the denormalized copy. It is kept in sync:
+
+- on create (session_created) and delete (session_deleted), in the same
+  transaction as the write;
+- on edits made through the admin (SessionAdmin.save_model);
+- when a student, tutor or subject is renamed (pre_save/post_save on
+  those models reindex their sessions);
+- in bulk by ``manage.py rebuild_search_index``, which the bulk loaders
+  (generate_synthetic_data, load_sql_data) run for rows they insert
+  without signals.
+
+Queries match sessions containing every query word as a word prefix and
+are ranked by relevance, names weighing more than the subject and the
+subject more than notes (FIELD_WEIGHTS). Two backends
+(SESSION_SEARCH_BACKEND):
+
+- 'fulltext' (MySQL): MATCH ... AGAINST in boolean mode on the FULLTEXT
+  index of session_search.document. Field weights are applied by repeating
+  the heavier fields in the document;
+- 'inverted': session_search_terms holds one (term, session, weight) row
+  per distinct word of a document; a query is a range scan of the term
+  index per word and a GROUP BY session.
+
+'auto' picks 'fulltext' on MySQL and 'inverted' elsewhere. Only the active
+backend's rows are written, so rebuild the index after switching.
+"""
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Max, Q, Sum, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, pre_save
+
+from .models import Session, SessionArchive, SessionSearchDocument, SessionSearchTerm, Student, Subject, Tutor
+from .signals import session_created, session_deleted
+
+
+# Relevance of a word by the field it appears in
+FIELD_WEIGHTS = {'student': 3, 'tutor': 3, 'subject': 2, 'notes': 1}
+
+# Where those fields come from in a Session/SessionArchive .values() row
+SOURCE_FIELDS = {
+    'student': 'student__full_name',
+    'tutor': 'tutor__full_name',
+    'subject': 'subject__subject_name',
+    'notes': 'notes',
+}
+
+_WORD = re.compile(r'\w+')
+
+MAX_TERM_LENGTH = SessionSearchTerm._meta.get_field('term').max_length
+
+# InnoDB leaves words shorter than innodb_ft_min_token_size (default 3) out
+# of FULLTEXT indexes, so whole query words that short could never match
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+# Words of a query beyond this are ignored
+MAX_QUERY_TERMS = 8
+
+
+def tokenize(text):
+    """Lowercased words of text, as indexed and as searched"""
+    return [word[:MAX_TERM_LENGTH] for word in _WORD.findall((text or '').lower())]
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def backend():
+    """'fulltext' or 'inverted', per SESSION_SEARCH_BACKEND"""
+    configured = settings.SESSION_SEARCH_BACKEND
+    if configured == 'auto':
+        return 'fulltext' if connection.vendor == 'mysql' else 'inverted'
+    if configured == 'fulltext' and connection.vendor != 'mysql':
+        raise ImproperlyConfigured('SESSION_SEARCH_BACKEND = "fulltext" needs MySQL')
+    if configured not in ('fulltext', 'inverted'):
+        raise ImproperlyConfigured(f'Unknown SESSION_SEARCH_BACKEND "{configured}"')
+    return configured
+
+
+# ------------------------------------------------------------------------------
+# Indexing
+# ------------------------------------------------------------------------------
+
+def _session_row(session):
+    return {
+        'session_id': session.session_id,
+        'student_id': session.student_id,
+        'tutor_id': session.tutor_id,
+        'student': session.student.full_name,
+        'tutor': session.tutor.full_name,
+        'subject': session.subject.subject_name,
+        'notes': session.notes,
+    }
+
+
+def _write(rows):
+    """Replace the index entries of rows (dicts as built by _session_row)"""
+    inverted = backend() == 'inverted'
+    documents, terms = [], []
+    for row in rows:
+        parts, weights = [], Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            text = row[field] or ''
+            if text:
+                parts.extend([text] * weight)
+            for term in tokenize(text):
+                weights[term] += weight
+        documents.append(SessionSearchDocument(
+            session_id=row['session_id'], student_id=row['student_id'], tutor_id=row['tutor_id'],
+            document='\n'.join(parts)
+        ))
+        if inverted:
+            terms.extend(
+                SessionSearchTerm(term=term, session_id=row['session_id'], student_id=row['student_id'],
+                                  tutor_id=row['tutor_id'], weight=weight)
+                for term, weight in weights.items()
+            )
+
+    session_ids = [document.session_id for document in documents]
+    with transaction.atomic():
+        remove(session_ids)
+        SessionSearchDocument.objects.bulk_create(documents, batch_size=1000)
+        SessionSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def index_session(session):
+    """(Re)index one Session or SessionArchive"""
+    _write([_session_row(session)])
+
+
+def remove(session_ids):
+    SessionSearchDocument.objects.filter(session_id__in=session_ids).delete()
+    SessionSearchTerm.objects.filter(session_id__in=session_ids).delete()
+
+
+def index_sessions(queryset, chunk_size=1000, progress=None):
+    """Reindex the sessions of a Session or SessionArchive queryset in primary-key chunks.
+
+    Returns the number of sessions indexed.
+    progress: called as progress(done_id, indexed) after each chunk.
+    """
+    fields = ['session_id', 'student_id', 'tutor_id', *SOURCE_FIELDS.values()]
+    indexed, last_id = 0, None
+    while True:
+        chunk = queryset.order_by('session_id')
+        if last_id is not None:
+            chunk = chunk.filter(session_id__gt=last_id)
+        values = list(chunk.values(*fields)[:chunk_size])
+        if not values:
+            return indexed
+        _write([
+            {**{key: value[key] for key in ('session_id', 'student_id', 'tutor_id')},
+             **{field: value[source] for field, source in SOURCE_FIELDS.items()}}
+            for value in values
+        ])
+        indexed += len(values)
+        last_id = values[-1]['session_id']
+        if progress:
+            progress(last_id, indexed)
+
+
+def rebuild_index(chunk_size=1000, progress=None):
+    """Reindex every session and drop entries of sessions that no longer exist.
+
+    Chunks are replaced one at a time, so search keeps working meanwhile.
+    Returns (indexed, removed).
+    """
+    indexed = sum(index_sessions(model.objects.all(), chunk_size, progress)
+                  for model in (Session, SessionArchive))
+    orphan_ids = list(SessionSearchDocument.objects.exclude(
+        session_id__in=Session.objects.values('session_id')
+    ).exclude(
+        session_id__in=SessionArchive.objects.values('session_id')
+    ).values_list('session_id', flat=True))
+    for start in range(0, len(orphan_ids), chunk_size):
+        remove(orphan_ids[start:start + chunk_size])
+    if backend() != 'inverted':
+        # Left over from running with the other backend
+        SessionSearchTerm.objects.all().delete()
+    return indexed, len(orphan_ids)
+
+
+# ------------------------------------------------------------------------------
+# Searching
+# ------------------------------------------------------------------------------
+
+def _next_prefix(term):
+    """Smallest string greater than every string starting with term"""
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def search(query, student_id=None, tutor_id=None, limit=None):
+    """[(session_id, score)] of the sessions matching every word of query, best first.
+
+    student_id / tutor_id restrict the search to one participant's sessions.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    limit = limit or settings.SESSION_SEARCH_MAX_RESULTS
+    scope = {key: value for key, value in (('student_id', student_id), ('tutor_id', tutor_id))
+             if value is not None}
+
+    if backend() == 'fulltext':
+        terms = [term for term in terms if len(term) >= FULLTEXT_MIN_TOKEN_SIZE]
+        if not terms:
+            return []
+        # Every word required (+), as a prefix (*); the WHERE uses the FULLTEXT index
+        boolean = ' '.join(f'+{term}*' for term in terms)
+        ranked = SessionSearchDocument.objects.filter(**scope).annotate(score=RawSQL(
+            'MATCH (`session_search`.`document`) AGAINST (%s IN BOOLEAN MODE)', (boolean,),
+            output_field=FloatField()
+        )).filter(score__gt=0)
+    else:
+        # A range rather than LIKE 'term%', which SQLite won't run on the index
+        prefixes = [Q(term__gte=term, term__lt=_next_prefix(term)) for term in terms]
+        matched = Q()
+        for prefix in prefixes:
+            matched |= prefix
+        has_terms = {f'has_{number}': Max(Case(When(prefix, then=1), default=0))
+                     for number, prefix in enumerate(prefixes)}
+        ranked = SessionSearchTerm.objects.filter(matched, **scope).values('session_id').annotate(
+            score=Sum('weight'), **has_terms
+        ).filter(**{name: 1 for name in has_terms})
+
+    ranked = ranked.order_by('-score', '-session_id').values_list('session_id', 'score')[:limit]
+    return list(ranked)
+
+
+def scope_ids(scope):
+    """search() keyword arguments for a session filter scope like {'student': profile}"""
+    return {f'{field}_id': getattr(value, 'pk', value) for field, value in scope.items()}
+
+
+def ranked_sessions(query, querysets, scope=None, limit=None):
+    """Sessions of querysets (Session / SessionArchive) matching query, best first.
+
+    The querysets carry the other filters; they are applied to the top
+    SESSION_SEARCH_MAX_RESULTS matches, so a very broad query combined with
+    narrow filters can miss older matches.
+    """
+    ranked = search(query, **scope_ids(scope or {}))
+    session_ids = [session_id for session_id, _ in ranked]
+    found = {}
+    for queryset in querysets:
+        found.update(queryset.in_bulk(session_ids))
+    sessions = [found[session_id] for session_id in session_ids if session_id in found]
+    return sessions[:limit] if limit else sessions
+
+
+# ------------------------------------------------------------------------------
+# Signal receivers - connected in TutoringAppConfig.ready()
+# ------------------------------------------------------------------------------
+
+def on_session_created(sender, session, **kwargs):
+    index_session(session)
+
+
+def on_session_deleted(sender, session_id, **kwargs):
+    remove([session_id])
+
+
+# Models whose renames reindex their sessions: (Session field, indexed name field)
+RENAMED_FIELDS = {
+    Student: ('student', 'full_name'),
+    Tutor: ('tutor', 'full_name'),
+    Subject: ('subject', 'subject_name'),
+}
+
+
+def on_name_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    _, field = RENAMED_FIELDS[sender]
+    instance._search_old_name = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def on_name_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    related, field = RENAMED_FIELDS[sender]
+    old_name = getattr(instance, '_search_old_name', None)
+    if old_name is None or old_name == getattr(instance, field):
+        return
+    for model in (Session, SessionArchive):
+        index_sessions(model.objects.filter(**{related: instance}))
+
+
+def connect_signals():
+    session_created.connect(on_session_created, dispatch_uid='search_session_created')
+    session_deleted.connect(on_session_deleted, dispatch_uid='search_session_deleted')
+    for model in RENAMED_FIELDS:
+        pre_save.connect(on_name_saving, sender=model, dispatch_uid=f'search_{model.__name__}_saving')
+        post_save.connect(on_name_saved, sender=model, dispatch_uid=f'search_{model.__name__}_saved')
@@ -0,0 +1,24 @@
+"""
+Session lifecycle signals.
+
+Views send these explicitly whenever a Session is created, changes status
+or is deleted, so derived data (counters, caches, ...) can be kept current
+inside the same transaction as the write.
+"""
+
+from django.dispatch import Signal
+
+# Sent after a new Session row is inserted. Args: session
+session_created = Signal()
+
+# Sent after a Session's status column changes. Args: session, old_status
+session_status_changed = Signal()
+
+# Sent once by SessionManager.bulk_transition for all the sessions it moved
+# out of old_status, so receivers can apply the changes in bulk instead of
+# per row. Args: sessions, old_status
+sessions_status_changed = Signal()
+
+# Sent after a Session row is deleted. Args: session, session_id (the
+# primary key the row had - Django clears session.session_id on delete)
+session_deleted = Signal()
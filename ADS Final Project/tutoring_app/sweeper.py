@@ -0,0 +1,157 @@
+"""
+Session lifecycle sweeper.
+
+trg_auto_complete_past_sessions only completes an approved past session
+when something else updates that row, so stale 'approved' rows pile up and
+inflate approved counts and upcoming lists. sweep() walks the sessions
+table in primary-key chunks and, one short transaction per chunk:
+
+- completes approved sessions dated before today;
+- expires pending sessions dated before today. There is no 'expired'
+  status, so expiry uses the existing pending -> declined transition.
+
+Changes go through SessionManager.bulk_transition, so only rows still in
+the expected status are touched. It sends one sessions_status_changed
+signal per chunk, and the counters, rollup, change feed and booking index
+apply the whole chunk at once (one UPDATE per counter or rollup row
+touched, one INSERT of change rows) instead of a handful of statements
+per session. Chunks are small (CHUNK_SIZE ids), so each transaction and
+the counter/rollup row locks it takes stay short. Safe to run alongside
+live traffic.
+
+Every run that changes rows (not dry runs) is recorded in the metrics
+registry: runs, sessions completed, expired and skipped, chunks and run
+duration. Metrics live in process memory, so sweeps run by the
+sweep_sessions command show up in that process only; its --metrics-file
+option writes them out for a textfile collector.
+"""
+
+import threading
+import time
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .metrics import Histogram, registry
+from .models import Session
+
+
+# (status swept, status it moves to, stats key)
+SWEEPS = [
+    ('approved', 'completed', 'completed'),
+    ('pending', 'declined', 'expired'),
+]
+
+# Session ids per chunk (one transaction per sweep and chunk)
+CHUNK_SIZE = 500
+
+DURATION_BUCKETS = (1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+class SweepMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.chunks = 0
+        self.sessions = {'completed': 0, 'expired': 0, 'skipped': 0}
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.last_run = 0.0
+
+    def record(self, stats):
+        with self._lock:
+            self.runs += 1
+            self.chunks += stats['chunks']
+            for outcome in self.sessions:
+                self.sessions[outcome] += stats[outcome]
+            self.duration.observe(stats['seconds'])
+            self.last_run = time.time()
+
+
+sweep_metrics = SweepMetrics()
+
+
+def sweep(chunk_size=CHUNK_SIZE, pause=0.0, progress=None, dry_run=False):
+    """Apply the lifecycle sweeps over the whole table; returns the stats dict.
+
+    pause: seconds to sleep between chunks, to leave room for live traffic.
+    progress: called as progress(done_id, last_id, stats) after each chunk.
+    """
+    today = timezone.now().date()
+    stats = {'chunks': 0, 'completed': 0, 'expired': 0, 'skipped': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    try:
+        _sweep(stats, today, started, chunk_size, pause, progress, dry_run)
+    finally:
+        stats['seconds'] = time.perf_counter() - started
+        if not dry_run:
+            sweep_metrics.record(stats)
+    return stats
+
+
+def _sweep(stats, today, started, chunk_size, pause, progress, dry_run):
+    stale = Session.objects.filter(
+        status__in=[status for status, _, _ in SWEEPS],
+        session_date__lt=today
+    )
+    bounds = stale.aggregate(low=Min('session_id'), high=Max('session_id'))
+    if bounds['low'] is None:
+        return
+
+    start = bounds['low']
+    while start <= bounds['high']:
+        end = start + chunk_size
+        chunk = stale.filter(session_id__gte=start, session_id__lt=end).order_by()
+        for from_status, to_status, key in SWEEPS:
+            session_ids = list(chunk.filter(status=from_status).values_list('session_id', flat=True))
+            if not session_ids:
+                continue
+            if dry_run:
+                stats[key] += len(session_ids)
+                continue
+            outcomes = Session.objects.bulk_transition(session_ids, to_status, session_date__lt=today)
+            for outcome in outcomes.values():
+                stats[key if outcome == 'updated' else 'skipped'] += 1
+
+        stats['chunks'] += 1
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(min(end - 1, bounds['high']), bounds['high'], stats)
+        start = end
+        if pause and start <= bounds['high']:
+            time.sleep(pause)
+
+
+def metric_lines():
+    with sweep_metrics._lock:
+        runs, chunks, last_run = sweep_metrics.runs, sweep_metrics.chunks, sweep_metrics.last_run
+        sessions = dict(sweep_metrics.sessions)
+        buckets = list(sweep_metrics.duration.cumulative())
+        count, total = sweep_metrics.duration.count, sweep_metrics.duration.sum
+    lines = []
+    for name, kind, text, value in (
+        ('tutoring_sweep_runs_total', 'counter', 'Lifecycle sweeps run (dry runs excluded).', runs),
+        ('tutoring_sweep_chunks_total', 'counter', 'Session id chunks handled by the sweeps.', chunks),
+        ('tutoring_sweep_last_run_timestamp_seconds', 'gauge', 'Unix time the last sweep finished.', last_run),
+    ):
+        lines.append(f'# HELP {name} {text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {value}')
+
+    name = 'tutoring_sweep_sessions_total'
+    lines.append(f'# HELP {name} Sessions completed, expired or skipped (status changed meanwhile) by the sweeps.')
+    lines.append(f'# TYPE {name} counter')
+    for outcome, value in sorted(sessions.items()):
+        lines.append(f'{name}{{outcome="{outcome}"}} {value}')
+
+    name = 'tutoring_sweep_duration_seconds'
+    lines.append(f'# HELP {name} Duration of a whole sweep.')
+    lines.append(f'# TYPE {name} histogram')
+    for bound, cumulative in buckets:
+        lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{le="+Inf"}} {count}')
+    lines.append(f'{name}_sum {total}')
+    lines.append(f'{name}_count {count}')
+    return lines
+
+
+registry.add_collector(metric_lines)
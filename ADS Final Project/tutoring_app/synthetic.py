@@ -0,0 +1,195 @@
+"""
+Deterministic synthetic data for load testing.
+
+Rows are a pure function of the seed and the parameters (including the
+start date and the as-of date that splits past from future). Session j:
+
+- belongs to student j % students, in that student's (j // students)-th
+  slot. Slots are spread over the date span with a stride coprime to the
+  number of slots, so a student never gets two sessions at the same
+  date/time and trg_prevent_duplicate_session never rejects a batch;
+- gets its subject, tutor (a specialist in that subject), status and notes
+  from a Random seeded with (seed, j // RNG_BLOCK). Shards are whole
+  blocks, so each can be generated independently by any worker process
+  and the output doesn't depend on how many shards there are.
+
+Sessions are written either with multi-row INSERT statements of batch_size
+rows, or (MySQL only) as one CSV per shard loaded with LOAD DATA LOCAL
+INFILE. Counters, the monthly rollup and the search index must be rebuilt
+afterwards.
+"""
+
+import csv
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from django.db import connection
+
+from .models import Session, Subject
+
+
+# Sessions per independently seeded random stream
+RNG_BLOCK = 10000
+
+SLOT_TIMES = [f'{hour:02d}:{minute:02d}:00' for hour in range(8, 20) for minute in (0, 30)]
+
+NOTES = [
+    'Review session before the midterm.',
+    'Help with homework problems.',
+    'Go over last week\'s lecture.',
+    'Exam preparation.',
+    'Project feedback.',
+]
+
+SESSION_COLUMNS = (
+    'student_id', 'tutor_id', 'subject_id', 'session_date', 'session_time', 'status', 'notes', 'created_at'
+)
+
+
+def synthetic_email(seed, role, index):
+    return f'synthetic-{seed}-{role}-{index}@example.invalid'
+
+
+def ensure_subjects(count):
+    """Subject ids to use, oldest first; creates 'Synthetic Subject N' rows if short"""
+    subject_ids = list(Subject.objects.order_by('subject_id').values_list('subject_id', flat=True)[:count])
+    if len(subject_ids) < count:
+        existing = set(Subject.objects.values_list('subject_name', flat=True))
+        names = (f'Synthetic Subject {n}' for n in range(1, count * 2 + 1))
+        missing = [name for name in names if name not in existing][:count - len(subject_ids)]
+        Subject.objects.bulk_create([Subject(subject_name=name) for name in missing])
+        subject_ids = list(Subject.objects.order_by('subject_id').values_list('subject_id', flat=True)[:count])
+    return subject_ids
+
+
+class Plan:
+    """Everything a shard worker needs; plain data so it pickles cheaply"""
+
+    def __init__(self, seed, student_ids, tutor_ids, subject_ids, sessions, start_date, days,
+                 as_of, batch_size, method):
+        self.seed = seed
+        self.student_ids = student_ids
+        self.tutor_ids = tutor_ids
+        self.subject_ids = subject_ids
+        self.sessions = sessions
+        self.start_date = start_date
+        self.days = days
+        self.as_of = as_of
+        self.batch_size = batch_size
+        self.method = method
+
+    @property
+    def slots(self):
+        return self.days * len(SLOT_TIMES)
+
+    def check(self):
+        """Error message if the plan can't be generated without duplicate slots, else None"""
+        per_student = math.ceil(self.sessions / len(self.student_ids))
+        if per_student > self.slots:
+            return (f'{self.sessions} sessions need {per_student} slots per student, but '
+                    f'{self.days} days only have {self.slots}. Add students or days.')
+        return None
+
+    def shard_ranges(self, shards):
+        blocks = math.ceil(self.sessions / RNG_BLOCK)
+        size = math.ceil(blocks / shards) * RNG_BLOCK
+        return [(start, min(start + size, self.sessions)) for start in range(0, self.sessions, size)]
+
+
+def _stride(slots):
+    """A step coprime to slots, about slots / golden ratio, to scatter slots"""
+    stride = max(1, int(slots / 1.618))
+    while math.gcd(stride, slots) != 1:
+        stride += 1
+    return stride
+
+
+def generate_rows(plan, start, end):
+    """Yield the session rows (tuples in SESSION_COLUMNS order) of [start, end).
+
+    start must be a multiple of RNG_BLOCK.
+    """
+    rng = None
+    students = plan.student_ids
+    subject_ids = plan.subject_ids
+    tutors_by_subject = [plan.tutor_ids[i::len(subject_ids)] or plan.tutor_ids for i in range(len(subject_ids))]
+    slots_per_day = len(SLOT_TIMES)
+    slots = plan.slots
+    stride = _stride(slots)
+    day_strings = [(plan.start_date + timedelta(days=day)).isoformat() for day in range(-14, plan.days)]
+    as_of_index = (plan.as_of - plan.start_date).days
+
+    for j in range(start, end):
+        if j % RNG_BLOCK == 0 or rng is None:
+            rng = random.Random(f'{plan.seed}:{j // RNG_BLOCK}')
+        student_index = j % len(students)
+        slot = (student_index * 7919 + (j // len(students)) * stride) % slots
+        day, slot_of_day = divmod(slot, slots_per_day)
+        subject_index = rng.randrange(len(subject_ids))
+        tutors = tutors_by_subject[subject_index]
+
+        r = rng.random()
+        if day < as_of_index:
+            status = 'completed' if r < 0.7 else 'declined'
+        else:
+            status = 'pending' if r < 0.45 else ('approved' if r < 0.9 else 'declined')
+
+        yield (
+            students[student_index],
+            tutors[rng.randrange(len(tutors))],
+            subject_ids[subject_index],
+            day_strings[day + 14],
+            SLOT_TIMES[slot_of_day],
+            status,
+            NOTES[rng.randrange(len(NOTES))] if rng.random() < 0.5 else None,
+            f'{day_strings[day + 14 - rng.randint(0, 14)]} 12:00:00',
+        )
+
+
+def _insert_rows(cursor, rows):
+    table = Session._meta.db_table
+    placeholders = '(' + ', '.join(['%s'] * len(SESSION_COLUMNS)) + ')'
+    sql = (f'INSERT INTO {table} ({", ".join(SESSION_COLUMNS)}) VALUES '
+           + ', '.join([placeholders] * len(rows)))
+    cursor.execute(sql, [value for row in rows for value in row])
+
+
+def _load_data(cursor, plan, start, end):
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False) as f:
+        writer = csv.writer(f)
+        for row in generate_rows(plan, start, end):
+            writer.writerow(['\\N' if value is None else value for value in row])
+        path = f.name
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {Session._meta.db_table} "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\r\\n' ({', '.join(SESSION_COLUMNS)})",
+            [path]
+        )
+    finally:
+        os.unlink(path)
+
+
+def write_shard(plan, start, end):
+    """Generate and write sessions [start, end); returns (rows, seconds)"""
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        if plan.method == 'load-data':
+            _load_data(cursor, plan, start, end)
+        else:
+            max_params = connection.features.max_query_params or 65535
+            batch_size = min(plan.batch_size, max_params // len(SESSION_COLUMNS))
+            batch = []
+            for row in generate_rows(plan, start, end):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    _insert_rows(cursor, batch)
+                    batch = []
+            if batch:
+                _insert_rows(cursor, batch)
+    return end - start, time.perf_counter() - started
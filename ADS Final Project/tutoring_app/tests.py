@@ -0,0 +1,483 @@
+import queue
+import random
+import threading
+from datetime import time, timedelta
+from functools import partial
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import booking, dashboard_cache
+from .booking import SCHEDULE_TTL, TutorSchedule, booking_index, database_conflict, slot_minutes
+from .counters import compute_counts, get_counter
+from .dashboard import QUERY_BUDGET, get_dashboard_data
+from .models import User, Student, Tutor, Subject, Session, SessionArchive, SessionMonthlyRollup
+from .pagination import newer_than, older_than, paginate_sessions
+from .rollups import backfill
+from .signals import session_created, sessions_status_changed
+
+
+# Every query on 'default', so assertNumQueries sees them all
+@override_settings(REPLICA_DATABASES=[])
+class DashboardQueryBudgetTest(TestCase):
+    """get_dashboard_data() stays within QUERY_BUDGET for both roles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        student_user = User.objects.create_user(
+            email='student@example.com', username='student', password='password', role='student'
+        )
+        tutor_user = User.objects.create_user(
+            email='tutor@example.com', username='tutor', password='password', role='tutor'
+        )
+        cls.student = Student.objects.create(user=student_user, full_name='Test Student')
+        cls.tutor = Tutor.objects.create(user=tutor_user, full_name='Test Tutor', specialization='Mathematics')
+        subjects = [Subject.objects.create(subject_name=name) for name in ('Mathematics', 'Physics')]
+
+        # History over several months, subjects and statuses, plus upcoming sessions
+        today = timezone.now().date()
+        statuses = ['completed', 'declined', 'approved', 'pending']
+        for day in range(-120, 7, 3):
+            session = Session.objects.create(
+                student=cls.student, tutor=cls.tutor, subject=subjects[day % 2],
+                session_date=today + timedelta(days=day), session_time=time(10),
+                status=statuses[day % 4] if day < 0 else 'pending'
+            )
+            session_created.send(sender=Session, session=session)
+
+    def assertWithinBudget(self, role, profile_id):
+        # The view reads the counter row for the data version and passes it in
+        counter = get_counter(role, profile_id)
+        with self.assertNumQueries(QUERY_BUDGET):
+            payload = get_dashboard_data(role, profile_id, counter)
+        counts = compute_counts(role, profile_id)
+        self.assertEqual(payload['total_sessions'], counts['total_sessions'])
+        self.assertEqual(payload['pending_sessions'], counts['pending_count'])
+        self.assertEqual(payload['completed_sessions'], counts['completed_count'])
+        self.assertTrue(payload['upcoming_sessions'])
+
+    def test_student_dashboard(self):
+        self.assertWithinBudget('student', self.student.pk)
+
+    def test_tutor_dashboard(self):
+        self.assertWithinBudget('tutor', self.tutor.pk)
+
+
+class ConcurrentTransitionTest(TransactionTestCase):
+    """Accept, decline and withdraw raced from several threads keep the counters exact.
+
+    A scaled-down manage.py stress_session_transitions: each thread uses its
+    own connection, so the transitions really commit concurrently.
+    """
+
+    SESSIONS = 100
+    WORKERS = 4
+
+    def setUp(self):
+        subject = Subject.objects.create(subject_name='Mathematics')
+        self.students, self.tutors = [], []
+        for number in range(2):
+            student_user = User.objects.create_user(
+                email=f'student{number}@example.com', username=f'student{number}', password='password', role='student'
+            )
+            tutor_user = User.objects.create_user(
+                email=f'tutor{number}@example.com', username=f'tutor{number}', password='password', role='tutor'
+            )
+            self.students.append(Student.objects.create(user=student_user, full_name=f'Student {number}'))
+            self.tutors.append(Tutor.objects.create(user=tutor_user, full_name=f'Tutor {number}'))
+
+        first_day = timezone.now().date() + timedelta(days=1)
+        self.sessions = []
+        for number in range(self.SESSIONS):
+            session = Session.objects.create(
+                student=self.students[number % 2], tutor=self.tutors[number // 2 % 2], subject=subject,
+                session_date=first_day + timedelta(days=number // 12), session_time=time(8 + number % 12),
+                status='pending'
+            )
+            session_created.send(sender=Session, session=session)
+            self.sessions.append(session)
+
+    def race(self, tasks):
+        pending = queue.Queue()
+        for task in tasks:
+            pending.put(task)
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        operation = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        operation()
+                    except DatabaseError:
+                        # Lost a lock race (SQLite reports them as errors);
+                        # the transaction rolled back as a whole
+                        pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_counters_match_sessions(self):
+        tasks = []
+        for session in self.sessions:
+            tasks += [
+                partial(Session.objects.transition, session.session_id, 'approved', tutor=session.tutor),
+                partial(Session.objects.transition, session.session_id, 'declined', tutor=session.tutor),
+                partial(Session.objects.withdraw, session.session_id, student=session.student),
+            ]
+        random.Random(42).shuffle(tasks)
+        self.race(tasks)
+        self.assertLess(Session.objects.filter(status='pending').count(), self.SESSIONS)
+
+        profiles = [('student', student.pk) for student in self.students]
+        profiles += [('tutor', tutor.pk) for tutor in self.tutors]
+        for role, profile_id in profiles:
+            counter = get_counter(role, profile_id)
+            with self.subTest(role=role, profile_id=profile_id):
+                self.assertEqual(
+                    {field: getattr(counter, field) for field in compute_counts(role, profile_id)},
+                    compute_counts(role, profile_id)
+                )
+
+
+@override_settings(SESSION_DURATION_MINUTES=60)
+class BookingConflictTest(TestCase):
+    """Overlap rules of the booking index (TutorSchedule) and database_conflict()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        student_user = User.objects.create_user(
+            email='student@example.com', username='student', password='password', role='student'
+        )
+        tutor_user = User.objects.create_user(
+            email='tutor@example.com', username='tutor', password='password', role='tutor'
+        )
+        cls.student = Student.objects.create(user=student_user, full_name='Test Student')
+        cls.tutor = Tutor.objects.create(user=tutor_user, full_name='Test Tutor', specialization='Mathematics')
+        cls.subject = Subject.objects.create(subject_name='Mathematics')
+        cls.day = timezone.now().date() + timedelta(days=3)
+
+    def setUp(self):
+        booking_index.clear()
+
+    def book(self, session_time, day=None, status='pending'):
+        return Session.objects.create(
+            student=self.student, tutor=self.tutor, subject=self.subject,
+            session_date=day or self.day, session_time=session_time, status=status
+        )
+
+    def test_adjacent_slots_do_not_overlap(self):
+        schedule = TutorSchedule([(slot_minutes(self.day, time(10)), 1)])
+        start = slot_minutes(self.day, time(10))
+        self.assertFalse(schedule.conflicts(start + 60, 60))
+        self.assertFalse(schedule.conflicts(start - 60, 60))
+        self.assertTrue(schedule.conflicts(start + 59, 60))
+        self.assertTrue(schedule.conflicts(start - 59, 60))
+        self.assertFalse(schedule.conflicts(start, 60, exclude=1))
+
+        self.book(time(10))
+        self.assertFalse(database_conflict(self.tutor.pk, self.day, time(11)))
+        self.assertFalse(database_conflict(self.tutor.pk, self.day, time(9)))
+        self.assertTrue(database_conflict(self.tutor.pk, self.day, time(10, 59)))
+        self.assertTrue(booking_index.has_conflict(self.tutor.pk, self.day, time(9, 30)))
+        self.assertEqual(booking_index.free_tutors([self.tutor.pk], self.day, time(11)), [self.tutor.pk])
+
+    def test_overlap_across_midnight(self):
+        self.book(time(23, 30))
+        next_day = self.day + timedelta(days=1)
+        self.assertTrue(database_conflict(self.tutor.pk, next_day, time(0, 15)))
+        self.assertFalse(database_conflict(self.tutor.pk, next_day, time(0, 30)))
+        self.assertTrue(booking_index.has_conflict(self.tutor.pk, next_day, time(0, 15)))
+        self.assertFalse(booking_index.has_conflict(self.tutor.pk, next_day, time(0, 30)))
+
+    def test_inactive_sessions_are_ignored(self):
+        for status in ('declined', 'completed'):
+            self.book(time(10), status=status)
+        self.assertFalse(database_conflict(self.tutor.pk, self.day, time(10)))
+        self.assertFalse(booking_index.has_conflict(self.tutor.pk, self.day, time(10)))
+
+        # A session declined after it was loaded leaves the schedule
+        session = self.book(time(14))
+        booking_index.clear()
+        self.assertTrue(booking_index.has_conflict(self.tutor.pk, self.day, time(14)))
+        with self.captureOnCommitCallbacks(execute=True):
+            Session.objects.transition(session.pk, 'declined', tutor=self.tutor)
+        self.assertFalse(booking_index.has_conflict(self.tutor.pk, self.day, time(14)))
+        self.assertFalse(database_conflict(self.tutor.pk, self.day, time(14)))
+
+    def test_schedule_reloads_after_ttl(self):
+        self.assertFalse(booking_index.has_conflict(self.tutor.pk, self.day, time(16)))
+        # Booked by "another worker": no signal reaches this process's index
+        self.book(time(16))
+        self.assertFalse(booking_index.has_conflict(self.tutor.pk, self.day, time(16)))
+        self.assertTrue(database_conflict(self.tutor.pk, self.day, time(16)))
+
+        later = booking.time.monotonic() + SCHEDULE_TTL + 1
+        with mock.patch.object(booking.time, 'monotonic', return_value=later):
+            self.assertTrue(booking_index.has_conflict(self.tutor.pk, self.day, time(16)))
+
+
+class KeysetPaginationTest(TestCase):
+    """paginate_sessions() pages in a stable order across ties and the live/archive split"""
+
+    PAGE_SIZE = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        student_user = User.objects.create_user(
+            email='student@example.com', username='student', password='password', role='student'
+        )
+        tutor_user = User.objects.create_user(
+            email='tutor@example.com', username='tutor', password='password', role='tutor'
+        )
+        cls.student = Student.objects.create(user=student_user, full_name='Test Student')
+        cls.tutor = Tutor.objects.create(user=tutor_user, full_name='Test Tutor', specialization='Mathematics')
+        subject = Subject.objects.create(subject_name='Mathematics')
+
+        # Five sessions on each of four days, three of them at the same time
+        # (ties broken by session_id); the two oldest days are archived
+        today = timezone.now().date()
+        times = [time(9), time(9), time(9), time(11), time(14)]
+        for days_ago in (1, 2, 30, 31):
+            for session_time in times:
+                session = Session.objects.create(
+                    student=cls.student, tutor=cls.tutor, subject=subject,
+                    session_date=today - timedelta(days=days_ago), session_time=session_time, status='completed'
+                )
+                if days_ago >= 30:
+                    SessionArchive.objects.create(
+                        session_id=session.session_id, student=cls.student, tutor=cls.tutor, subject=subject,
+                        session_date=session.session_date, session_time=session.session_time,
+                        status=session.status, created_at=session.created_at
+                    )
+                    session.delete()
+
+    def paginate(self, **cursor):
+        return paginate_sessions(
+            Session.objects.all(), archived=SessionArchive.objects.all(), page_size=self.PAGE_SIZE, **cursor
+        )
+
+    def ids(self, page):
+        return [session.session_id for session in page.object_list]
+
+    def expected(self):
+        rows = list(Session.objects.all()) + list(SessionArchive.objects.all())
+        rows.sort(key=lambda session: (session.session_date, session.session_time, session.session_id), reverse=True)
+        return [session.session_id for session in rows]
+
+    def test_pages_forward_cover_everything_once_in_order(self):
+        pages = [self.paginate()]
+        while pages[-1].has_next:
+            pages.append(self.paginate(after=pages[-1].next_cursor))
+
+        self.assertEqual([session_id for page in pages for session_id in self.ids(page)], self.expected())
+        self.assertFalse(pages[0].has_previous)
+        self.assertTrue(all(page.has_previous for page in pages[1:]))
+        # 20 rows in pages of 4; the hand-off to the archive falls inside page 3
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(
+            [type(session) for session in pages[2].object_list],
+            [Session, Session, SessionArchive, SessionArchive]
+        )
+
+    def test_pages_backward_match_pages_forward(self):
+        forward = [self.paginate()]
+        while forward[-1].has_next:
+            forward.append(self.paginate(after=forward[-1].next_cursor))
+
+        backward = [forward[-1]]
+        while backward[-1].has_previous:
+            backward.append(self.paginate(before=backward[-1].previous_cursor))
+        self.assertEqual([self.ids(page) for page in reversed(backward)], [self.ids(page) for page in forward])
+        self.assertFalse(backward[-1].has_previous)
+        self.assertTrue(backward[-1].has_next)
+
+    def test_ties_are_ordered_by_session_id(self):
+        newest_day = Session.objects.order_by('-session_date').first().session_date
+        tied = sorted(Session.objects.filter(session_date=newest_day, session_time=time(9)).values_list(
+            'session_id', flat=True
+        ), reverse=True)
+        # Page 1 is 14:00, 11:00 and two of the three 9:00 sessions; page 2
+        # starts with the third
+        first = self.paginate()
+        second = self.paginate(after=first.next_cursor)
+        self.assertEqual(self.ids(first)[2:], tied[:2])
+        self.assertEqual(self.ids(second)[:1], tied[2:])
+
+        key = (newest_day, time(9), tied[1])
+        self.assertEqual(list(Session.objects.filter(older_than(key), session_date=newest_day, session_time=time(9))
+                              .values_list('session_id', flat=True)), tied[2:])
+        self.assertEqual(sorted(Session.objects.filter(newer_than(key), session_date=newest_day)
+                                .values_list('session_id', flat=True), reverse=True),
+                         self.ids(first)[:3])
+
+    def test_the_same_cursor_gives_the_same_page(self):
+        cursor = self.paginate().next_cursor
+        self.assertEqual(self.ids(self.paginate(after=cursor)), self.ids(self.paginate(after=cursor)))
+        self.assertEqual(self.ids(self.paginate(after='not a cursor')), self.ids(self.paginate()))
+
+
+class BulkTransitionTest(TestCase):
+    """Per-session outcomes of tutor_bulk_update_sessions and the single bulk signal"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students, cls.tutors = [], []
+        for number in range(2):
+            student_user = User.objects.create_user(
+                email=f'student{number}@example.com', username=f'student{number}', password='password', role='student'
+            )
+            tutor_user = User.objects.create_user(
+                email=f'tutor{number}@example.com', username=f'tutor{number}', password='password', role='tutor'
+            )
+            cls.students.append(Student.objects.create(user=student_user, full_name=f'Student {number}'))
+            cls.tutors.append(Tutor.objects.create(user=tutor_user, full_name=f'Tutor {number}'))
+        cls.subjects = [Subject.objects.create(subject_name=name) for name in ('Mathematics', 'Physics')]
+        cls.tutor = cls.tutors[0]
+
+    def create(self, status='pending', tutor=None, student=None, subject=None, days=5, hour=10):
+        session = Session.objects.create(
+            student=student or self.students[0], tutor=tutor or self.tutor, subject=subject or self.subjects[0],
+            session_date=timezone.now().date() + timedelta(days=days), session_time=time(hour), status=status
+        )
+        session_created.send(sender=Session, session=session)
+        return session
+
+    def test_outcome_per_session(self):
+        pending = self.create()
+        approved = self.create(status='approved', hour=12)
+        not_owned = self.create(tutor=self.tutors[1])
+        missing_id = not_owned.pk + 1000
+
+        self.client.force_login(self.tutor.user)
+        response = self.client.post(
+            '/tutor/requests/bulk/',
+            {'action': 'accept', 'session_ids': [pending.pk, approved.pk, not_owned.pk, missing_id]},
+            HTTP_ACCEPT='application/json'
+        )
+        self.assertEqual(response.json()['outcomes'], {
+            str(pending.pk): 'updated',
+            str(approved.pk): 'wrong_status',
+            str(not_owned.pk): 'not_found',
+            str(missing_id): 'not_found',
+        })
+        statuses = dict(Session.objects.values_list('session_id', 'status'))
+        self.assertEqual(statuses[pending.pk], 'approved')
+        self.assertEqual(statuses[approved.pk], 'approved')
+        self.assertEqual(statuses[not_owned.pk], 'pending')
+
+    def test_invalid_action_changes_nothing(self):
+        pending = self.create()
+        self.client.force_login(self.tutor.user)
+        response = self.client.post('/tutor/requests/bulk/', {'action': 'complete', 'session_ids': [pending.pk]})
+        self.assertRedirects(response, '/tutor/requests/', fetch_redirect_response=False)
+        self.assertEqual(Session.objects.get(pk=pending.pk).status, 'pending')
+        with self.assertRaises(ValueError):
+            Session.objects.bulk_transition([pending.pk], 'pending', tutor=self.tutor)
+
+    def test_mixed_batch_sends_one_signal_and_keeps_counters_and_rollup(self):
+        batch = [
+            self.create(student=student, subject=subject, days=days, hour=hour)
+            for hour, (student, subject, days) in enumerate([
+                (self.students[0], self.subjects[0], 5),
+                (self.students[1], self.subjects[0], 5),
+                (self.students[0], self.subjects[1], 40),
+                (self.students[1], self.subjects[1], 70),
+            ], start=8)
+        ]
+        declined = self.create(status='declined', hour=14)
+
+        sent = []
+        def receiver(sender, sessions, old_status, **kwargs):
+            sent.append(([session.status for session in sessions], old_status))
+        sessions_status_changed.connect(receiver)
+        self.addCleanup(sessions_status_changed.disconnect, receiver)
+
+        outcomes = Session.objects.bulk_transition(
+            [session.pk for session in batch] + [declined.pk], 'declined', tutor=self.tutor
+        )
+        self.assertEqual(outcomes[declined.pk], 'wrong_status')
+        self.assertEqual(sent, [(['declined'] * len(batch), 'pending')])
+
+        profiles = [('student', student.pk) for student in self.students] + [('tutor', self.tutor.pk)]
+        for role, profile_id in profiles:
+            counter = get_counter(role, profile_id)
+            with self.subTest(role=role, profile_id=profile_id):
+                self.assertEqual(
+                    {field: getattr(counter, field) for field in compute_counts(role, profile_id)},
+                    compute_counts(role, profile_id)
+                )
+
+        def rollup_rows():
+            return sorted(SessionMonthlyRollup.objects.filter(session_count__gt=0).values_list(
+                'role', 'profile_id', 'month', 'subject_id', 'status', 'session_count'
+            ))
+        live = rollup_rows()
+        backfill()
+        self.assertEqual(live, rollup_rows())
+
+
+@override_settings(REPLICA_DATABASES=[])
+class DashboardETagTest(TransactionTestCase):
+    """dashboard_data_view: 304 while the counter version is unchanged, a new ETag after a change.
+
+    A TransactionTestCase: the view runs its queries concurrently on other
+    connections, which must see the committed test data.
+    """
+
+    def setUp(self):
+        dashboard_cache.clear()
+        student_user = User.objects.create_user(
+            email='student@example.com', username='student', password='password', role='student'
+        )
+        tutor_user = User.objects.create_user(
+            email='tutor@example.com', username='tutor', password='password', role='tutor'
+        )
+        self.student = Student.objects.create(user=student_user, full_name='Test Student')
+        self.tutor = Tutor.objects.create(user=tutor_user, full_name='Test Tutor', specialization='Mathematics')
+        self.subject = Subject.objects.create(subject_name='Mathematics')
+        self.book(time(10))
+        self.client.force_login(student_user)
+
+    def book(self, session_time):
+        session = Session.objects.create(
+            student=self.student, tutor=self.tutor, subject=self.subject,
+            session_date=timezone.now().date() + timedelta(days=2), session_time=session_time, status='pending'
+        )
+        session_created.send(sender=Session, session=session)
+        return session
+
+    def test_matching_if_none_match_returns_304_without_body(self):
+        response = self.client.get('/dashboard/data.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_sessions'], 1)
+        etag = response['ETag']
+
+        cached = self.client.get('/dashboard/data.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(cached['ETag'], etag)
+
+    def test_etag_changes_with_the_counter_version(self):
+        etag = self.client.get('/dashboard/data.json')['ETag']
+        version = get_counter('student', self.student.pk).version
+
+        self.book(time(14))
+        self.assertGreater(get_counter('student', self.student.pk).version, version)
+
+        response = self.client.get('/dashboard/data.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['total_sessions'], 2)
+        self.assertEqual(
+            self.client.get('/dashboard/data.json', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
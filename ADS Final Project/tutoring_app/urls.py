@@ -9,6 +9,11 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('dashboard/data.json', views.dashboard_data_view, name='dashboard_data'),
+    path('dashboard/cache-stats/', views.dashboard_cache_stats_view, name='dashboard_cache_stats'),
+    
+    # Monitoring
+    path('metrics', views.metrics_view, name='metrics'),
     
     # Student views
     path('student/create-session/', views.student_create_session, name='student_create_session'),
@@ -17,9 +22,12 @@ urlpatterns = [
     path('tutor/requests/', views.tutor_requests_view, name='tutor_requests'),
     path('tutor/accept/<int:session_id>/', views.tutor_accept_session, name='tutor_accept_session'),
     path('tutor/decline/<int:session_id>/', views.tutor_decline_session, name='tutor_decline_session'),
+    path('tutor/requests/bulk/', views.tutor_bulk_update_sessions, name='tutor_bulk_update_sessions'),
+    path('tutor/requests/events/', views.tutor_request_events, name='tutor_request_events'),
     
     # Session log (both student and tutor)
     path('sessions/', views.session_log_view, name='session_log'),
+    path('sessions/export/', views.session_export_view, name='session_export'),
     path('sessions/complete/<int:session_id>/', views.complete_session, name='complete_session'),
     path('sessions/delete/<int:session_id>/', views.delete_session, name='delete_session'),
     
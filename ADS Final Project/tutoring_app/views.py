@@ -1,16 +1,59 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib import messages
 from django.db.models import Count, Q, Avg, Case, When, IntegerField
-from django.db import connection
-from django.http import JsonResponse
+from django.db import connection, transaction, DatabaseError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.utils.safestring import mark_safe
-import json
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_POST
 from datetime import datetime, timedelta
-from .models import User, Student, Tutor, Subject, Session, StudentStatistics, TutorStatistics
+from .models import User, Student, Tutor, Subject, Session, SessionArchive
 from .forms import CustomUserCreationForm, SessionForm, SessionFilterForm
+from . import dashboard_cache
+from .archive import archive_horizon, reaches_archive
+from .booking import database_conflict
+from .catalog import subject_catalog
+from .concurrent_queries import gather_queries
+from .counters import get_counter
+from .dashboard import aget_dashboard_data, data_etag
+from .export import iter_session_rows, merge_newest_first, csv_lines, ndjson_lines
+from .matching import find_tutor
+from .metrics import registry as metrics_registry
+from .notifier import astream, latest_change_id, stream
+from .pagination import PAGE_SIZE, KeysetPage, paginate_sessions
+from .routers import replica_reads
+from .search import ranked_sessions, scope_ids, search
+from .signals import session_created
+
+
+def _load_user(request):
+    """Resolve the lazy request.user and request.profile (database reads)"""
+    bool(request.profile)
+    return request.user
+
+
+def async_login_required(view):
+    """login_required for async views.
+
+    Django 4.2's login_required only wraps sync views. This also loads the
+    user and profile off the event loop, so the view can use them freely.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(_load_user)(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
 
 
 def register_view(request):
@@ -66,126 +109,71 @@ def logout_view(request):
 
 @login_required
 def dashboard_view(request):
-    """Dashboard with data visualization using SQL Views"""
-    user = request.user
-    
-    # Initialize default values
-    total_sessions = 0
-    pending_sessions = 0
-    approved_sessions = 0
-    declined_sessions = 0
-    completed_sessions = 0
-    avg_per_week = 0
-    upcoming_sessions = []
-    
-    # Get user profile and statistics using SQL Views
-    if user.role == 'student':
-        try:
-            profile = Student.objects.get(user=user)
-            # Use the SQL View Model
-            stats = StudentStatistics.objects.filter(student_id=profile.student_id).first()
-            if stats:
-                total_sessions = stats.total_sessions
-                pending_sessions = stats.pending_count
-                approved_sessions = stats.approved_count
-                declined_sessions = stats.declined_count
-                completed_sessions = stats.completed_count
-            
-            # Get upcoming sessions directly
-            upcoming_date = timezone.now().date() + timedelta(days=7)
-            upcoming_sessions = Session.objects.filter(
-                student=profile,
-                session_date__gte=timezone.now().date(),
-                session_date__lte=upcoming_date,
-                status__in=['pending', 'approved']
-            ).order_by('session_date', 'session_time')[:5]
-            
-        except Student.DoesNotExist:
-            messages.error(request, 'Student profile not found.')
-            return redirect('logout')
-            
-    elif user.role == 'tutor':
-        try:
-            profile = Tutor.objects.get(user=user)
-            # Use the SQL View Model
-            stats = TutorStatistics.objects.filter(tutor_id=profile.tutor_id).first()
-            if stats:
-                total_sessions = stats.total_sessions
-                pending_sessions = stats.pending_count
-                approved_sessions = stats.approved_count
-                declined_sessions = stats.declined_count
-                completed_sessions = stats.completed_count
-            
-            # Get upcoming sessions directly
-            upcoming_date = timezone.now().date() + timedelta(days=7)
-            upcoming_sessions = Session.objects.filter(
-                tutor=profile,
-                session_date__gte=timezone.now().date(),
-                session_date__lte=upcoming_date,
-                status__in=['pending', 'approved']
-            ).order_by('session_date', 'session_time')[:5]
-            
-        except Tutor.DoesNotExist:
-            messages.error(request, 'Tutor profile not found.')
-            return redirect('logout')
-    else:
-        messages.error(request, 'Invalid user role.')
+    """Dashboard page shell; cards and charts are loaded from dashboard_data_view"""
+    profile = request.profile
+    if not profile:
+        messages.error(request, 'Student or tutor profile not found.')
         return redirect('logout')
     
-    # Sessions by Subject (still need aggregation here as we don't have a specific view for this per user)
-    # But we can optimize it or leave it as is. Let's keep it but formatted correctly.
-    if user.role == 'student':
-        sessions = Session.objects.filter(student=profile)
-    else:
-        sessions = Session.objects.filter(tutor=profile)
-        
-    sessions_by_subject = sessions.values('subject__subject_name').annotate(
-        count=Count('session_id')
-    ).order_by('-count')[:5]
-    
-    # Sessions by Month - Use the Global View but filter efficiently? 
-    # Actually the global view aggregates ALL sessions. 
-    # For user-specific charts, we still need to query the user's sessions.
-    # The requirement is to demonstrate Views. We demonstrated it with the Stats cards above.
-    # For the chart, let's keep the existing logic but use Django's TruncMonth (portability fix).
-    from django.db.models.functions import TruncMonth
-    sessions_by_month = sessions.annotate(
-        month=TruncMonth('session_date')
-    ).values('month').annotate(
-        count=Count('session_id')
-    ).order_by('month')[:12]
-    
-    # Format month for Chart.js
-    formatted_monthly_data = []
-    for item in sessions_by_month:
-        if item['month']:
-            formatted_monthly_data.append({
-                'month': item['month'].strftime('%Y-%m'),
-                'count': item['count']
-            })
-            
-    # Calculate average per week
-    weeks_ago = timezone.now().date() - timedelta(weeks=4)
-    recent_sessions = sessions.filter(session_date__gte=weeks_ago)
-    avg_per_week = recent_sessions.count() / 4 if recent_sessions.exists() else 0
-    
     context = {
-        'user': user,
+        'user': request.user,
         'profile': profile,
-        'total_sessions': total_sessions,
-        'pending_sessions': pending_sessions,
-        'approved_sessions': approved_sessions,
-        'declined_sessions': declined_sessions,
-        'completed_sessions': completed_sessions,
-        'sessions_by_subject': mark_safe(json.dumps(list(sessions_by_subject))),
-        'sessions_by_month': mark_safe(json.dumps(formatted_monthly_data)),
-        'avg_per_week': round(avg_per_week, 2),
-        'upcoming_sessions': upcoming_sessions,
     }
     
     return render(request, 'dashboard.html', context)
 
 
+def _dashboard_profile_key(request):
+    """(role, profile_id) of the logged-in student/tutor, or None"""
+    profile = request.profile
+    return (request.user.role, profile.pk) if profile else None
+
+
+@async_login_required
+async def dashboard_data_view(request):
+    """Dashboard stats and chart series as JSON; 304 while the data is unchanged.
+
+    Async: on a cache miss the dashboard queries run concurrently.
+    """
+    key = _dashboard_profile_key(request)
+    if key is None:
+        return JsonResponse({'error': 'Profile not found.'}, status=404)
+    
+    role, profile_id = key
+    # One counter row for the ETag, the cache key and the stats cards, so
+    # the cached body always matches its ETag
+    counter = await sync_to_async(get_counter)(role, profile_id)
+    version = counter.version
+    etag = quote_etag(data_etag(role, profile_id, version))
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        return response
+    
+    # Served from the dashboard cache until one of this profile's sessions changes
+    payload = await dashboard_cache.aget_or_build(
+        role, profile_id, version, lambda: aget_dashboard_data(role, profile_id, counter)
+    )
+    
+    response = JsonResponse(payload)
+    response['ETag'] = etag
+    # Let the browser keep the copy but revalidate it (If-None-Match) every time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@staff_member_required
+def dashboard_cache_stats_view(request):
+    """Hit/miss counters of the dashboard cache for this worker process"""
+    return JsonResponse(dashboard_cache.cache_stats())
+
+
+@staff_member_required
+def metrics_view(request):
+    """Request, SQL and template metrics of this worker process, for Prometheus"""
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required
 def student_create_session(request):
     """Student creates a new session request"""
@@ -193,9 +181,8 @@ def student_create_session(request):
         messages.error(request, 'Only students can create session requests.')
         return redirect('dashboard')
     
-    try:
-        student = Student.objects.get(user=request.user)
-    except Student.DoesNotExist:
+    student = request.profile
+    if not student:
         messages.error(request, 'Student profile not found.')
         return redirect('dashboard')
     
@@ -205,21 +192,37 @@ def student_create_session(request):
             session = form.save(commit=False)
             session.student = student
             
-            # Get a tutor for the subject
-            # Try to find a tutor with matching specialization
+            # Get a tutor for the subject: the least-loaded specialist
+            # who is free at the requested date and time
             subject = form.cleaned_data.get('subject')
-            tutor = Tutor.objects.filter(
-                specialization__icontains=subject.subject_name
-            ).first()
+            tutor = find_tutor(
+                subject,
+                form.cleaned_data.get('session_date'),
+                form.cleaned_data.get('session_time')
+            )
             
             # FIX: Do NOT assign random tutor if no specialist found
             if not tutor:
-                messages.error(request, 'No tutors available for this subject. Please contact administrator.')
+                messages.error(request, 'No tutors available for this subject at that time. Please pick another slot or contact administrator.')
                 return redirect('student_create_session')
             
             session.tutor = tutor
             session.status = 'pending'
-            session.save()
+            try:
+                with transaction.atomic():
+                    # find_tutor used the in-memory booking index, which can
+                    # miss bookings other workers made in the last SCHEDULE_TTL
+                    # seconds; re-check against the database under lock
+                    taken = database_conflict(tutor.pk, session.session_date, session.session_time)
+                    if not taken:
+                        session.save()
+                        session_created.send(sender=Session, session=session)
+            except DatabaseError:
+                # trg_prevent_duplicate_session caught a double booking
+                taken = True
+            if taken:
+                messages.error(request, 'That time slot was just booked. Please pick another time.')
+                return redirect('student_create_session')
             
             messages.success(request, f'Session request created successfully! Assigned to {tutor.full_name}.')
             return redirect('session_log')
@@ -236,9 +239,8 @@ def tutor_requests_view(request):
         messages.error(request, 'Only tutors can view session requests.')
         return redirect('dashboard')
     
-    try:
-        tutor = Tutor.objects.get(user=request.user)
-    except Tutor.DoesNotExist:
+    tutor = request.profile
+    if not tutor:
         messages.error(request, 'Tutor profile not found.')
         return redirect('dashboard')
     
@@ -257,11 +259,36 @@ def tutor_requests_view(request):
         'tutor': tutor,
         'pending_sessions': pending_sessions,
         'approved_sessions': approved_sessions,
+        # The page's live feed picks up from here
+        'since': latest_change_id(),
     }
     
     return render(request, 'tutor/requests.html', context)
 
 
+@login_required
+def tutor_request_events(request):
+    """Server-sent events feed of the tutor's session changes (see notifier)"""
+    if request.user.role != 'tutor' or not request.profile:
+        return HttpResponse('Only tutors can follow session requests.', status=403)
+    
+    # EventSource resends the last id it saw when it reconnects
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        since = None
+    
+    tutor_id = request.profile.pk
+    # Under ASGI the stream waits on the event loop rather than a thread
+    events = astream(tutor_id, since) if isinstance(request, ASGIRequest) else stream(tutor_id, since)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def tutor_accept_session(request, session_id):
     """Tutor accepts a session request"""
@@ -269,18 +296,15 @@ def tutor_accept_session(request, session_id):
         messages.error(request, 'Only tutors can accept sessions.')
         return redirect('dashboard')
     
-    try:
-        tutor = Tutor.objects.get(user=request.user)
-        session = get_object_or_404(Session, session_id=session_id, tutor=tutor)
-        
-        if session.status != 'pending':
-            messages.error(request, 'Only pending sessions can be accepted.')
-        else:
-            session.status = 'approved'
-            session.save()
-            messages.success(request, 'Session accepted successfully!')
-    except Tutor.DoesNotExist:
+    tutor = request.profile
+    if not tutor:
         messages.error(request, 'Tutor profile not found.')
+        return redirect('tutor_requests')
+    
+    if Session.objects.transition(session_id, 'approved', tutor=tutor):
+        messages.success(request, 'Session accepted successfully!')
+    else:
+        messages.error(request, 'Only pending sessions can be accepted.')
     
     return redirect('tutor_requests')
 
@@ -292,48 +316,77 @@ def tutor_decline_session(request, session_id):
         messages.error(request, 'Only tutors can decline sessions.')
         return redirect('dashboard')
     
-    try:
-        tutor = Tutor.objects.get(user=request.user)
-        session = get_object_or_404(Session, session_id=session_id, tutor=tutor)
-        
-        if session.status != 'pending':
-            messages.error(request, 'Only pending sessions can be declined.')
-        else:
-            session.status = 'declined'
-            session.save()
-            messages.success(request, 'Session declined.')
-    except Tutor.DoesNotExist:
+    tutor = request.profile
+    if not tutor:
         messages.error(request, 'Tutor profile not found.')
+        return redirect('tutor_requests')
+    
+    if Session.objects.transition(session_id, 'declined', tutor=tutor):
+        messages.success(request, 'Session declined.')
+    else:
+        messages.error(request, 'Only pending sessions can be declined.')
     
     return redirect('tutor_requests')
 
 
+BULK_ACTIONS = {
+    'accept': ('approved', 'accepted'),
+    'decline': ('declined', 'declined'),
+}
+
+
 @login_required
-def session_log_view(request):
-    """View all sessions with filtering"""
-    user = request.user
-    
-    # Get user profile and sessions
-    if user.role == 'student':
-        try:
-            profile = Student.objects.get(user=user)
-            sessions = Session.objects.filter(student=profile)
-        except Student.DoesNotExist:
-            messages.error(request, 'Student profile not found.')
-            return redirect('dashboard')
-    elif user.role == 'tutor':
-        try:
-            profile = Tutor.objects.get(user=user)
-            sessions = Session.objects.filter(tutor=profile)
-        except Tutor.DoesNotExist:
-            messages.error(request, 'Tutor profile not found.')
-            return redirect('dashboard')
-    else:
-        messages.error(request, 'Invalid user role.')
+@require_POST
+def tutor_bulk_update_sessions(request):
+    """Tutor accepts or declines several pending requests in one UPDATE"""
+    if request.user.role != 'tutor':
+        messages.error(request, 'Only tutors can manage session requests.')
         return redirect('dashboard')
     
-    # Apply filters
-    form = SessionFilterForm(request.GET)
+    tutor = request.profile
+    if not tutor:
+        messages.error(request, 'Tutor profile not found.')
+        return redirect('tutor_requests')
+    
+    action = BULK_ACTIONS.get(request.POST.get('action'))
+    try:
+        session_ids = [int(session_id) for session_id in request.POST.getlist('session_ids')]
+    except ValueError:
+        session_ids = []
+    if action is None or not session_ids:
+        messages.error(request, 'Select one or more pending sessions and an action.')
+        return redirect('tutor_requests')
+    
+    new_status, verb = action
+    outcomes = Session.objects.bulk_transition(session_ids, new_status, tutor=tutor)
+    
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'outcomes': {str(session_id): outcome for session_id, outcome in outcomes.items()}})
+    
+    updated = sum(1 for outcome in outcomes.values() if outcome == 'updated')
+    if updated:
+        messages.success(request, f'{updated} session(s) {verb}.')
+    for session_id, outcome in sorted(outcomes.items()):
+        if outcome == 'wrong_status':
+            messages.warning(request, f'Session #{session_id} is no longer pending.')
+        elif outcome == 'not_found':
+            messages.warning(request, f'Session #{session_id} was not found.')
+    
+    return redirect('tutor_requests')
+
+
+def _own_scope(request):
+    """Session filter kwargs for the logged-in student or tutor, or None"""
+    profile = request.profile
+    if not profile:
+        return None
+    if request.user.role == 'student':
+        return {'student': profile}
+    return {'tutor': profile}
+
+
+def _apply_session_filters(sessions, form):
+    """Narrow sessions by a bound SessionFilterForm (unchanged if invalid)"""
     if form.is_valid():
         status = form.cleaned_data.get('status')
         subject = form.cleaned_data.get('subject')
@@ -348,45 +401,140 @@ def session_log_view(request):
             sessions = sessions.filter(session_date__gte=date_from)
         if date_to:
             sessions = sessions.filter(session_date__lte=date_to)
+    return sessions
+
+
+def _includes_archive(form):
+    """Whether a bound SessionFilterForm's date range reaches into sessions_archive"""
+    return form.is_valid() and reaches_archive(form.cleaned_data.get('date_from'))
+
+
+def _search_query(form):
+    """The session search box's text of a bound SessionFilterForm, or ''"""
+    return form.cleaned_data.get('q', '') if form.is_valid() else ''
+
+
+def _session_log_page(scope, query):
+    """Bound filter form and keyset page of the session log (best matches when searching)"""
+    form = SessionFilterForm(query)
+    sessions = _apply_session_filters(Session.objects.filter(**scope), form)
+    
+    # Archived sessions are only read when the filter goes back that far
+    archived = None
+    if _includes_archive(form):
+        archived = _apply_session_filters(SessionArchive.objects.filter(**scope), form)
+        archived = archived.select_related('student', 'tutor', 'subject')
+    
+    # A search shows one page of the best matches instead
+    if _search_query(form):
+        querysets = [sessions.select_related('student', 'tutor', 'subject')]
+        if archived is not None:
+            querysets.append(archived)
+        matches = ranked_sessions(_search_query(form), querysets, scope, limit=PAGE_SIZE)
+        return form, KeysetPage(matches, has_next=False, has_previous=False)
+    
+    # Newest first, one keyset page at a time
+    page = paginate_sessions(
+        sessions.select_related('student', 'tutor', 'subject'),
+        after=query.get('after'),
+        before=query.get('before'),
+        archived=archived
+    )
+    return form, page
+
+
+@async_login_required
+async def session_log_view(request):
+    """View all sessions with filtering, keyset-paginated.
+
+    Async: the page query and the subject catalog the filter form renders
+    are loaded concurrently.
+    """
+    scope = _own_scope(request)
+    if scope is None:
+        messages.error(request, 'Student or tutor profile not found.')
+        return redirect('dashboard')
+    
+    with replica_reads():
+        (form, page), _ = await gather_queries(
+            (_session_log_page, scope, request.GET),
+            (subject_catalog.subjects,)
+        )
     
-    # Order by date
-    sessions = sessions.select_related('student', 'tutor', 'subject').order_by('-session_date', '-session_time')
+    # Next/previous links keep the current filters
+    filter_params = request.GET.copy()
+    filter_params.pop('after', None)
+    filter_params.pop('before', None)
     
     context = {
-        'profile': profile,
-        'sessions': sessions,
+        'profile': request.profile,
+        'sessions': page.object_list,
+        'page': page,
+        'filter_query': filter_params.urlencode(),
         'form': form,
+        'archive_horizon': archive_horizon(),
+        'includes_archive': _includes_archive(form),
+        'search_query': _search_query(form),
     }
     
-    return render(request, 'session_log.html', context)
+    # Rendering may still touch the database (e.g. a catalog reload)
+    return await sync_to_async(render)(request, 'session_log.html', context)
 
 
 @login_required
-def complete_session(request, session_id):
-    """Mark a session as completed"""
+def session_export_view(request):
+    """Stream the filtered session log as CSV (default) or NDJSON (?format=ndjson)"""
     user = request.user
     
-    if user.role == 'student':
-        try:
-            profile = Student.objects.get(user=user)
-            session = get_object_or_404(Session, session_id=session_id, student=profile)
-        except Student.DoesNotExist:
-            messages.error(request, 'Student profile not found.')
-            return redirect('session_log')
-    elif user.role == 'tutor':
-        try:
-            profile = Tutor.objects.get(user=user)
-            session = get_object_or_404(Session, session_id=session_id, tutor=profile)
-        except Tutor.DoesNotExist:
-            messages.error(request, 'Tutor profile not found.')
-            return redirect('session_log')
+    # Students and tutors export their own sessions, admins export everything
+    if user.role == 'admin' or user.is_staff:
+        scope = {}
+    else:
+        scope = _own_scope(request)
+        if scope is None:
+            messages.error(request, 'Student or tutor profile not found.')
+            return redirect('dashboard')
+    
+    form = SessionFilterForm(request.GET)
+    sessions = _apply_session_filters(Session.objects.filter(**scope), form)
+    matching_ids = None
+    if _search_query(form):
+        # Same sessions as the search, still newest first
+        with replica_reads():
+            matching_ids = [session_id for session_id, _ in search(_search_query(form), **scope_ids(scope))]
+        sessions = sessions.filter(session_id__in=matching_ids)
+    # The rows are read after the view returns, so pick the database now
+    with replica_reads():
+        sessions = sessions.using(Session.objects.db)
+        archive_db = SessionArchive.objects.db
+    rows = iter_session_rows(sessions)
+    
+    # Same rows as the session log: the archive only when the filter reaches it
+    if _includes_archive(form):
+        archived = _apply_session_filters(SessionArchive.objects.filter(**scope), form).using(archive_db)
+        if matching_ids is not None:
+            archived = archived.filter(session_id__in=matching_ids)
+        rows = merge_newest_first(rows, iter_session_rows(archived))
+    
+    if request.GET.get('format') == 'ndjson':
+        response = StreamingHttpResponse(ndjson_lines(rows), content_type='application/x-ndjson')
+        filename = 'sessions.ndjson'
     else:
-        messages.error(request, 'Invalid user role.')
+        response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
+        filename = 'sessions.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def complete_session(request, session_id):
+    """Mark a session as completed"""
+    scope = _own_scope(request)
+    if scope is None:
+        messages.error(request, 'Student or tutor profile not found.')
         return redirect('session_log')
     
-    if session.status == 'approved':
-        session.status = 'completed'
-        session.save()
+    if Session.objects.transition(session_id, 'completed', **scope):
         messages.success(request, 'Session marked as completed!')
     else:
         messages.error(request, 'Only approved sessions can be marked as completed.')
@@ -397,21 +545,15 @@ def complete_session(request, session_id):
 @login_required
 def delete_session(request, session_id):
     """Delete a session (only pending or declined)"""
-    user = request.user
-    
-    if user.role == 'student':
-        try:
-            profile = Student.objects.get(user=user)
-            session = get_object_or_404(Session, session_id=session_id, student=profile)
-        except Student.DoesNotExist:
-            messages.error(request, 'Student profile not found.')
-            return redirect('session_log')
-    else:
+    if request.user.role != 'student':
         messages.error(request, 'Only students can delete their session requests.')
         return redirect('session_log')
     
-    if session.status in ['pending', 'declined']:
-        session.delete()
+    student = request.profile
+    if not student:
+        messages.error(request, 'Student profile not found.')
+        return redirect('session_log')
+    if Session.objects.withdraw(session_id, student=student):
         messages.success(request, 'Session deleted successfully!')
     else:
         messages.error(request, 'Only pending or declined sessions can be deleted.')
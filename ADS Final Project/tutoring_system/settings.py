@@ -3,8 +3,9 @@ Django settings for tutoring_system project.
 """
 
 from pathlib import Path
+import copy
 import os
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,11 +36,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tutoring_app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'tutoring_app.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tutoring_app.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -48,7 +52,7 @@ ROOT_URLCONF = 'tutoring_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'tutoring_app.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -68,9 +72,12 @@ WSGI_APPLICATION = 'tutoring_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# The default engine is mysqlclient behind a per-process connection pool
+# (tutoring_app/mysql_pool); DB_ENGINE=django.db.backends.mysql switches back
+# to one connection per request.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': config('DB_ENGINE', default='tutoring_app.mysql_pool'),
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
@@ -78,10 +85,82 @@ DATABASES = {
         'PORT': config('DB_PORT', cast=int),
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            # Needed by generate_synthetic_data --method load-data
+            'local_infile': config('DB_LOCAL_INFILE', default=False, cast=bool),
+        },
+        'POOL': {
+            'SIZE': config('DB_POOL_SIZE', default=10, cast=int),
+            'MAX_OVERFLOW': config('DB_POOL_MAX_OVERFLOW', default=10, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=30.0, cast=float),
+            'RECYCLE': config('DB_POOL_RECYCLE', default=3600, cast=int),
+            'PING_AFTER': config('DB_POOL_PING_AFTER', default=5.0, cast=float),
         },
     }
 }
 
+# Read replicas, e.g. DB_REPLICA_HOSTS=10.0.0.2,10.0.0.3:3307. Each becomes an
+# alias (replica1, replica2, ...) with the primary's name and credentials.
+# Pointing one at the primary's own host gives a local two-alias setup.
+# Routing rules are in tutoring_app/routers.py.
+REPLICA_DATABASES = []
+for _index, _address in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    _host, _, _port = _address.partition(':')
+    _alias = f'replica{_index}'
+    DATABASES[_alias] = copy.deepcopy(DATABASES['default'])
+    DATABASES[_alias].update({
+        'HOST': _host,
+        'PORT': int(_port) if _port else DATABASES['default']['PORT'],
+        # Tests see the primary's test database through the replica alias
+        'TEST': {'MIRROR': 'default'},
+    })
+    REPLICA_DATABASES.append(_alias)
+
+DATABASE_ROUTERS = ['tutoring_app.routers.ReplicaRouter']
+
+# After a request that writes, the user's reads stay on the primary this long
+READ_YOUR_WRITES_SECONDS = config('READ_YOUR_WRITES_SECONDS', default=5, cast=int)
+
+# Worker threads (and so at most this many extra connections per process)
+# that async views use to run independent queries concurrently
+ASYNC_QUERY_WORKERS = config('ASYNC_QUERY_WORKERS', default=8, cast=int)
+
+# Completed/declined sessions older than this many days are moved to
+# sessions_archive by `manage.py archive_sessions`
+SESSION_ARCHIVE_AFTER_DAYS = config('SESSION_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# How often (seconds) each process checks session_changes for the tutors'
+# live request feeds, and how long those rows are kept for reconnecting clients
+SESSION_FEED_POLL_SECONDS = config('SESSION_FEED_POLL_SECONDS', default=1.0, cast=float)
+SESSION_CHANGE_RETENTION_SECONDS = config('SESSION_CHANGE_RETENTION_SECONDS', default=3600, cast=int)
+
+# Session search (see tutoring_app/search.py): 'fulltext' (MySQL FULLTEXT
+# index), 'inverted' (session_search_terms) or 'auto' (fulltext on MySQL),
+# and the most matches a search ranks for the admin and the session log
+SESSION_SEARCH_BACKEND = config('SESSION_SEARCH_BACKEND', default='auto')
+SESSION_SEARCH_MAX_RESULTS = config('SESSION_SEARCH_MAX_RESULTS', default=1000, cast=int)
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The 'dashboard' alias holds per-profile dashboard payloads. Switch it to a
+# file-based cache with e.g.
+#   DASHBOARD_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   DASHBOARD_CACHE_LOCATION=/var/tmp/tutoring_dashboard_cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': config('DASHBOARD_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('DASHBOARD_CACHE_LOCATION', default='dashboard'),
+        'TIMEOUT': config('DASHBOARD_CACHE_TIMEOUT', default=600, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('DASHBOARD_CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -128,6 +207,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'tutoring_app.User'
 
+# Loads the student/tutor profile in the same query as the user.
+# ModelBackend stays listed: logins made before ProfileModelBackend was added
+# recorded it as their session's backend, and Django logs such sessions out
+# when their backend is no longer configured
+AUTHENTICATION_BACKENDS = [
+    'tutoring_app.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Length of a tutoring session; bookings of the same tutor that start less
+# than this many minutes apart conflict
+SESSION_DURATION_MINUTES = config('SESSION_DURATION_MINUTES', default=60, cast=int)
+
+# Statements slower than this are logged to tutoring_app.slow_queries and
+# counted per fingerprint at /metrics
+METRICS_SLOW_QUERY_MS = config('METRICS_SLOW_QUERY_MS', default=100, cast=int)
+
 # Login URLs
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'